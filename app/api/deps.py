@@ -17,7 +17,18 @@ def get_db():
     db.close()
 
 def get_current_user(credentials=Depends(security), db: Session = Depends(get_db)) -> User:
-  token = credentials.credentials
+  return _authenticate(credentials.credentials, db)
+
+def get_current_user_detached(credentials=Depends(security)) -> User:
+  """
+  Mesmo que get_current_user, mas com uma sessão própria fechada antes do endpoint rodar:
+  a conexão volta ao pool logo após carregar o usuário. Para endpoints longos (OCR, SSE)
+  que só precisam dos campos do usuário e abrem sessões curtas quando vão ao banco.
+  """
+  with SessionLocal() as db:
+    return _authenticate(credentials.credentials, db)
+
+def _authenticate(token: str, db: Session) -> User:
   credentials_exception = HTTPException(
     status_code=status.HTTP_401_UNAUTHORIZED,
     detail="Could not validate credentials",
@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, status
+from contextlib import aclosing
+from fastapi import APIRouter, Depends, Request, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
-from app.api.deps import get_db, get_current_user
+from app.api.deps import get_db, get_current_user, get_current_user_detached
 from app.models.user import User
 from app.api.services import chat_service
 from app.utils.responses import success_response, error_response, ResponseModel
+from app.utils.sse import format_sse
 
 router = APIRouter(prefix="/chat", tags=["Chatbot"])
 
@@ -43,3 +46,28 @@ async def ask_chatbot(
       message="Erro ao processar a pergunta: " + str(e),
       status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
     )
+
+@router.post("/ask/stream", summary="Faz uma pergunta ao chatbot IA, com a resposta por Server-Sent Events.")
+async def ask_chatbot_stream(
+  body: ChatQuestion,
+  request: Request,
+  current_user: User = Depends(get_current_user_detached)
+):
+  """
+  Versão em streaming de /chat/ask: emite "intent" (intenção e período detectados)
+  assim que a pergunta é classificada, um "token" a cada pedaço da resposta gerado
+  pelo Gemini e termina com "done" (chamadas ao Gemini, tokens e tempos) ou "error".
+  Se o cliente desconectar, a geração no Gemini é cancelada.
+  """
+  async def event_stream():
+    async with aclosing(chat_service.stream_answer(current_user.id, body.question)) as events:
+      async for event, data in events:
+        if await request.is_disconnected():
+          break
+        yield format_sse(event, data)
+
+  return StreamingResponse(
+    event_stream(),
+    media_type="text/event-stream",
+    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+  )
@@ -1,12 +1,10 @@
 from fastapi import APIRouter, Depends, status, Query
 from app.utils.responses import success_response, error_response, ResponseModel
 from app.schemas.entry import EntryOut, EntryCreate, EntryUpdate
-from app.schemas.notification import NotificationCreate
 from app.api.deps import get_db, get_current_user
 from sqlalchemy.orm import Session
 from app.crud.entry import entry as crud_entry
-from app.crud.goal import goal as crud_goal
-from app.crud.notification import notification as crud_notification
+from app.api.services import goal_service
 from app.models.user import User
 from datetime import date
 from typing import Optional
@@ -28,60 +26,7 @@ def create_entry(entry_in: EntryCreate, db: Session = Depends(get_db)):
       status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
     )
 
-  general_goal = crud_goal.get_goal_by_data(
-    db,
-    month=entry.entry_date.month,
-    year=entry.entry_date.year,
-    user_id=entry_in.user_id
-  )
-
-  category_goal = None
-
-  if(entry_in.category_id):
-    category_goal = crud_goal.get_goal_by_data(
-      db,
-      month=entry.entry_date.month,
-      year=entry.entry_date.year,
-      user_id=entry_in.user_id,
-      category_id=entry_in.category_id
-    )
-
-  if general_goal:
-    total_entries_value = crud_entry.get_sum_by_period(
-      db,
-      month=entry.entry_date.month,
-      year=entry.entry_date.year,
-      user_id=entry_in.user_id
-    )
-
-    if total_entries_value > general_goal.value:
-      crud_notification.create(
-        db,
-        NotificationCreate(
-          title="Meta Geral Atingida",
-          message=f"Você atingiu sua meta geral de {general_goal.value:.2f} com um total de entradas de {total_entries_value:.2f}.",
-          user_id=entry_in.user_id
-        )
-      )
-
-  if category_goal:
-    total_category_entries_value = crud_entry.get_sum_by_period(
-      db,
-      month=entry.entry_date.month,
-      year=entry.entry_date.year,
-      user_id=entry_in.user_id,
-      category_id=entry_in.category_id
-    )
-
-    if total_category_entries_value > category_goal.value:
-      crud_notification.create(
-        db,
-        NotificationCreate(
-          title="Meta por Categoria Atingida",
-          message=f"Você atingiu sua meta de {category_goal.value:.2f} para a categoria com um total de entradas de {total_category_entries_value:.2f}.",
-          user_id=entry_in.user_id
-        )
-      )
+  goal_service.notify_goals(db, entry)
 
   return success_response(
     data=EntryOut.from_orm(entry).model_dump(mode="json"),
@@ -115,60 +60,7 @@ def update_entry_type(entry_id: int, entry_in: EntryUpdate, db: Session = Depend
       status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
     )
 
-  general_goal = crud_goal.get_goal_by_data(
-    db,
-    month=updated_entry.entry_date.month,
-    year=updated_entry.entry_date.year,
-    user_id=entry_in.user_id
-  )
-
-  category_goal = None
-
-  if(entry_in.category_id):
-    category_goal = crud_goal.get_goal_by_data(
-      db,
-      month=updated_entry.entry_date.month,
-      year=updated_entry.entry_date.year,
-      user_id=entry_in.user_id,
-      category_id=entry_in.category_id
-    )
-
-  if general_goal:
-    total_entries_value = crud_entry.get_sum_by_period(
-      db,
-      month=updated_entry.entry_date.month,
-      year=updated_entry.entry_date.year,
-      user_id=entry_in.user_id
-    )
-
-    if total_entries_value > general_goal.value:
-      crud_notification.create(
-        db,
-        NotificationCreate(
-          title="Meta Geral Atingida",
-          message=f"Você atingiu sua meta geral de {general_goal.value:.2f} com um total de entradas de {total_entries_value:.2f}.",
-          user_id=entry_in.user_id
-        )
-      )
-
-  if category_goal:
-    total_category_entries_value = crud_entry.get_sum_by_period(
-      db,
-      month=updated_entry.entry_date.month,
-      year=updated_entry.entry_date.year,
-      user_id=entry_in.user_id,
-      category_id=entry_in.category_id
-    )
-
-    if total_category_entries_value > category_goal.value:
-      crud_notification.create(
-        db,
-        NotificationCreate(
-          title="Meta por Categoria Atingida",
-          message=f"Você atingiu sua meta de {category_goal.value:.2f} para a categoria com um total de entradas de {total_category_entries_value:.2f}.",
-          user_id=entry_in.user_id
-        )
-      )
+  goal_service.notify_goals(db, updated_entry)
 
   return success_response(
     data=EntryOut.from_orm(updated_entry).model_dump(mode="json"),
@@ -1,7 +1,23 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
+from app.core import metrics
+from app.api.services import ocr_pool
+from app.db.session import pool_status
 
 router = APIRouter(tags=["health"])
 
 @router.get("/health", summary="Healthcheck")
 async def health():
-  return {"status": "ok"}
\ No newline at end of file
+  return {"status": "ok"}
+
+@router.get("/health/ready", summary="Readiness: indica se o OCR já está carregado")
+async def ready():
+  ocr_ready = await ocr_pool.is_ready()
+  return JSONResponse(
+    status_code=status.HTTP_200_OK if ocr_ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+    content={"status": "ok" if ocr_ready else "warming_up", "ocr_ready": ocr_ready}
+  )
+
+@router.get("/metrics", summary="Métricas internas do processo (cache do OCR, tempos, contadores, pool do banco)")
+async def get_metrics():
+  return {**metrics.snapshot(), "db_pool": pool_status()}
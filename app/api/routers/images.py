@@ -1,42 +1,111 @@
-from fastapi import APIRouter, File, UploadFile, status
-from app.api.services import ocr_service
-from app.schemas.ocr import OCRResponse
+from fastapi import APIRouter, File, UploadFile, Query, status
+from app.core.config import settings
+from app.api.services import ocr_pool, upload_service, receipt_parser
+from app.schemas.ocr import OCRResponse, OCRBatchResponse, OCRBatchItem
 from app.utils.responses import success_response, error_response, ResponseModel
+from app.utils.enum import PerfilOCR
 
 router = APIRouter(tags=["images"])
 
 @router.post("/ocr", response_model=ResponseModel[OCRResponse], summary="Extrai texto de uma imagem usando EasyOCR.")
-async def perform_ocr(file: UploadFile = File(...)):
+async def perform_ocr(
+  file: UploadFile = File(...),
+  profile: PerfilOCR | None = Query(None, description="Perfil de OCR: fast, balanced ou accurate (padrão: OCR_DEFAULT_PROFILE).")
+):
   """
   Recebe uma imagem (PNG, JPEG, etc.) e retorna um JSON com o texto extraído.
+  O formato é conferido pelo conteúdo do arquivo, não pelo content-type informado.
   """
-  if not file.content_type.startswith("image/"):
-    return error_response(
-      error="Invalid file type",
-      message="O Conteúdo enviado não é uma imagem válida.",
-      status_code=status.HTTP_422_UNPROCESSABLE_ENTITY
-    )
-
   try:
-    contents = await file.read()
+    upload = await upload_service.read_upload(file, settings.UPLOAD_MAX_IMAGE_BYTES)
 
-    ocr_results = ocr_service.extract_text_from_image_content(contents)
+    ocr_results = await ocr_pool.extract_text(upload.view, profile)
+
+    extracted_data = receipt_parser.parse(ocr_results)
 
     return success_response(
-      data={"data": ocr_results},
+      data={"data": ocr_results, "extracted_data": extracted_data.model_dump(mode="json")},
       message="Categoria criada com sucesso.",
       status_code=status.HTTP_201_CREATED
     )
 
+  except upload_service.UploadTooLargeError as e:
+    return error_response(
+      error="Payload too large",
+      message=str(e),
+      status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    )
+  except upload_service.UnsupportedFileTypeError:
+    return error_response(
+      error="Invalid file type",
+      message="O Conteúdo enviado não é uma imagem válida.",
+      status_code=status.HTTP_422_UNPROCESSABLE_ENTITY
+    )
   except ValueError as e:
     return error_response(
       error="Value error",
       message="Erro de valor ao processar a imagem: " + str(e),
       status_code=status.HTTP_422_UNPROCESSABLE_ENTITY
     )
+  except ocr_pool.OCRQueueFullError as e:
+    return error_response(
+      error="OCR queue full",
+      message=str(e),
+      status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+  except ocr_pool.OCRTimeoutError as e:
+    return error_response(
+      error="OCR timeout",
+      message=str(e),
+      status_code=status.HTTP_504_GATEWAY_TIMEOUT
+    )
   except RuntimeError as e:
     return error_response(
       error="Runtime error",
       message="Erro em tempo de execução ao processar a imagem: " + str(e),
       status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
     )
+
+
+@router.post("/ocr/batch", response_model=ResponseModel[OCRBatchResponse], summary="Extrai texto de várias imagens em lote.")
+async def perform_ocr_batch(
+  files: list[UploadFile] = File(...),
+  profile: PerfilOCR | None = Query(None, description="Perfil de OCR: fast, balanced ou accurate (padrão: OCR_DEFAULT_PROFILE).")
+):
+  """
+  Recebe várias imagens e retorna o texto extraído de cada uma.
+  O OCR roda em lote; falhas são informadas por arquivo, sem afetar os demais.
+  """
+  if len(files) > settings.OCR_BATCH_MAX_FILES:
+    return error_response(
+      error="Too many files",
+      message=f"Envie no máximo {settings.OCR_BATCH_MAX_FILES} imagens por requisição.",
+      status_code=status.HTTP_422_UNPROCESSABLE_ENTITY
+    )
+
+  items: list[OCRBatchItem | None] = [None] * len(files)
+  valid_indexes, contents_list = [], []
+  for index, file in enumerate(files):
+    try:
+      upload = await upload_service.read_upload(file, settings.UPLOAD_MAX_IMAGE_BYTES)
+    except upload_service.UnsupportedFileTypeError:
+      items[index] = OCRBatchItem(filename=file.filename, success=False, error="O Conteúdo enviado não é uma imagem válida.")
+      continue
+    except upload_service.UploadTooLargeError as e:
+      items[index] = OCRBatchItem(filename=file.filename, success=False, error=str(e))
+      continue
+    valid_indexes.append(index)
+    contents_list.append(upload.view)
+
+  outcomes = await ocr_pool.extract_text_batch(contents_list, profile)
+
+  for index, outcome in zip(valid_indexes, outcomes):
+    if isinstance(outcome, Exception):
+      items[index] = OCRBatchItem(filename=files[index].filename, success=False, error=str(outcome))
+    else:
+      items[index] = OCRBatchItem(filename=files[index].filename, success=True, data=outcome)
+
+  return success_response(
+    data=OCRBatchResponse(items=items).model_dump(mode="json"),
+    message="Imagens processadas."
+  )
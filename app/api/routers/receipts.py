@@ -1,13 +1,28 @@
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, UploadFile, File, Query, status
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from app.core.config import settings
 from app.schemas.entry import EntryOut
-from app.api.services import receipt_service
+from app.schemas.receipt import ReceiptBatchResponse, ReceiptBatchItem, ReceiptTextRequest
+from app.schemas.receipt_job import ReceiptJobOut
+from app.api.services import receipt_service, receipt_job_service, receipt_hash_service, ocr_pool, upload_service
 from app.models.user import User
-from app.api.deps import get_current_user, get_db
+from app.api.deps import get_current_user_detached
 from app.utils.responses import success_response, error_response, ResponseModel
+from app.utils.sse import format_sse
+from app.utils.enum import PerfilOCR
 
 router = APIRouter(prefix="/receipts", tags=["receipts"])
 
+def duplicate_response(error: receipt_hash_service.DuplicateReceiptError):
+  """409 apontando o lançamento criado pelo recibo já enviado."""
+  return error_response(
+    error="Duplicate receipt",
+    message=str(error),
+    status_code=status.HTTP_409_CONFLICT,
+    data={"entry": error.entry.model_dump(mode="json"), "distance": error.distance}
+  )
+
 @router.post(
   "/upload",
   response_model=ResponseModel[EntryOut],
@@ -15,24 +30,157 @@ router = APIRouter(prefix="/receipts", tags=["receipts"])
   summary="Processa um recibo e cria um lançamento"
 )
 async def upload_and_process_receipt(
-  db: Session = Depends(get_db),
-  current_user: User = Depends(get_current_user),
-  file: UploadFile = File(...)
+  current_user: User = Depends(get_current_user_detached),
+  file: UploadFile = File(...),
+  profile: PerfilOCR | None = Query(None, description="Perfil de OCR da primeira tentativa (padrão: OCR_RECEIPT_PROFILE)."),
+  allow_duplicate: bool = Query(False, description="Processa mesmo que o recibo pareça já ter sido enviado.")
 ):
   """
-  Recebe um arquivo de imagem de um recibo, o processa e cria
+  Recebe um arquivo de imagem (ou PDF) de um recibo, o processa e cria
   um novo lançamento (entrada ou saída) para o usuário logado.
+  Se nenhum valor for encontrado, o OCR é repetido com o perfil mais preciso.
+  Nos PDFs, o texto das páginas é lido direto do arquivo; só as páginas sem texto passam pelo OCR.
+  O mesmo arquivo já enviado é recusado com 409 sem rodar o OCR; uma foto parecida com
+  um recibo já enviado, só se o valor e a data também baterem.
   """
   try:
+    upload = await upload_service.read_upload(file, settings.UPLOAD_MAX_IMAGE_BYTES, upload_service.RECEIPT_KINDS)
+
     # Chamada ao serviço assíncrono
     created_entry = await receipt_service.process_receipt_image(
-      db=db, user_id=current_user.id, file=file
+      user_id=current_user.id, contents=upload.view, profile=profile, allow_duplicate=allow_duplicate
     )
     return success_response(
-      data=EntryOut.from_orm(created_entry).model_dump(mode="json"),
+      data=created_entry.model_dump(mode="json"),
       message="Notificação atualizada com sucesso.",
       status_code=status.HTTP_201_CREATED
     )
+  except receipt_hash_service.DuplicateReceiptError as e:
+    return duplicate_response(e)
+  except upload_service.UploadTooLargeError as e:
+    return error_response(
+      error="Payload too large",
+      message=str(e),
+      status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    )
+  except upload_service.UnsupportedFileTypeError:
+    return error_response(
+      error="Invalid file type",
+      message="O Conteúdo enviado não é uma imagem ou PDF válido.",
+      status_code=status.HTTP_422_UNPROCESSABLE_ENTITY
+    )
+  except ValueError as e:
+    return error_response(
+      error="Value error",
+      message="Erro de valor: " + str(e),
+      status_code=status.HTTP_422_UNPROCESSABLE_ENTITY
+    )
+  except ocr_pool.OCRQueueFullError as e:
+    return error_response(
+      error="OCR queue full",
+      message=str(e),
+      status_code=status.HTTP_503_SERVICE_UNAVAILABLE
+    )
+  except ocr_pool.OCRTimeoutError as e:
+    return error_response(
+      error="OCR timeout",
+      message=str(e),
+      status_code=status.HTTP_504_GATEWAY_TIMEOUT
+    )
+  except Exception as e:
+    return error_response(
+      error="Error processing receipt",
+      message="Erro ao processar a receita: " + str(e),
+      status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+    )
+
+
+@router.post(
+  "/upload/batch",
+  response_model=ResponseModel[ReceiptBatchResponse],
+  summary="Processa vários recibos em lote e cria um lançamento para cada"
+)
+async def upload_and_process_receipt_batch(
+  current_user: User = Depends(get_current_user_detached),
+  files: list[UploadFile] = File(...),
+  profile: PerfilOCR | None = Query(None, description="Perfil de OCR da primeira tentativa (padrão: OCR_RECEIPT_PROFILE)."),
+  allow_duplicate: bool = Query(False, description="Processa mesmo os recibos que parecem já ter sido enviados.")
+):
+  """
+  Recebe vários recibos de uma vez (ex.: importação do mês inteiro), imagens ou PDFs como
+  em /receipts/upload. O OCR roda em lote e o resultado de cada arquivo (lançamento criado
+  ou erro) é informado separadamente.
+  """
+  if len(files) > settings.OCR_BATCH_MAX_FILES:
+    return error_response(
+      error="Too many files",
+      message=f"Envie no máximo {settings.OCR_BATCH_MAX_FILES} recibos por requisição.",
+      status_code=status.HTTP_422_UNPROCESSABLE_ENTITY
+    )
+
+  uploads: list[upload_service.UploadedFile | Exception] = []
+  for file in files:
+    try:
+      uploads.append(await upload_service.read_upload(file, settings.UPLOAD_MAX_IMAGE_BYTES, upload_service.RECEIPT_KINDS))
+    except upload_service.UnsupportedFileTypeError:
+      uploads.append(ValueError("O Conteúdo enviado não é uma imagem ou PDF válido."))
+    except upload_service.UploadTooLargeError as e:
+      uploads.append(e)
+
+  valid = [upload for upload in uploads if not isinstance(upload, Exception)]
+  try:
+    processed = iter(await receipt_service.process_receipt_batch(
+      user_id=current_user.id, contents_list=[upload.view for upload in valid], profile=profile,
+      allow_duplicate=allow_duplicate
+    ))
+    outcomes = [upload if isinstance(upload, Exception) else next(processed) for upload in uploads]
+  except Exception as e:
+    return error_response(
+      error="Error processing receipt",
+      message="Erro ao processar os recibos: " + str(e),
+      status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+    )
+
+  items = []
+  for file, outcome in zip(files, outcomes):
+    if isinstance(outcome, receipt_hash_service.DuplicateReceiptError):
+      items.append(ReceiptBatchItem(filename=file.filename, success=False, error=str(outcome), duplicate_of=outcome.entry_id))
+    elif isinstance(outcome, Exception):
+      items.append(ReceiptBatchItem(filename=file.filename, success=False, error=str(outcome)))
+    else:
+      items.append(ReceiptBatchItem(filename=file.filename, success=True, data=outcome))
+
+  return success_response(
+    data=ReceiptBatchResponse(items=items).model_dump(mode="json"),
+    message="Recibos processados."
+  )
+
+
+@router.post(
+  "/text",
+  response_model=ResponseModel[EntryOut],
+  status_code=status.HTTP_201_CREATED,
+  summary="Cria um lançamento a partir do texto de um recibo lido no aparelho"
+)
+async def process_receipt_text(
+  body: ReceiptTextRequest,
+  current_user: User = Depends(get_current_user_detached)
+):
+  """
+  Recebe o texto já extraído pelo OCR do aparelho (linhas simples ou itens com caixa
+  e confiança, no formato de OCRItem) e roda só a análise e a gravação do lançamento:
+  sem upload de imagem e sem OCR no servidor. O QR Code lido (NFC-e ou BR Code do PIX)
+  ou o PIX copia e cola vai em qr_code e, se trouxer o valor, dispensa as linhas.
+  O upload da imagem continua sendo o caminho para aparelhos sem OCR ou quando a
+  leitura local falhar.
+  """
+  try:
+    created_entry = await receipt_service.process_receipt_text(user_id=current_user.id, receipt=body)
+    return success_response(
+      data=created_entry.model_dump(mode="json"),
+      message="Recibo processado com sucesso.",
+      status_code=status.HTTP_201_CREATED
+    )
   except ValueError as e:
     return error_response(
       error="Value error",
@@ -45,3 +193,82 @@ async def upload_and_process_receipt(
       message="Erro ao processar a receita: " + str(e),
       status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
     )
+
+
+@router.post(
+  "/jobs",
+  response_model=ResponseModel[ReceiptJobOut],
+  status_code=status.HTTP_202_ACCEPTED,
+  summary="Enfileira um recibo para processamento assíncrono"
+)
+async def enqueue_receipt(
+  current_user: User = Depends(get_current_user_detached),
+  file: UploadFile = File(...)
+):
+  """
+  Guarda o recibo (imagem ou PDF, como em /receipts/upload) e responde imediatamente com o id do job (202).
+  O andamento é consultado em GET /receipts/jobs/{job_id} ou acompanhado
+  por SSE em GET /receipts/jobs/{job_id}/events.
+  O mesmo arquivo já enviado antes é recusado com 409, sem entrar na fila.
+  """
+  try:
+    upload = await upload_service.read_upload(file, settings.UPLOAD_MAX_IMAGE_BYTES, upload_service.RECEIPT_KINDS)
+  except upload_service.UploadTooLargeError as e:
+    return error_response(
+      error="Payload too large",
+      message=str(e),
+      status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    )
+  except upload_service.UnsupportedFileTypeError:
+    return error_response(
+      error="Invalid file type",
+      message="O Conteúdo enviado não é uma imagem ou PDF válido.",
+      status_code=status.HTTP_422_UNPROCESSABLE_ENTITY
+    )
+
+  try:
+    image_hash = await receipt_service.hash_image(upload.view)
+    job = await run_in_threadpool(receipt_job_service.enqueue, current_user.id, upload.buffer, file.filename, image_hash)
+  except receipt_hash_service.DuplicateReceiptError as e:
+    return duplicate_response(e)
+  except Exception as e:
+    return error_response(
+      error="Error processing receipt",
+      message="Erro ao processar a receita: " + str(e),
+      status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+    )
+  return success_response(
+    data=job.model_dump(mode="json"),
+    message="Recibo recebido e enfileirado para processamento.",
+    status_code=status.HTTP_202_ACCEPTED
+  )
+
+@router.get("/jobs/{job_id}", response_model=ResponseModel[ReceiptJobOut], summary="Consulta o andamento de um recibo enfileirado")
+async def read_receipt_job(job_id: str, current_user: User = Depends(get_current_user_detached)):
+  job = await run_in_threadpool(receipt_job_service.get_job, job_id, current_user.id)
+  if not job:
+    return error_response(
+      error="Job not found",
+      message="Processamento de recibo não encontrado.",
+      status_code=status.HTTP_404_NOT_FOUND
+    )
+  return success_response(
+    data=job.model_dump(mode="json"),
+    message="Processamento de recibo encontrado com sucesso."
+  )
+
+@router.get("/jobs/{job_id}/events", summary="Acompanha o andamento de um recibo por Server-Sent Events")
+async def stream_receipt_job(job_id: str, current_user: User = Depends(get_current_user_detached)):
+  """
+  Emite um evento "progress" a cada etapa (decoded, ocr_done, parsed, entry_created)
+  e termina com "done" (com o lançamento criado) ou "failed".
+  """
+  async def event_stream():
+    async for event, data in receipt_job_service.stream_events(job_id, current_user.id):
+      yield format_sse(event, data)
+
+  return StreamingResponse(
+    event_stream(),
+    media_type="text/event-stream",
+    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+  )
@@ -3,6 +3,8 @@ from fastapi.responses import StreamingResponse
 from io import BytesIO
 from sqlalchemy.orm import Session
 from app.api.deps import get_db, get_current_user
+from app.api.services import upload_service
+from app.core.config import settings
 from app.crud.user import user as crud_user
 from app.models.user import User
 from app.schemas.user import UserCreate, UserOut, UserUpdate
@@ -127,8 +129,23 @@ async def upload_profile_image(
       status_code=status.HTTP_404_NOT_FOUND
     )
 
-  profile_image = await image.read()
-  updated_user = crud_user.update_profile_image(db, obj, profile_image, image.filename, image.content_type)
+  try:
+    upload = await upload_service.read_upload(image, settings.UPLOAD_MAX_PROFILE_IMAGE_BYTES)
+  except upload_service.UploadTooLargeError as e:
+    return error_response(
+      error="Payload too large",
+      message=str(e),
+      status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    )
+  except upload_service.UnsupportedFileTypeError:
+    return error_response(
+      error="Invalid file type",
+      message="O Conteúdo enviado não é uma imagem válida.",
+      status_code=status.HTTP_422_UNPROCESSABLE_ENTITY
+    )
+
+  # O content-type gravado vem do conteúdo do arquivo, não do que o cliente informou
+  updated_user = crud_user.update_profile_image(db, obj, bytes(upload.buffer), image.filename, upload.content_type)
 
   return success_response(
     data=UserOut.from_orm(updated_user).model_dump(mode="json"),
@@ -1,20 +1,28 @@
 from sqlalchemy.orm import Session
+from dataclasses import dataclass
+import asyncio
+from contextlib import aclosing
 from datetime import datetime, timedelta
 import google.generativeai as genai
 import json
 import re
-from typing import List, Optional
+import time
+from typing import AsyncIterator, List, Optional
 
 from app.core.config import settings
+from app.core import metrics
+from app.core.logger_config import logger
+from app.api.services import intent_cache, intent_classifier
 from app.crud.entry import entry as crud_entry
+from app.db.session import SessionLocal
 from app.models.entry import Entry
-from app.api.services import ocr_service # Importa o serviço de OCR que já funciona
 
 # Configura o cliente do Google Gemini com a chave de API do nosso .env
 genai.configure(api_key=settings.GOOGLE_API_KEY)
 
 # 1. PROMPT DE EXTRAÇÃO DE INTENÇÃO
-PROMPT_EXTRACAO_INTENCAO = f"""
+# Montado a cada pergunta (_intent_prompt): as datas de referência são as do dia da pergunta
+PROMPT_EXTRACAO_INTENCAO = """
 Analise a pergunta do usuário sobre finanças pessoais e retorne um JSON com a intenção principal e as entidades relevantes.
 
 Intenções Possíveis:
@@ -31,8 +39,8 @@ Entidades a Extrair (se presentes na pergunta):
 - categoria: Nome da categoria de despesa ou receita mencionada (ex: "Alimentação", "Salário"). Se não mencionado, retorne null.
 - nome_cofrinho: Nome do cofrinho mencionado. Se não mencionado, retorne null.
 
-Ano Atual de Referência: {datetime.now().year}
-Mês Atual de Referência: {datetime.now().month}
+Ano Atual de Referência: {ano_atual}
+Mês Atual de Referência: {mes_atual}
 
 Formato da Resposta: JSON
 Exemplo de Resposta para "quanto gastei com lazer em julho?":
@@ -48,7 +56,7 @@ Exemplo de Resposta para "resumo do ano passado":
 {{
   "intencao": "resumo_anual",
   "mes": null,
-  "ano": {datetime.now().year - 1},
+  "ano": {ano_passado},
   "categoria": null,
   "nome_cofrinho": null
 }}
@@ -63,25 +71,72 @@ Exemplo de Resposta para "dicas para economizar":
 }}
 
 PERGUNTA DO USUÁRIO:
-{{PERGUNTA_USUARIO}}
+{pergunta}
 
 JSON RESULTADO:
 """
 
-async def _extract_intent(question: str) -> dict | None:
-  """Usa o Gemini para extrair a intenção e as entidades da pergunta do usuário."""
+@dataclass
+class LLMUsage:
+  """Chamadas ao Gemini feitas para responder uma pergunta."""
+  calls: int = 0
+  elapsed_ms: float = 0.0
+
+async def _generate(prompt: str, purpose: str, usage: LLMUsage) -> str:
+  """Chamada ao Gemini com contagem e tempo (por pergunta em usage, por processo em GET /metrics)."""
   model = genai.GenerativeModel('gemini-1.5-flash')
-  prompt_completo = PROMPT_EXTRACAO_INTENCAO.replace("{{PERGUNTA_USUARIO}}", question)
+  started = time.perf_counter()
+  try:
+    response = await model.generate_content_async(prompt)
+    return response.text
+  finally:
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    usage.calls += 1
+    usage.elapsed_ms += elapsed_ms
+    metrics.increment(f"chat.llm_calls.{purpose}")
+    metrics.observe_ms(f"chat.llm.{purpose}", elapsed_ms)
+
+def _intent_prompt(question: str, now: datetime) -> str:
+  return PROMPT_EXTRACAO_INTENCAO.format(
+    ano_atual=now.year, mes_atual=now.month, ano_passado=now.year - 1, pergunta=question
+  )
 
+async def _extract_intent(question: str, now: datetime, usage: LLMUsage) -> dict | None:
+  """Usa o Gemini para extrair a intenção e as entidades da pergunta do usuário."""
   try:
-    response = await model.generate_content_async(prompt_completo)
-    texto_json = response.text
+    texto_json = await _generate(_intent_prompt(question, now), "intent", usage)
     json_limpo = re.sub(r'```json\s*|\s*```', '', texto_json, flags=re.DOTALL).strip()
     return json.loads(json_limpo)
   except Exception as e:
-    print(f"Erro ao extrair intenção: {e}")
+    logger.warning(f"Erro ao extrair intenção: {e}")
     return None
 
+async def _resolve_intent(question: str, usage: LLMUsage) -> dict | None:
+  """
+  Intenção pelo classificador local (intent_classifier); o Gemini só é consultado
+  quando a confiança fica abaixo de CHAT_INTENT_MIN_CONFIDENCE. Perguntas repetidas
+  no mesmo mês saem do intent_cache, sem classificar de novo.
+  """
+  now = datetime.now()
+  cache = intent_cache.get_cache()
+  if cache is not None:
+    cached = cache.get(question, now)
+    if cached is not None:
+      return cached
+
+  local = intent_classifier.classify(question, now.date())
+  if local.confidence >= settings.CHAT_INTENT_MIN_CONFIDENCE:
+    metrics.increment("chat.intent.local")
+    intent = local.as_dict()
+  else:
+    metrics.increment("chat.intent.llm")
+    intent = await _extract_intent(question, now, usage)
+
+  # Falha do Gemini não fica no cache: a próxima pergunta igual tenta de novo
+  if cache is not None and intent is not None:
+    cache.put(question, now, intent)
+  return intent
+
 # --- Funções de Busca de Dados (Adaptação do seu código Dart) ---
 async def _fetch_monthly_expense_data(db: Session, user_id: int, dt: datetime) -> List[Entry]:
   start_date = dt.replace(day=1)
@@ -168,14 +223,26 @@ def _build_expense_prompt(
   return prompt
 
 
-# 3. ORQUESTRADOR PRINCIPAL (Adaptação da sua função _sendMessage)
-async def ask_question(db: Session, user_id: int, question: str) -> str:
-  """Orquestra todo o processo de resposta do chatbot."""
-  intent_json = await _extract_intent(question)
+@dataclass
+class AnswerPlan:
+  """Intenção detectada, período consultado e o prompt da resposta (ou a resposta pronta, sem Gemini)."""
+  intent: str
+  period: datetime
+  categoria: Optional[str] = None
+  prompt: Optional[str] = None
+  answer: Optional[str] = None
+  # Mês e ano citados na pergunta (None quando ela não traz o período, como no classificador)
+  mes: Optional[int] = None
+  ano: Optional[int] = None
+
+async def _plan_answer(db: Session, user_id: int, question: str, usage: LLMUsage) -> AnswerPlan:
+  """Resolve a intenção, busca os dados e monta o prompt final (etapas comuns a ask_question e stream_answer)."""
+  intent_json = await _resolve_intent(question, usage)
 
   intent = "pergunta_geral"
   data_para_busca = datetime.now()
   categoria = None
+  mes_extraido = ano_extraido = None
 
   if intent_json:
     intent = intent_json.get("intencao", "pergunta_geral")
@@ -189,26 +256,147 @@ async def ask_question(db: Session, user_id: int, question: str) -> str:
     elif ano_extraido:
       data_para_busca = datetime(ano_para_busca, 1, 1)
 
+  plan = AnswerPlan(intent, data_para_busca, categoria, mes=mes_extraido, ano=ano_extraido)
+
   # 2. Buscar dados e construir o prompt final
   if intent == "resumo_mensal":
     despesas = await _fetch_monthly_expense_data(db, user_id, data_para_busca)
     receitas = await _fetch_monthly_income_data(db, user_id, data_para_busca)
 
     # Chama a função que criamos acima
-    prompt_final = _build_monthly_summary_prompt(question, receitas, despesas, data_para_busca)
+    plan.prompt = _build_monthly_summary_prompt(question, receitas, despesas, data_para_busca)
 
   elif intent == "consulta_despesas":
     # TODO: Implementar a busca de despesas por categoria/mês e chamar um prompt específico
     # Por enquanto, vamos retornar uma resposta indicando que a lógica está aqui
-    return "Entendi que você quer consultar despesas. Vamos implementar isso em seguida!"
+    plan.answer = "Entendi que você quer consultar despesas. Vamos implementar isso em seguida!"
 
   # ... TODO: Adicionar a lógica para as outras intenções ...
 
   else: # Pergunta geral
-    prompt_final = f"Responda sempre em português do Brasil. A minha pergunta é: {question}"
+    plan.prompt = f"Responda sempre em português do Brasil. A minha pergunta é: {question}"
 
-  # 3. Gerar a resposta final com o Gemini
-  model = genai.GenerativeModel('gemini-1.5-flash')
-  response = await model.generate_content_async(prompt_final)
+  return plan
+
+# 3. ORQUESTRADOR PRINCIPAL (Adaptação da sua função _sendMessage)
+async def ask_question(db: Session, user_id: int, question: str) -> str:
+  """Orquestra todo o processo de resposta do chatbot."""
+  usage = LLMUsage()
+  plan = await _plan_answer(db, user_id, question, usage)
+
+  if plan.answer is not None:
+    answer = plan.answer
+  else:
+    # 3. Gerar a resposta final com o Gemini
+    answer = await _generate(plan.prompt, "answer", usage)
+  _log_usage(plan.intent, usage)
+  return answer
 
-  return response.text
+async def _stream_generate(prompt: str, tokens: dict) -> AsyncIterator[str]:
+  """
+  Resposta do Gemini em pedaços, conforme são gerados (generate_content_async com stream=True).
+  A leitura roda em uma task separada: se quem consome parar (cliente desconectou),
+  a task é cancelada e a geração no Gemini é interrompida junto.
+  Ao terminar, tokens recebe a contagem informada pelo Gemini.
+  """
+  model = genai.GenerativeModel('gemini-1.5-flash')
+  chunks: asyncio.Queue = asyncio.Queue()
+
+  async def pump() -> None:
+    try:
+      response = await model.generate_content_async(prompt, stream=True)
+      async for chunk in response:
+        await chunks.put(chunk.text)
+      usage_metadata = getattr(response, "usage_metadata", None)
+      if usage_metadata is not None:
+        tokens["prompt"] = usage_metadata.prompt_token_count
+        tokens["output"] = usage_metadata.candidates_token_count
+      await chunks.put(None)
+    except Exception as e:
+      await chunks.put(e)
+
+  task = asyncio.create_task(pump())
+  finished = False
+  try:
+    while True:
+      item = await chunks.get()
+      if item is None:
+        finished = True
+        return
+      if isinstance(item, Exception):
+        finished = True
+        raise item
+      yield item
+  finally:
+    if not finished:
+      task.cancel()
+      metrics.increment("chat.stream.cancelled")
+
+async def stream_answer(user_id: int, question: str) -> AsyncIterator[tuple[str, dict]]:
+  """
+  Versão em streaming de ask_question. Gera (evento, dados):
+  - "intent": intenção, período e categoria, antes da resposta;
+  - "token": cada pedaço da resposta, assim que o Gemini o gera;
+  - "done": chamadas ao Gemini, tokens e tempos (até o primeiro pedaço e total);
+  - "error": falha ao entender a pergunta ou buscar os dados (no lugar de todos os
+    outros eventos) ou ao gerar a resposta (antes do "done").
+
+  A sessão do banco fica aberta só enquanto os dados da pergunta são buscados,
+  não durante a geração da resposta.
+  """
+  started = time.perf_counter()
+  usage = LLMUsage()
+  try:
+    with SessionLocal() as db:
+      plan = await _plan_answer(db, user_id, question, usage)
+  except Exception as e:
+    # Banco fora do ar, período inválido vindo do Gemini (ex.: mês 13)...
+    logger.warning(f"Erro ao preparar a resposta do chat: {e}")
+    yield "error", {"message": f"Erro ao processar a pergunta: {e}"}
+    return
+
+  yield "intent", {
+    "intencao": plan.intent,
+    "mes": plan.mes,
+    "ano": plan.ano,
+    "categoria": plan.categoria,
+  }
+
+  first_token_ms = None
+  tokens: dict = {}
+  if plan.answer is not None:
+    first_token_ms = (time.perf_counter() - started) * 1000
+    yield "token", {"text": plan.answer}
+  else:
+    generation_started = time.perf_counter()
+    try:
+      # aclosing: se este gerador for fechado (cliente desconectou), a geração no Gemini é cancelada na hora
+      async with aclosing(_stream_generate(plan.prompt, tokens)) as chunks:
+        async for text in chunks:
+          if first_token_ms is None:
+            first_token_ms = (time.perf_counter() - started) * 1000
+            metrics.observe_ms("chat.stream.first_token", first_token_ms)
+          yield "token", {"text": text}
+    except Exception as e:
+      logger.warning(f"Erro ao gerar a resposta do chat: {e}")
+      yield "error", {"message": f"Erro ao gerar a resposta: {e}"}
+    finally:
+      elapsed_ms = (time.perf_counter() - generation_started) * 1000
+      usage.calls += 1
+      usage.elapsed_ms += elapsed_ms
+      metrics.increment("chat.llm_calls.answer")
+      metrics.observe_ms("chat.llm.answer", elapsed_ms)
+
+  _log_usage(plan.intent, usage)
+  yield "done", {
+    "llm_calls": usage.calls,
+    "llm_ms": round(usage.elapsed_ms, 1),
+    "prompt_tokens": tokens.get("prompt"),
+    "output_tokens": tokens.get("output"),
+    "first_token_ms": round(first_token_ms, 1) if first_token_ms is not None else None,
+    "total_ms": round((time.perf_counter() - started) * 1000, 1),
+  }
+
+def _log_usage(intent: str, usage: LLMUsage) -> None:
+  metrics.observe_ms("chat.llm_per_question", usage.elapsed_ms)
+  logger.info(f"Chat: intenção {intent}, {usage.calls} chamada(s) ao Gemini em {usage.elapsed_ms:.0f} ms")
@@ -0,0 +1,50 @@
+from sqlalchemy.orm import Session
+from app.crud.entry import entry as crud_entry
+from app.crud.goal import goal as crud_goal
+from app.crud.notification import notification as crud_notification
+from app.models.entry import Entry
+from app.schemas.notification import NotificationCreate
+
+def notify_goals(db: Session, entry: Entry, commit: bool = True) -> None:
+  """
+  Cria as notificações de meta (geral e da categoria) ultrapassadas no mês do lançamento.
+  commit=False só faz o flush: quem chamou confirma a transação.
+  """
+  month, year = entry.entry_date.month, entry.entry_date.year
+
+  general_goal = crud_goal.get_goal_by_data(db, month=month, year=year, user_id=entry.user_id)
+  category_goal = None
+  if entry.category_id:
+    category_goal = crud_goal.get_goal_by_data(
+      db, month=month, year=year, user_id=entry.user_id, category_id=entry.category_id
+    )
+
+  if general_goal:
+    total_entries_value = crud_entry.get_sum_by_period(db, month=month, year=year, user_id=entry.user_id)
+
+    if total_entries_value > general_goal.value:
+      crud_notification.create(
+        db,
+        NotificationCreate(
+          title="Meta Geral Atingida",
+          message=f"Você atingiu sua meta geral de {general_goal.value:.2f} com um total de entradas de {total_entries_value:.2f}.",
+          user_id=entry.user_id
+        ),
+        commit=commit,
+      )
+
+  if category_goal:
+    total_category_entries_value = crud_entry.get_sum_by_period(
+      db, month=month, year=year, user_id=entry.user_id, category_id=entry.category_id
+    )
+
+    if total_category_entries_value > category_goal.value:
+      crud_notification.create(
+        db,
+        NotificationCreate(
+          title="Meta por Categoria Atingida",
+          message=f"Você atingiu sua meta de {category_goal.value:.2f} para a categoria com um total de entradas de {total_category_entries_value:.2f}.",
+          user_id=entry.user_id
+        ),
+        commit=commit,
+      )
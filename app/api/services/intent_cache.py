@@ -0,0 +1,82 @@
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from app.core.config import settings
+from app.core import metrics
+from app.api.services.receipt_parser import fold
+
+# Cache das intenções do chat, por pergunta normalizada.
+#
+# A intenção de uma pergunta só depende do texto e do mês de referência ("este mês",
+# "mês passado"). A chave é a pergunta sem acentos, em minúsculas, sem pontuação e com
+# os espaços normalizados ("Resumo do mês?" e "resumo do mes" são a mesma), mais o mês
+# de referência. Cada entrada vale CHAT_INTENT_CACHE_TTL_SECONDS e nunca passa da virada
+# do mês. LRU limitada a CHAT_INTENT_CACHE_MAX_ENTRIES entradas, por processo.
+
+_NON_WORD_RE = re.compile(r"[\W_]+")
+
+def normalize(question: str) -> str:
+  return " ".join(_NON_WORD_RE.sub(" ", fold(question).casefold()).split())
+
+def _next_month(now: datetime) -> datetime:
+  first = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+  return (first + timedelta(days=32)).replace(day=1)
+
+class IntentCache:
+  def __init__(self, max_entries: int, ttl_seconds: float):
+    self.max_entries = max_entries
+    self.ttl = timedelta(seconds=ttl_seconds)
+    # chave -> (intenção, expira em)
+    self._entries: OrderedDict[tuple[str, str], tuple[dict, datetime]] = OrderedDict()
+    self._lock = threading.Lock()
+
+  @staticmethod
+  def _key(question: str, now: datetime) -> tuple[str, str]:
+    return normalize(question), f"{now.year:04d}-{now.month:02d}"
+
+  def get(self, question: str, now: datetime) -> dict | None:
+    key = self._key(question, now)
+    with self._lock:
+      cached = self._entries.get(key)
+      if cached is not None and cached[1] <= now:
+        del self._entries[key]
+        metrics.increment("chat.intent_cache.expired")
+        cached = None
+      if cached is not None:
+        self._entries.move_to_end(key)
+
+    if cached is None:
+      metrics.increment("chat.intent_cache.misses")
+      return None
+    metrics.increment("chat.intent_cache.hits")
+    return dict(cached[0])
+
+  def put(self, question: str, now: datetime, intent: dict) -> None:
+    key = self._key(question, now)
+    expires_at = min(now + self.ttl, _next_month(now))
+    with self._lock:
+      self._entries[key] = (dict(intent), expires_at)
+      self._entries.move_to_end(key)
+      while len(self._entries) > self.max_entries:
+        self._entries.popitem(last=False)
+      size = len(self._entries)
+    metrics.set_gauge("chat.intent_cache.entries", size)
+
+  def clear(self) -> None:
+    with self._lock:
+      self._entries.clear()
+
+_cache: IntentCache | None = None
+_cache_lock = threading.Lock()
+
+def get_cache() -> IntentCache | None:
+  """Cache do processo, ou None se desativado (CHAT_INTENT_CACHE_MAX_ENTRIES = 0)."""
+  global _cache
+  if settings.CHAT_INTENT_CACHE_MAX_ENTRIES <= 0:
+    return None
+  if _cache is None:
+    with _cache_lock:
+      if _cache is None:
+        _cache = IntentCache(settings.CHAT_INTENT_CACHE_MAX_ENTRIES, settings.CHAT_INTENT_CACHE_TTL_SECONDS)
+  return _cache
@@ -0,0 +1,177 @@
+import re
+from dataclasses import dataclass
+from datetime import date
+from app.api.services.receipt_parser import fold
+from app.utils.enum import IntencaoChat
+from app.utils.keyword_automaton import KeywordAutomaton
+
+# Classificador local da intenção das perguntas do chat, antes de recorrer ao Gemini.
+#
+# A maior parte das perguntas é curta e previsível ("resumo de julho", "quanto gastei
+# este mês"): frases com peso apontam a intenção (um único autômato de Aho-Corasick
+# sobre a pergunta sem acentos) e padrões compilados resolvem o mês e o ano, inclusive
+# relativos ("mês passado", "ano passado"). A confiança é a fatia da pontuação que
+# ficou com a intenção vencedora; abaixo de CHAT_INTENT_MIN_CONFIDENCE o chat_service
+# pergunta ao Gemini, como antes.
+#
+# O resultado segue a convenção do prompt do Gemini: mês sem ano informado = ano null
+# (o chat_service usa o ano atual).
+
+# Família "resumo": vira resumo_mensal ou resumo_anual conforme o período pedido
+_RESUMO = "resumo"
+
+_INTENT_PHRASES: dict[str, dict[str, int]] = {
+  _RESUMO: {
+    "resumo": 3, "resumir": 3, "balanco": 3, "fechamento": 2, "relatorio": 2, "visao geral": 2,
+    "como foi": 2, "como fechei": 2, "como estou": 2, "saldo": 2, "sobrou": 2,
+  },
+  IntencaoChat.CONSULTA_DESPESAS: {
+    "gastei": 3, "gasto": 3, "gastos": 3, "despesa": 3, "despesas": 3, "paguei": 3,
+    "gastar": 2, "custou": 2, "compras": 2, "comprei": 2, "pagamentos": 2, "saiu": 1, "saidas": 2,
+  },
+  IntencaoChat.CONSULTA_RECEITAS: {
+    "recebi": 3, "receita": 3, "receitas": 3, "ganhei": 3, "ganhos": 3,
+    "entrou": 2, "entradas": 2, "salario": 2, "renda": 2, "rendimentos": 2,
+  },
+  IntencaoChat.CONSULTA_COFRINHO: {
+    "cofrinho": 4, "cofrinhos": 4, "cofre": 3, "guardei": 2, "guardado": 2, "reserva": 2,
+  },
+  IntencaoChat.PERGUNTA_GERAL: {
+    "dica": 3, "dicas": 3, "conselho": 3, "conselhos": 3, "investir": 3, "investimento": 3,
+    "investimentos": 3, "economizar": 2, "o que e": 3, "o que sao": 3, "vale a pena": 2,
+    "me explica": 2, "explique": 2, "como funciona": 2,
+  },
+}
+
+# Categorias reconhecidas nas consultas (nomes como o Gemini devolveria)
+_CATEGORY_PHRASES: dict[str, tuple[str, ...]] = {
+  "Alimentação": ("alimentacao", "comida", "mercado", "supermercado", "restaurante", "restaurantes", "lanche", "ifood"),
+  "Transporte": ("transporte", "uber", "gasolina", "combustivel", "onibus", "estacionamento"),
+  "Entretenimento": ("lazer", "entretenimento", "cinema", "viagem", "viagens", "streaming"),
+  "Saúde": ("saude", "farmacia", "remedio", "remedios", "medico", "consulta medica"),
+  "Educação": ("educacao", "escola", "faculdade", "curso", "cursos", "livros"),
+  "Casa": ("casa", "aluguel", "moradia", "condominio", "luz", "agua", "internet"),
+  "Roupas": ("roupa", "roupas", "vestuario", "calcados"),
+}
+
+_MONTHS = {
+  "janeiro": 1, "fevereiro": 2, "marco": 3, "abril": 4, "maio": 5, "junho": 6,
+  "julho": 7, "agosto": 8, "setembro": 9, "outubro": 10, "novembro": 11, "dezembro": 12,
+}
+
+_MONTH_NAME_RE = re.compile(r"\b(" + "|".join(_MONTHS) + r")\b(?:\s+(?:de\s+)?(20\d{2}))?")
+_NUMERIC_MONTH_RE = re.compile(r"\b(0?[1-9]|1[0-2])/(20\d{2}|\d{2})\b")
+_YEAR_RE = re.compile(r"\b(20\d{2})\b")
+_THIS = r"(?:este|esse|neste|nesse|deste|desse|no|do)"
+_CURRENT_MONTH_RE = re.compile(rf"\b{_THIS}\s+mes\b(?!\s+(?:passado|anterior|de\s))|\bmes\s+atual\b")
+_PREVIOUS_MONTH_RE = re.compile(r"\bmes\s+(?:passado|anterior)\b|\bultimo\s+mes\b")
+_CURRENT_YEAR_RE = re.compile(rf"\b{_THIS}\s+ano\b(?!\s+(?:passado|anterior|de\s))|\bano\s+atual\b")
+_PREVIOUS_YEAR_RE = re.compile(r"\bano\s+(?:passado|anterior)\b|\bultimo\s+ano\b")
+_ANNUAL_RE = re.compile(r"\banual\b|\bano\b")
+
+# Pontos extras da intenção quando a pergunta traz o período que ela precisa
+_PERIOD_BONUS = 1
+
+@dataclass
+class IntentResult:
+  intencao: IntencaoChat
+  # Fatia da pontuação da intenção vencedora (0 = nenhuma frase reconhecida)
+  confidence: float
+  mes: int | None = None
+  ano: int | None = None
+  categoria: str | None = None
+  # Frases que decidiram o resultado (para log e depuração)
+  matches: tuple[str, ...] = ()
+
+  def as_dict(self) -> dict:
+    """Mesmo formato do JSON devolvido pelo Gemini."""
+    return {
+      "intencao": str(self.intencao),
+      "mes": self.mes,
+      "ano": self.ano,
+      "categoria": self.categoria,
+      "nome_cofrinho": None,
+    }
+
+def _build_automaton() -> KeywordAutomaton:
+  phrases: list[tuple[str, tuple[str, str, int]]] = []
+  for intent, weights in _INTENT_PHRASES.items():
+    phrases.extend((phrase, ("intent", intent, weight)) for phrase, weight in weights.items())
+  for category, words in _CATEGORY_PHRASES.items():
+    phrases.extend((word, ("category", category, 0)) for word in words)
+  return KeywordAutomaton(phrases)
+
+_automaton = _build_automaton()
+
+def _previous_month(today: date) -> tuple[int, int]:
+  return (12, today.year - 1) if today.month == 1 else (today.month - 1, today.year)
+
+def extract_period(folded: str, today: date) -> tuple[int | None, int | None, int]:
+  """(mês, ano, quantidade de meses distintos citados) de uma pergunta já sem acentos."""
+  months: list[tuple[int, int | None]] = []
+  for match in _MONTH_NAME_RE.finditer(folded):
+    months.append((_MONTHS[match.group(1)], int(match.group(2)) if match.group(2) else None))
+  for match in _NUMERIC_MONTH_RE.finditer(folded):
+    year = int(match.group(2))
+    months.append((int(match.group(1)), year if year >= 100 else 2000 + year))
+  if _CURRENT_MONTH_RE.search(folded):
+    months.append((today.month, None))
+  if _PREVIOUS_MONTH_RE.search(folded):
+    months.append(_previous_month(today))
+
+  year = None
+  if _PREVIOUS_YEAR_RE.search(folded):
+    year = today.year - 1
+  elif _CURRENT_YEAR_RE.search(folded):
+    year = today.year
+  else:
+    years = _YEAR_RE.findall(_NUMERIC_MONTH_RE.sub(" ", folded))
+    if years:
+      year = int(years[0])
+
+  distinct = len({month for month, _ in months})
+  if not months:
+    return None, year, 0
+  month, month_year = months[0]
+  return month, month_year or year, distinct
+
+def classify(question: str, today: date | None = None) -> IntentResult:
+  """Intenção, período e categoria da pergunta, com a confiança do classificador local."""
+  today = today or date.today()
+  folded = fold(question)
+
+  scores: dict[str, int] = {}
+  category = None
+  matches = []
+  for _, phrase, (kind, value, weight) in _automaton.finditer(folded):
+    matches.append(phrase)
+    if kind == "intent":
+      scores[value] = scores.get(value, 0) + weight
+    elif category is None:
+      category = value
+
+  month, year, distinct_months = extract_period(folded, today)
+  if not scores:
+    return IntentResult(IntencaoChat.PERGUNTA_GERAL, 0.0, month, year, category, tuple(matches))
+
+  # O período reforça as intenções que dependem dele
+  if month is not None or year is not None:
+    for intent in (_RESUMO, IntencaoChat.CONSULTA_DESPESAS, IntencaoChat.CONSULTA_RECEITAS):
+      if intent in scores:
+        scores[intent] += _PERIOD_BONUS
+
+  winner = max(scores, key=scores.get)
+  confidence = scores[winner] / (sum(scores.values()) + 1)
+  # Comparações entre meses ("julho ou agosto?") ficam para o Gemini
+  if distinct_months > 1:
+    confidence /= 2
+
+  if winner == _RESUMO:
+    annual = month is None and (year is not None or _ANNUAL_RE.search(folded) is not None)
+    intent = IntencaoChat.RESUMO_ANUAL if annual else IntencaoChat.RESUMO_MENSAL
+  else:
+    intent = IntencaoChat(winner)
+
+  if intent not in (IntencaoChat.CONSULTA_DESPESAS, IntencaoChat.CONSULTA_RECEITAS):
+    category = None
+  return IntentResult(intent, round(confidence, 3), month, year, category, tuple(matches))
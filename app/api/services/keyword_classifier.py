@@ -0,0 +1,143 @@
+"""
+Classificação dos lançamentos por palavras-chave: tipo (receita/despesa) e categoria.
+
+A tabela de frases fica em um JSON (RECEIPT_KEYWORDS_PATH ou app/data/receipt_keywords.json):
+- "entry_types": frases por tipo de lançamento (nomes de TipoLancamento, em minúsculas);
+- "categories": frases por categoria (nomes de Categoria, em minúsculas);
+- "merchants": regras {"pattern", "categoria"} aplicadas só ao nome do estabelecimento,
+  com peso maior que as frases soltas no texto.
+
+Todas as frases são compiladas em um autômato de Aho-Corasick, então o texto do recibo
+é percorrido uma única vez, qualquer que seja o tamanho da tabela. O arquivo é relido
+quando muda (checado no máximo a cada RECEIPT_KEYWORDS_RELOAD_SECONDS), sem reiniciar.
+"""
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from app.core.config import settings
+from app.core.logger_config import logger
+from app.api.services.receipt_parser import fold
+from app.utils.enum import Categoria, TipoLancamento
+from app.utils.keyword_automaton import KeywordAutomaton
+
+DEFAULT_PATH = Path(__file__).resolve().parents[2] / "data" / "receipt_keywords.json"
+
+# Uma regra de estabelecimento vale por várias frases soltas no texto
+_MERCHANT_WEIGHT = 3
+
+@dataclass(frozen=True)
+class Classification:
+  entry_type: TipoLancamento
+  category: Categoria
+  # Frases que decidiram o resultado (para log e depuração)
+  matches: tuple[str, ...] = ()
+
+class KeywordClassifier:
+  def __init__(self, table: dict):
+    text_phrases: list[tuple[str, TipoLancamento | Categoria]] = []
+    for name, phrases in table.get("entry_types", {}).items():
+      text_phrases.extend((fold(phrase), TipoLancamento[name.upper()]) for phrase in phrases)
+    for name, phrases in table.get("categories", {}).items():
+      text_phrases.extend((fold(phrase), Categoria[name.upper()]) for phrase in phrases)
+    merchant_rules = [
+      (fold(rule["pattern"]), Categoria[rule["categoria"].upper()])
+      for rule in table.get("merchants", [])
+    ]
+
+    self.text = KeywordAutomaton(text_phrases)
+    self.merchants = KeywordAutomaton(merchant_rules)
+
+  def classify(self, text: str, merchant: str | None = None) -> Classification:
+    """
+    Tipo: receita só quando as frases de receita superam as de despesa (o padrão é despesa).
+    Categoria: a de maior pontuação entre texto e estabelecimento (padrão: OUTROS).
+    """
+    entry_votes = {TipoLancamento.RECEITA: 0, TipoLancamento.DESPESA: 0}
+    category_votes: dict[Categoria, int] = {}
+    matches = []
+
+    for _, phrase, value in self.text.finditer(fold(text)):
+      matches.append(phrase)
+      if isinstance(value, TipoLancamento):
+        entry_votes[value] += 1
+      else:
+        category_votes[value] = category_votes.get(value, 0) + 1
+
+    if merchant:
+      for _, phrase, category in self.merchants.finditer(fold(merchant)):
+        matches.append(phrase)
+        category_votes[category] = category_votes.get(category, 0) + _MERCHANT_WEIGHT
+
+    entry_type = (
+      TipoLancamento.RECEITA
+      if entry_votes[TipoLancamento.RECEITA] > entry_votes[TipoLancamento.DESPESA]
+      else TipoLancamento.DESPESA
+    )
+    # Empate: vence a categoria encontrada primeiro (ordem de inserção do dicionário)
+    category = max(category_votes, key=category_votes.get, default=Categoria.OUTROS)
+    return Classification(entry_type, category, tuple(matches))
+
+def load(path: Path) -> KeywordClassifier:
+  """Lê e compila a tabela; levanta exceção se o arquivo ou algum nome de enum for inválido."""
+  table = json.loads(path.read_text(encoding="utf-8"))
+  return KeywordClassifier(table)
+
+def _keywords_path() -> Path:
+  return Path(settings.RECEIPT_KEYWORDS_PATH) if settings.RECEIPT_KEYWORDS_PATH else DEFAULT_PATH
+
+_classifier: KeywordClassifier | None = None
+_loaded_mtime: float | None = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+def get_classifier() -> KeywordClassifier:
+  """
+  Devolve o classificador compilado, recompilando se o arquivo mudou.
+  Uma tabela inválida é ignorada (com log) e a anterior continua valendo.
+  """
+  global _classifier, _loaded_mtime, _checked_at
+
+  now = time.monotonic()
+  if _classifier is not None and now - _checked_at < settings.RECEIPT_KEYWORDS_RELOAD_SECONDS:
+    return _classifier
+
+  with _lock:
+    if _classifier is not None and now - _checked_at < settings.RECEIPT_KEYWORDS_RELOAD_SECONDS:
+      return _classifier
+    _checked_at = now
+
+    path = _keywords_path()
+    try:
+      mtime = os.stat(path).st_mtime
+    except OSError as error:
+      if _classifier is None:
+        raise
+      logger.error(f"Tabela de palavras-chave inacessível ({path}): {error}. Mantendo a versão carregada.")
+      return _classifier
+
+    if _classifier is not None and mtime == _loaded_mtime:
+      return _classifier
+
+    started = time.perf_counter()
+    try:
+      classifier = load(path)
+    except (ValueError, KeyError, TypeError) as error:
+      if _classifier is None:
+        raise
+      logger.error(f"Tabela de palavras-chave inválida ({path}): {error!r}. Mantendo a versão carregada.")
+      _loaded_mtime = mtime
+      return _classifier
+
+    _classifier, _loaded_mtime = classifier, mtime
+    logger.info(
+      f"Tabela de palavras-chave carregada de {path}: "
+      f"{len(classifier.text)} frases, {len(classifier.merchants)} regras de estabelecimento "
+      f"({(time.perf_counter() - started) * 1000:.1f} ms)."
+    )
+    return _classifier
+
+def classify(text: str, merchant: str | None = None) -> Classification:
+  return get_classifier().classify(text, merchant)
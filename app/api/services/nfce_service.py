@@ -0,0 +1,110 @@
+from dataclasses import dataclass
+from datetime import date, datetime
+from urllib.parse import urlsplit, parse_qs
+import re
+
+# Leitura do QR Code de cupons fiscais NFC-e (modelo 65).
+#
+# O QR Code traz a URL de consulta da SEFAZ. Dela tiramos a chave de acesso
+# (44 dígitos: UF, ano/mês de emissão, CNPJ do emitente, modelo, série, número...)
+# e, quando presentes, a data de emissão e o valor total da nota:
+# - versão 1 (parâmetros chNFe, dhEmi, vNF, ...);
+# - versões 2 e 3 (parâmetro p=chave|versão|ambiente|...), em que o valor
+#   e o dia da emissão só vêm nas notas emitidas em contingência (offline).
+
+_ACCESS_KEY_RE = re.compile(r"\d{44}")
+# Modelo do documento na chave (posições 21-22): 65 é a NFC-e; 55 é a NF-e
+_NFCE_MODEL = "65"
+
+@dataclass
+class NFCeData:
+  access_key: str
+  cnpj: str
+  uf: str
+  model: str
+  issue_date: date | None = None
+  total: float | None = None
+  # Conteúdo lido do QR Code (guardado no artefato do OCR para o reparse)
+  payload: str | None = None
+
+  @property
+  def formatted_cnpj(self) -> str:
+    c = self.cnpj
+    return f"{c[:2]}.{c[2:5]}.{c[5:8]}/{c[8:12]}-{c[12:]}"
+
+def is_valid_access_key(key: str) -> bool:
+  """Confere o dígito verificador (módulo 11) da chave de acesso."""
+  if not _ACCESS_KEY_RE.fullmatch(key):
+    return False
+  total = 0
+  weight = 2
+  for digit in reversed(key[:43]):
+    total += int(digit) * weight
+    weight = 2 if weight == 9 else weight + 1
+  remainder = total % 11
+  check_digit = 0 if remainder < 2 else 11 - remainder
+  return check_digit == int(key[43])
+
+def _is_nfce_key(key: str) -> bool:
+  return is_valid_access_key(key) and key[20:22] == _NFCE_MODEL
+
+def _parse_value(raw: str | None) -> float | None:
+  if not raw:
+    return None
+  try:
+    return float(raw.replace(",", "."))
+  except ValueError:
+    return None
+
+def _date_from_key_and_day(key: str, day: str | None) -> date | None:
+  if not day or not day.isdigit():
+    return None
+  try:
+    return date(2000 + int(key[2:4]), int(key[4:6]), int(day))
+  except ValueError:
+    return None
+
+def _date_from_hex(raw: str | None) -> date | None:
+  """Na versão 1, dhEmi é a data/hora ISO codificada em hexadecimal."""
+  if not raw:
+    return None
+  try:
+    text = bytes.fromhex(raw).decode("ascii")
+    return datetime.fromisoformat(text[:19]).date()
+  except ValueError:
+    return None
+
+def parse_nfce_payload(payload: str) -> NFCeData | None:
+  """Interpreta o conteúdo de um QR Code de NFC-e. Retorna None se não for um."""
+  payload = payload.strip()
+  query = parse_qs(urlsplit(payload).query)
+
+  if "p" in query:
+    parts = query["p"][0].split("|")
+    key = parts[0]
+    if not _is_nfce_key(key):
+      return None
+    issue_date, total = None, None
+    # Contingência (offline): chave|versão|ambiente|dia|valor|... (8 campos);
+    # a consulta online (chave|versão|ambiente[|token|hash]) não traz dia nem valor
+    if len(parts) >= 8 and parts[1] in ("2", "3"):
+      issue_date = _date_from_key_and_day(key, parts[3])
+      total = _parse_value(parts[4])
+  elif "chNFe" in query:
+    key = query["chNFe"][0]
+    if not _is_nfce_key(key):
+      return None
+    issue_date = _date_from_hex(query.get("dhEmi", [None])[0])
+    total = _parse_value(query.get("vNF", [None])[0])
+  else:
+    return None
+
+  return NFCeData(
+    access_key=key,
+    cnpj=key[6:20],
+    uf=key[0:2],
+    model=key[20:22],
+    issue_date=issue_date,
+    total=total,
+    payload=payload,
+  )
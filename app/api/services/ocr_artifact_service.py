@@ -0,0 +1,59 @@
+import zlib
+from decimal import Decimal
+from sqlalchemy.orm import Session
+from app.api.services import ocr_protocol, receipt_parser
+from app.crud.ocr_artifact import ocr_artifact as ocr_artifact_crud
+from app.models.entry import Entry
+from app.models.ocr_artifact import OCRArtifact
+
+# Artefatos do OCR: a saída completa do OCR de cada recibo que virou lançamento.
+#
+# Guardada em formato binário (ocr_protocol.encode_results, o mesmo do servidor
+# de OCR e do cache) comprimido com zlib: algumas centenas de bytes por recibo.
+# Com ela, uma nova versão do parser reprocessa o histórico (ocr_reparse) sem as
+# imagens originais e sem rodar o OCR de novo.
+#
+# "parsed" guarda os campos que a análise preencheu no lançamento; o reparse só
+# atualiza um campo se o lançamento ainda tiver esse valor (não desfaz edições do usuário).
+# Quando um QR Code sem valor completou a análise (tipo, data e descrição da NFC-e ou
+# do PIX), o conteúdo dele fica em "qr_payload": o reparse o aplica de novo, senão a
+# análise só do OCR desfaria esses campos.
+
+PARSED_FIELDS = ("value", "entry_date", "entry_type_id", "category_id")
+
+def pack(results: list[dict]) -> bytes:
+  return zlib.compress(ocr_protocol.encode_results(results), 6)
+
+def unpack(payload: bytes) -> list[dict]:
+  return ocr_protocol.decode_results(zlib.decompress(payload))
+
+def snapshot(entry) -> dict:
+  """Campos preenchidos pela análise, em forma comparável (de um Entry ou de um EntryCreate)."""
+  return {
+    "value": f"{Decimal(str(entry.value)):.2f}",
+    "entry_date": entry.entry_date.isoformat(),
+    "entry_type_id": int(entry.entry_type_id),
+    "category_id": int(entry.category_id),
+  }
+
+def store(
+  db: Session,
+  entry: Entry,
+  ocr_results: list[dict],
+  image_sha256: str | None,
+  profile: str | None,
+  qr_payload: str | None = None,
+  commit: bool = True,
+) -> OCRArtifact:
+  return ocr_artifact_crud.create(
+    db,
+    entry_id=entry.id,
+    user_id=entry.user_id,
+    image_sha256=image_sha256,
+    profile=profile,
+    results=pack(ocr_results),
+    parser_version=receipt_parser.VERSION,
+    parsed=snapshot(entry),
+    qr_payload=qr_payload,
+    commit=commit,
+  )
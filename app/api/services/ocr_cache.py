@@ -0,0 +1,169 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from app.core.config import settings
+from app.core import metrics
+from app.api.services import ocr_protocol
+
+# Cache de resultados do OCR endereçado pelo conteúdo da imagem.
+#
+# A chave é o SHA-256 dos bytes da imagem + a impressão digital das configurações
+# do OCR (ocr_service.settings_fingerprint): a mesma imagem processada com outras
+# configurações é outra entrada. Os resultados são guardados já serializados
+# (ocr_protocol.encode_results), o que deixa o tamanho de cada entrada exato e pequeno.
+#
+# Camadas:
+# - memória: LRU limitada por bytes (OCR_CACHE_MAX_BYTES), por processo;
+# - disco (opcional): SQLite em OCR_CACHE_DISK_PATH, compartilhado entre processos
+#   e preservado entre reinícios. Entradas mais velhas que OCR_CACHE_DISK_MAX_AGE_SECONDS
+#   são ignoradas e apagadas; acima de OCR_CACHE_DISK_MAX_ENTRIES, as mais antigas
+#   (created_at) saem primeiro. A limpeza roda na abertura e a cada _PRUNE_EVERY gravações.
+#
+# As operações bloqueiam (hash, SQLite): o ocr_pool as chama fora do event loop.
+
+# Gravações no disco entre duas limpezas (por processo)
+_PRUNE_EVERY = 256
+
+class OCRResultCache:
+  def __init__(
+    self,
+    max_bytes: int,
+    disk_path: str | None = None,
+    disk_max_age_seconds: float = 0,
+    disk_max_entries: int = 0,
+  ):
+    self.max_bytes = max_bytes
+    self.disk_max_age_seconds = disk_max_age_seconds
+    self.disk_max_entries = disk_max_entries
+    self._entries: OrderedDict[str, bytes] = OrderedDict()
+    self._size = 0
+    self._lock = threading.Lock()
+    self._disk: sqlite3.Connection | None = None
+    self._disk_writes = 0
+
+    if disk_path:
+      self._disk = sqlite3.connect(disk_path, check_same_thread=False, isolation_level=None)
+      self._disk.execute("PRAGMA journal_mode=WAL")
+      self._disk.execute("PRAGMA synchronous=NORMAL")
+      self._disk.execute(
+        "CREATE TABLE IF NOT EXISTS ocr_cache ("
+        "key TEXT PRIMARY KEY, value BLOB NOT NULL, created_at REAL NOT NULL)"
+      )
+      self._disk.execute("CREATE INDEX IF NOT EXISTS ix_ocr_cache_created_at ON ocr_cache (created_at)")
+      self.prune()
+
+  def _min_created_at(self) -> float:
+    """Entradas gravadas antes disso já expiraram (0 = sem limite de idade)."""
+    return time.time() - self.disk_max_age_seconds if self.disk_max_age_seconds > 0 else 0
+
+  def prune(self) -> None:
+    """Apaga da camada em disco as entradas expiradas e as mais antigas acima do limite."""
+    if self._disk is None:
+      return
+    with self._lock:
+      removed = 0
+      if self.disk_max_age_seconds > 0:
+        removed += self._disk.execute("DELETE FROM ocr_cache WHERE created_at < ?", (self._min_created_at(),)).rowcount
+      if self.disk_max_entries > 0:
+        (count,) = self._disk.execute("SELECT COUNT(*) FROM ocr_cache").fetchone()
+        if count > self.disk_max_entries:
+          removed += self._disk.execute(
+            "DELETE FROM ocr_cache WHERE key IN (SELECT key FROM ocr_cache ORDER BY created_at LIMIT ?)",
+            (count - self.disk_max_entries,),
+          ).rowcount
+    if removed:
+      metrics.increment("ocr_cache.disk_evictions", removed)
+
+  def get(self, key: str) -> list[dict] | None:
+    with self._lock:
+      value = self._entries.get(key)
+      if value is not None:
+        self._entries.move_to_end(key)
+
+    if value is not None:
+      metrics.increment("ocr_cache.memory_hits")
+      return ocr_protocol.decode_results(value)
+
+    if self._disk is not None:
+      with self._lock:
+        row = self._disk.execute(
+          "SELECT value FROM ocr_cache WHERE key = ? AND created_at >= ?", (key, self._min_created_at())
+        ).fetchone()
+      if row is not None:
+        metrics.increment("ocr_cache.disk_hits")
+        self._put_memory(key, row[0])
+        return ocr_protocol.decode_results(row[0])
+
+    metrics.increment("ocr_cache.misses")
+    return None
+
+  def put(self, key: str, results: list[dict]) -> None:
+    value = ocr_protocol.encode_results(results)
+    self._put_memory(key, value)
+
+    if self._disk is not None:
+      with self._lock:
+        self._disk.execute(
+          "INSERT OR REPLACE INTO ocr_cache (key, value, created_at) VALUES (?, ?, ?)",
+          (key, value, time.time()),
+        )
+        self._disk_writes += 1
+        prune = self._disk_writes % _PRUNE_EVERY == 0
+      if prune:
+        self.prune()
+
+  def _put_memory(self, key: str, value: bytes) -> None:
+    # Entradas maiores que o orçamento inteiro não são guardadas em memória
+    if len(value) > self.max_bytes:
+      return
+
+    with self._lock:
+      previous = self._entries.pop(key, None)
+      if previous is not None:
+        self._size -= len(previous)
+
+      self._entries[key] = value
+      self._size += len(value)
+
+      while self._size > self.max_bytes:
+        _, evicted = self._entries.popitem(last=False)
+        self._size -= len(evicted)
+        metrics.increment("ocr_cache.evictions")
+
+      metrics.set_gauge("ocr_cache.memory_bytes", self._size)
+      metrics.set_gauge("ocr_cache.memory_entries", len(self._entries))
+
+  def clear(self) -> None:
+    with self._lock:
+      self._entries.clear()
+      self._size = 0
+      if self._disk is not None:
+        self._disk.execute("DELETE FROM ocr_cache")
+
+def image_hash(contents: bytes | memoryview) -> str:
+  """SHA-256 (hex) dos bytes da imagem."""
+  return hashlib.sha256(contents).hexdigest()
+
+def make_key(contents_hash: str, fingerprint: str) -> str:
+  return f"{contents_hash}:{fingerprint}"
+
+_cache: OCRResultCache | None = None
+_cache_lock = threading.Lock()
+
+def get_cache() -> OCRResultCache | None:
+  """Cache do processo, ou None se OCR_CACHE_ENABLED=false."""
+  global _cache
+  if not settings.OCR_CACHE_ENABLED:
+    return None
+  if _cache is None:
+    with _cache_lock:
+      if _cache is None:
+        _cache = OCRResultCache(
+          settings.OCR_CACHE_MAX_BYTES,
+          settings.OCR_CACHE_DISK_PATH,
+          settings.OCR_CACHE_DISK_MAX_AGE_SECONDS,
+          settings.OCR_CACHE_DISK_MAX_ENTRIES,
+        )
+  return _cache
@@ -0,0 +1,90 @@
+import socket
+import threading
+from app.core.config import settings
+from app.api.services import ocr_protocol
+
+# Cliente do servidor de OCR compartilhado (ocr_server), usado quando OCR_MODE=remote.
+# Mantém uma conexão por thread para não pagar o connect a cada imagem.
+
+_local = threading.local()
+
+def _connect() -> socket.socket:
+  sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+  sock.settimeout(settings.OCR_TIMEOUT_SECONDS)
+  try:
+    sock.connect(settings.OCR_SOCKET_PATH)
+  except OSError as e:
+    sock.close()
+    raise RuntimeError(f"Servidor de OCR indisponível em {settings.OCR_SOCKET_PATH}: {e}") from e
+  return sock
+
+def _close() -> None:
+  sock = getattr(_local, "sock", None)
+  if sock is not None:
+    sock.close()
+    _local.sock = None
+
+# Falhas de uma conexão reaproveitada que o servidor já fechou (ociosa ou reiniciado)
+_STALE_ERRORS = (ConnectionResetError, BrokenPipeError)
+
+class _StaleConnection(Exception):
+  """A conexão reaproveitada caiu antes de qualquer byte da resposta: o pedido pode ser repetido."""
+
+def _exchange(sock: socket.socket, frame_type: int, payload: bytes | memoryview, prefix: bytes) -> tuple[int, bytearray]:
+  try:
+    ocr_protocol.send_frame(sock, frame_type, payload, prefix)
+    # Espia o primeiro byte: até aqui nenhum byte da resposta foi consumido
+    if not sock.recv(1, socket.MSG_PEEK):
+      raise _StaleConnection()
+  except _STALE_ERRORS as e:
+    raise _StaleConnection() from e
+
+  frame = ocr_protocol.recv_frame(sock)
+  if frame is None:
+    raise ocr_protocol.ProtocolError("Servidor de OCR encerrou a conexão.")
+  return frame
+
+def _request(frame_type: int, payload: bytes | memoryview = b"", prefix: bytes = b"") -> tuple[int, bytearray]:
+  """
+  Envia um pedido e lê a resposta. Só repete (uma vez, em conexão nova) quando a
+  conexão reaproveitada foi fechada pelo servidor antes de qualquer byte da resposta
+  (reset, broken pipe ou EOF). Timeout e demais falhas sobem direto: o OCR pode já
+  estar rodando no servidor, e repetir dobraria o tempo de espera.
+  """
+  for _ in range(2):
+    sock = getattr(_local, "sock", None)
+    reused = sock is not None
+    if sock is None:
+      sock = _local.sock = _connect()
+    try:
+      return _exchange(sock, frame_type, payload, prefix)
+    except _StaleConnection as e:
+      _close()
+      # Conexão nova (inclusive a da segunda tentativa): não há o que repetir
+      if not reused:
+        raise ocr_protocol.ProtocolError("Servidor de OCR encerrou a conexão.") from e.__cause__
+    except BaseException:
+      # Timeout ou resposta pela metade: a conexão fica fora de sincronia
+      _close()
+      raise
+  raise AssertionError("inalcançável")
+
+def extract_text(contents: bytes | memoryview, profile: str | None = None) -> list[dict]:
+  """Envia a imagem ao servidor de OCR e devolve o resultado no formato de ocr_service."""
+  if profile:
+    frame_type, payload = _request(ocr_protocol.REQUEST_OCR_PROFILE, contents, ocr_protocol.encode_profile(profile))
+  else:
+    frame_type, payload = _request(ocr_protocol.REQUEST_OCR, contents)
+  if frame_type == ocr_protocol.RESPONSE_ERROR:
+    raise RuntimeError(payload.decode("utf-8", errors="replace"))
+  if frame_type != ocr_protocol.RESPONSE_OK:
+    raise ocr_protocol.ProtocolError(f"Resposta inesperada do servidor de OCR: {frame_type}")
+  return ocr_protocol.decode_results(payload)
+
+def ping() -> bool:
+  """Retorna True se o servidor de OCR está respondendo."""
+  try:
+    frame_type, _ = _request(ocr_protocol.PING)
+    return frame_type == ocr_protocol.PONG
+  except (OSError, RuntimeError):
+    return False
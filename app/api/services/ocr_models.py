@@ -0,0 +1,114 @@
+import argparse
+import hashlib
+import json
+import sys
+from importlib import metadata
+from pathlib import Path
+from app.core.config import settings
+
+# Pacote de modelos do EasyOCR (detector + reconhecedor) versionado por checksums.
+#
+# Sem OCR_MODEL_DIR o EasyOCR baixa os pesos na primeira carga, o que deixa o
+# primeiro startup lento e imprevisível e falha em máquinas sem acesso à internet.
+# Com OCR_MODEL_DIR o modelo é carregado apenas desse diretório (download_enabled=False),
+# que precisa ter sido preparado antes (no build da imagem, por exemplo):
+#
+#   python -m app.api.services.ocr_models vendor   (baixa e grava o manifest.json)
+#   python -m app.api.services.ocr_models verify   (confere os checksums)
+
+MANIFEST_NAME = "manifest.json"
+_HASH_CHUNK = 1024 * 1024
+
+class ModelBundleError(RuntimeError):
+  """O pacote de modelos do OCR está ausente, incompleto ou corrompido."""
+
+def _sha256(path: Path) -> str:
+  digest = hashlib.sha256()
+  with path.open("rb") as f:
+    while chunk := f.read(_HASH_CHUNK):
+      digest.update(chunk)
+  return digest.hexdigest()
+
+def _easyocr_version() -> str | None:
+  try:
+    return metadata.version("easyocr")
+  except metadata.PackageNotFoundError:
+    return None
+
+def vendor(directory: str | Path, languages: list[str]) -> dict:
+  """Baixa os pesos para directory e grava o manifest com tamanho e SHA-256 de cada arquivo."""
+  import easyocr
+
+  directory = Path(directory)
+  directory.mkdir(parents=True, exist_ok=True)
+  easyocr.Reader(languages, gpu=False, model_storage_directory=str(directory), download_enabled=True, verbose=False)
+
+  files = {
+    path.name: {"size": path.stat().st_size, "sha256": _sha256(path)}
+    for path in sorted(directory.glob("*.pth"))
+  }
+  if not files:
+    raise ModelBundleError(f"Nenhum arquivo de modelo foi baixado em {directory}.")
+
+  manifest = {"languages": languages, "easyocr": _easyocr_version(), "files": files}
+  (directory / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+  return manifest
+
+def verify(directory: str | Path, languages: list[str], checksums: bool = True) -> None:
+  """
+  Confere o pacote de modelos contra o manifest. Lança ModelBundleError com o motivo.
+  checksums=False confere só presença e tamanho (rápido, para cada processo que carrega o modelo).
+  """
+  directory = Path(directory)
+  manifest_path = directory / MANIFEST_NAME
+  if not manifest_path.is_file():
+    raise ModelBundleError(
+      f"Pacote de modelos do OCR não encontrado em {directory}. "
+      f"Gere com: python -m app.api.services.ocr_models vendor --dir {directory}"
+    )
+
+  try:
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    files = manifest["files"]
+  except (ValueError, KeyError) as e:
+    raise ModelBundleError(f"Manifest do pacote de modelos inválido ({manifest_path}): {e}") from e
+
+  missing_languages = set(languages) - set(manifest.get("languages", []))
+  if missing_languages:
+    raise ModelBundleError(
+      f"O pacote de modelos em {directory} não inclui os idiomas: {', '.join(sorted(missing_languages))}."
+    )
+
+  for name, expected in files.items():
+    path = directory / name
+    if not path.is_file():
+      raise ModelBundleError(f"Arquivo de modelo ausente: {path}.")
+    if path.stat().st_size != expected["size"]:
+      raise ModelBundleError(f"Arquivo de modelo com tamanho inesperado (corrompido?): {path}.")
+    if checksums and _sha256(path) != expected["sha256"]:
+      raise ModelBundleError(f"Checksum do arquivo de modelo não confere (corrompido?): {path}.")
+
+def main() -> None:
+  from app.api.services.ocr_service import LANGUAGES
+
+  parser = argparse.ArgumentParser(description="Gerencia o pacote de modelos do EasyOCR.")
+  parser.add_argument("command", choices=["vendor", "verify"])
+  parser.add_argument("--dir", default=settings.OCR_MODEL_DIR, help="Diretório do pacote (padrão: OCR_MODEL_DIR)")
+  args = parser.parse_args()
+
+  if not args.dir:
+    parser.error("Informe --dir ou defina OCR_MODEL_DIR.")
+
+  try:
+    if args.command == "vendor":
+      manifest = vendor(args.dir, LANGUAGES)
+      print(f"{len(manifest['files'])} arquivo(s) de modelo gravados em {args.dir}")
+    else:
+      verify(args.dir, LANGUAGES)
+      print(f"Pacote de modelos em {args.dir} íntegro.")
+  except ModelBundleError as e:
+    print(str(e), file=sys.stderr)
+    sys.exit(1)
+
+if __name__ == "__main__":
+  main()
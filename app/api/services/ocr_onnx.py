@@ -0,0 +1,160 @@
+import argparse
+from pathlib import Path
+from app.core.config import settings
+from app.core.logger_config import logger
+
+# Backend ONNX Runtime (CPU) para o detector (CRAFT) e o reconhecedor do EasyOCR.
+#
+# Os dois modelos são exportados do torch para ONNX uma vez (opcionalmente
+# quantizados para INT8) e, com OCR_BACKEND=onnx, o reader do EasyOCR passa a
+# chamar sessões do ONNX Runtime no lugar dos módulos do torch. Todo o resto do
+# EasyOCR (redimensionamento, pós-processamento das caixas, decodificação CTC)
+# continua igual, então a saída tem o mesmo formato do backend torch.
+#
+# Precisão: no CPU, o EasyOCR quantiza os módulos do torch em INT8 (quantize=True, o
+# padrão do backend torch), mas a exportação parte dos módulos FP32 (quantize=False).
+# A saída é a mesma entre pares de mesma precisão: torch FP32 x ONNX FP32, conferido
+# em tests/test_ocr_backends.py. O INT8 do ONNX Runtime (quantize_dynamic) não é o
+# mesmo do torch: benchmarks/ocr_backends.py compara cada um com a sua referência.
+#
+# Dependências opcionais: poetry install --with onnx
+#
+# Uso:
+#   python -m app.api.services.ocr_onnx export [--quantize]
+
+DETECTOR_FILE = "detector.onnx"
+RECOGNIZER_FILE = "recognizer.onnx"
+OPSET = 17
+
+def model_path(directory: str | Path, name: str, quantized: bool) -> Path:
+  path = Path(directory) / name
+  return path.with_suffix(".int8.onnx") if quantized else path
+
+def _onnxruntime():
+  try:
+    import onnxruntime
+  except ImportError as e:
+    raise RuntimeError(
+      "OCR_BACKEND=onnx requer o onnxruntime. Instale com: poetry install --with onnx"
+    ) from e
+  return onnxruntime
+
+def _recognizer_for_export(model):
+  """O forward do reconhecedor recebe um segundo argumento (texto) que não usa; o ONNX exporta só a imagem."""
+  import torch
+
+  class RecognizerImageOnly(torch.nn.Module):
+    def __init__(self, inner):
+      super().__init__()
+      self.inner = inner
+
+    def forward(self, image):
+      return self.inner(image, None)
+
+  return RecognizerImageOnly(model).eval()
+
+def export(directory: str | Path, languages: list[str], quantize: bool = False) -> list[Path]:
+  """Exporta detector e reconhecedor para ONNX em directory (e as versões INT8 se quantize)."""
+  import torch
+  import easyocr
+
+  directory = Path(directory)
+  directory.mkdir(parents=True, exist_ok=True)
+
+  # quantize=False: os módulos quantizados pelo torch não são exportáveis para ONNX
+  model_kwargs = {"model_storage_directory": settings.OCR_MODEL_DIR, "download_enabled": False} if settings.OCR_MODEL_DIR else {}
+  reader = easyocr.Reader(languages, gpu=False, quantize=False, verbose=False, **model_kwargs)
+
+  detector_path = model_path(directory, DETECTOR_FILE, False)
+  torch.onnx.export(
+    reader.detector.eval(),
+    torch.randn(1, 3, 640, 480),
+    str(detector_path),
+    input_names=["image"],
+    output_names=["y", "feature"],
+    dynamic_axes={"image": {0: "batch", 2: "height", 3: "width"}, "y": {0: "batch", 1: "h", 2: "w"}, "feature": {0: "batch", 2: "h", 3: "w"}},
+    opset_version=OPSET,
+  )
+
+  # O reconhecedor recebe trechos em tons de cinza com 64 px de altura e largura variável
+  recognizer_path = model_path(directory, RECOGNIZER_FILE, False)
+  torch.onnx.export(
+    _recognizer_for_export(reader.recognizer),
+    torch.randn(1, 1, 64, 256),
+    str(recognizer_path),
+    input_names=["image"],
+    output_names=["preds"],
+    dynamic_axes={"image": {0: "batch", 3: "width"}, "preds": {0: "batch", 1: "steps"}},
+    opset_version=OPSET,
+  )
+
+  written = [detector_path, recognizer_path]
+  if quantize:
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    for name, path in ((DETECTOR_FILE, detector_path), (RECOGNIZER_FILE, recognizer_path)):
+      quantized_path = model_path(directory, name, True)
+      quantize_dynamic(str(path), str(quantized_path), weight_type=QuantType.QInt8)
+      written.append(quantized_path)
+  return written
+
+def _session(path: Path, threads: int | None):
+  ort = _onnxruntime()
+  if not path.is_file():
+    raise RuntimeError(
+      f"Modelo ONNX não encontrado: {path}. Gere com: python -m app.api.services.ocr_onnx export"
+    )
+  options = ort.SessionOptions()
+  options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+  if threads:
+    options.intra_op_num_threads = threads
+  options.inter_op_num_threads = 1
+  return ort.InferenceSession(str(path), sess_options=options, providers=["CPUExecutionProvider"])
+
+class DetectorSession:
+  """Substitui reader.detector: mesma chamada net(x) -> (y, feature) usada pelo EasyOCR."""
+
+  def __init__(self, path: Path, threads: int | None):
+    self.session = _session(path, threads)
+
+  def eval(self):
+    return self
+
+  def __call__(self, x):
+    import torch
+    y, feature = self.session.run(None, {"image": x.cpu().numpy()})
+    return torch.from_numpy(y), torch.from_numpy(feature)
+
+class RecognizerSession:
+  """Substitui reader.recognizer: mesma chamada model(image, text) -> preds usada pelo EasyOCR."""
+
+  def __init__(self, path: Path, threads: int | None):
+    self.session = _session(path, threads)
+
+  def eval(self):
+    return self
+
+  def __call__(self, image, text=None):
+    import torch
+    (preds,) = self.session.run(None, {"image": image.cpu().numpy()})
+    return torch.from_numpy(preds)
+
+def install(reader, directory: str | Path, quantized: bool, threads: int | None) -> None:
+  """Troca o detector e o reconhecedor do reader pelas sessões do ONNX Runtime."""
+  reader.detector = DetectorSession(model_path(directory, DETECTOR_FILE, quantized), threads)
+  reader.recognizer = RecognizerSession(model_path(directory, RECOGNIZER_FILE, quantized), threads)
+  logger.info(f"OCR usando ONNX Runtime ({'INT8' if quantized else 'FP32'}) a partir de {directory}.")
+
+def main() -> None:
+  from app.api.services.ocr_service import LANGUAGES
+
+  parser = argparse.ArgumentParser(description="Exporta os modelos do EasyOCR para ONNX.")
+  parser.add_argument("command", choices=["export"])
+  parser.add_argument("--dir", default=settings.OCR_ONNX_DIR, help="Diretório de saída (padrão: OCR_ONNX_DIR)")
+  parser.add_argument("--quantize", action="store_true", help="Gera também as versões INT8")
+  args = parser.parse_args()
+
+  for path in export(args.dir, LANGUAGES, quantize=args.quantize):
+    print(f"Gravado: {path}")
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,294 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from app.core.config import settings
+from app.core.logger_config import logger
+from app.core import metrics
+from app.api.services import ocr_service, ocr_client, ocr_cache, ocr_profiles
+
+# Pool de processos dedicado ao OCR.
+# O EasyOCR é pesado em CPU (segundos por imagem); executá-lo direto nos handlers
+# async travaria o event loop do uvicorn. Cada processo do pool carrega o seu
+# próprio easyocr.Reader e o processo da API apenas aguarda o resultado.
+#
+# As métricas ficam em memória por processo: o que os processos do pool registram
+# (tempos de cada etapa, espera por vaga de inferência) volta junto com o resultado
+# de cada job e é somado às métricas do processo da API, que é o que o /metrics mostra.
+
+class OCRQueueFullError(RuntimeError):
+  """A fila do OCR atingiu o limite configurado (OCR_MAX_QUEUE)."""
+
+class OCRTimeoutError(RuntimeError):
+  """O OCR não terminou dentro de OCR_TIMEOUT_SECONDS."""
+
+_executor: ProcessPoolExecutor | None = None
+# Threads dos jobs sem pool de processos (modo remote ou OCR_WORKERS=0): uma por vaga da fila
+_threads: ThreadPoolExecutor | None = None
+_slots: asyncio.Semaphore | None = None
+_workers_ready = False
+# True dentro dos processos do pool (definido no initializer)
+_pool_worker = False
+
+def _init_worker(counter, workers: int) -> None:
+  """
+  Executado uma vez em cada processo do pool: divide os núcleos entre os processos,
+  ajusta as threads do torch e carrega o modelo antes do primeiro job.
+
+  Sem isso cada processo usa todos os núcleos em cada inferência e N processos
+  fazendo OCR ao mesmo tempo disputam a CPU (muito mais threads que núcleos).
+  """
+  global _pool_worker
+  _pool_worker = True
+  with counter.get_lock():
+    index = counter.value
+    counter.value += 1
+
+  cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count() or 1))
+  per_worker = max(1, len(cpus) // workers)
+
+  if settings.OCR_CPU_AFFINITY and hasattr(os, "sched_setaffinity"):
+    first = (index * per_worker) % len(cpus)
+    os.sched_setaffinity(0, cpus[first:first + per_worker])
+
+  ocr_service.configure_runtime(per_worker)
+  ocr_service.warmup()
+
+def _with_metrics(results):
+  """Resultado do job e, nos processos do pool, as métricas registradas desde o último job."""
+  return results, metrics.drain() if _pool_worker else None
+
+def _run_job(contents: bytes, profile: str) -> tuple[list[dict], dict | None]:
+  """Função executada dentro do processo do pool."""
+  return _with_metrics(ocr_service.extract_text_from_image_content(contents, profile))
+
+def _run_batch_job(contents_list: list[bytes], profile: str) -> tuple[list[list[dict] | Exception], dict | None]:
+  """Função executada dentro do processo do pool para um lote de imagens."""
+  return _with_metrics(ocr_service.extract_text_batch(contents_list, profile))
+
+def _capacity() -> int:
+  return max(settings.OCR_WORKERS, 1) + max(settings.OCR_MAX_QUEUE, 0)
+
+def start() -> None:
+  """Cria o pool de processos. Chamado no startup da aplicação (e sob demanda)."""
+  global _executor, _slots
+
+  if _slots is None:
+    _slots = asyncio.Semaphore(_capacity())
+
+  # No modo remote o trabalho pesado é do servidor de OCR; aqui só esperamos I/O (thread basta)
+  if settings.OCR_WORKERS <= 0 or settings.OCR_MODE == "remote" or _executor is not None:
+    return
+
+  # 'spawn' evita herdar o estado do processo da API (threads, conexões, torch) via fork
+  context = multiprocessing.get_context("spawn")
+  _executor = ProcessPoolExecutor(
+    max_workers=settings.OCR_WORKERS,
+    mp_context=context,
+    initializer=_init_worker,
+    # Contador compartilhado: cada processo descobre a sua posição na divisão dos núcleos
+    initargs=(context.Value("i", 0), settings.OCR_WORKERS),
+  )
+  logger.info(f"Pool de OCR iniciado com {settings.OCR_WORKERS} processo(s).")
+
+def shutdown() -> None:
+  """Encerra o pool, cancelando os jobs que ainda não começaram."""
+  global _executor, _workers_ready
+  if _executor is not None:
+    _executor.shutdown(wait=False, cancel_futures=True)
+    _executor = None
+    _workers_ready = False
+    logger.info("Pool de OCR encerrado.")
+
+async def warmup() -> None:
+  """
+  Carrega o modelo antes do primeiro pedido. Pensado para rodar em segundo plano
+  no startup: a API já atende enquanto o OCR aquece e is_ready() indica quando terminou.
+  """
+  global _workers_ready
+  start()
+  loop = asyncio.get_running_loop()
+
+  try:
+    if settings.OCR_MODE == "remote":
+      if not await loop.run_in_executor(None, ocr_client.ping):
+        logger.warning(f"Servidor de OCR ainda não responde em {settings.OCR_SOCKET_PATH}.")
+      return
+
+    if _executor is None:
+      await loop.run_in_executor(None, ocr_service.warmup)
+    else:
+      # Um job por processo: cada processo criado roda o initializer e carrega o modelo
+      executor = _executor
+      await asyncio.gather(*[
+        asyncio.wrap_future(executor.submit(ocr_service.warmup))
+        for _ in range(settings.OCR_WORKERS)
+      ])
+      if executor is _executor:
+        _workers_ready = True
+    logger.info("Modelo de OCR carregado.")
+  except Exception as e:
+    logger.error(f"Falha ao aquecer o OCR: {e}")
+
+async def is_ready() -> bool:
+  """Indica se o OCR já consegue atender sem pagar o carregamento do modelo."""
+  if settings.OCR_MODE == "remote":
+    return await asyncio.get_running_loop().run_in_executor(None, ocr_client.ping)
+  if _executor is None:
+    return ocr_service.is_ready()
+  return _workers_ready
+
+def _as_picklable(contents):
+  """memoryview não pode ser enviada a outro processo; o buffer por trás dela pode (sem cópia extra)."""
+  if isinstance(contents, list):
+    return [_as_picklable(item) for item in contents]
+  if isinstance(contents, memoryview):
+    if contents.contiguous and isinstance(contents.obj, (bytes, bytearray)) and contents.nbytes == len(contents.obj):
+      return contents.obj
+    return contents.tobytes()
+  return contents
+
+def _job_executor() -> Executor:
+  global _threads
+  if _executor is not None:
+    return _executor
+  if _threads is None:
+    _threads = ThreadPoolExecutor(max_workers=_capacity(), thread_name_prefix="ocr")
+  return _threads
+
+def _release_slot(loop: asyncio.AbstractEventLoop, slots: asyncio.Semaphore):
+  """Callback do job: devolve a vaga da fila quando o processo (ou a thread) termina de fato."""
+  def release(_future: Future) -> None:
+    try:
+      loop.call_soon_threadsafe(slots.release)
+    except RuntimeError:
+      # Event loop já encerrado (shutdown da aplicação)
+      pass
+  return release
+
+async def _submit(job, payload, timeout: float, profile: str):
+  """
+  Envia um job ao pool respeitando o limite da fila e o timeout.
+
+  Um job que já começou a rodar não é cancelado: no timeout a requisição recebe
+  OCRTimeoutError, mas a vaga da fila só volta quando o processo termina o job,
+  então OCR_MAX_QUEUE limita também o trabalho abandonado. O job que ainda não
+  começou é cancelado e devolve a vaga na hora.
+  """
+  global _workers_ready
+  start()
+
+  # Fila limitada: em vez de acumular pedidos indefinidamente, recusa de imediato
+  if _slots.locked():
+    raise OCRQueueFullError("A fila de processamento de OCR está cheia. Tente novamente em instantes.")
+
+  await _slots.acquire()
+  executor = _job_executor()
+  try:
+    submitted = executor.submit(job, _as_picklable(payload) if executor is _executor else payload, profile)
+  except BaseException:
+    _slots.release()
+    raise
+  submitted.add_done_callback(_release_slot(asyncio.get_running_loop(), _slots))
+
+  try:
+    result, recorded = await asyncio.wait_for(asyncio.wrap_future(submitted), timeout=timeout)
+    if recorded is not None:
+      metrics.merge(recorded)
+    # Sem warmup no startup, o primeiro job concluído já prova que o modelo carregou
+    _workers_ready = _executor is not None
+    return result
+  except asyncio.TimeoutError as e:
+    raise OCRTimeoutError(
+      f"O processamento de OCR excedeu o limite de {timeout:g} segundos."
+    ) from e
+  except BrokenProcessPool as e:
+    # Um processo morreu (ex.: falta de memória); recria o pool na próxima chamada
+    logger.error(f"Pool de OCR quebrado, será recriado: {e}")
+    shutdown()
+    raise RuntimeError("O processo de OCR foi encerrado inesperadamente.") from e
+
+def _cache_key(contents: bytes | memoryview, profile: str) -> str:
+  return ocr_cache.make_key(ocr_cache.image_hash(contents), ocr_service.settings_fingerprint(profile))
+
+def _cache_lookup(cache: ocr_cache.OCRResultCache, contents_list, profile: str) -> tuple[list[str], list[list[dict] | None]]:
+  """Chaves e resultados guardados de cada imagem (bloqueia: hash e SQLite, fora do event loop)."""
+  keys = [_cache_key(contents, profile) for contents in contents_list]
+  return keys, [cache.get(key) for key in keys]
+
+def _cache_store(cache: ocr_cache.OCRResultCache, items: list[tuple[str, list[dict]]]) -> None:
+  for key, results in items:
+    cache.put(key, results)
+
+async def extract_text(contents: bytes | memoryview, profile: str | None = None) -> list[dict]:
+  """
+  Versão assíncrona de ocr_service.extract_text_from_image_content.
+  O processamento roda fora do event loop; a requisição apenas aguarda.
+
+  Lança OCRQueueFullError quando a fila está cheia e OCRTimeoutError quando o
+  resultado não fica pronto a tempo. Se a requisição for cancelada (timeout ou
+  cliente desconectado) antes de um processo pegar o job, ele é descartado; o job
+  que já está rodando vai até o fim, ocupando a sua vaga da fila (ver _submit).
+  profile escolhe o perfil de OCR (fast, balanced, accurate); None = OCR_DEFAULT_PROFILE.
+  """
+  profile = ocr_profiles.get_profile(profile).name
+
+  # Imagem repetida (reenvio do app, mesmo recibo em /ocr e /receipts): um hash e uma busca
+  cache = ocr_cache.get_cache()
+  cache_key = None
+  if cache is not None:
+    (cache_key,), (cached,) = await asyncio.to_thread(_cache_lookup, cache, [contents], profile)
+    if cached is not None:
+      return cached
+
+  results = await _submit(_run_job, contents, settings.OCR_TIMEOUT_SECONDS, profile)
+  if cache is not None:
+    await asyncio.to_thread(_cache_store, cache, [(cache_key, results)])
+  return results
+
+async def extract_text_batch(contents_list: list[bytes | memoryview], profile: str | None = None) -> list[list[dict] | Exception]:
+  """
+  Versão em lote de extract_text. As imagens que não estão no cache são divididas
+  entre os processos do pool e cada processo roda a inferência em lote
+  (ocr_service.extract_text_batch).
+
+  Retorna um item por imagem, na mesma ordem: a lista de resultados ou a exceção
+  daquela imagem. Uma imagem inválida (ou um lote que estourou o tempo) não
+  derruba as demais.
+  """
+  profile = ocr_profiles.get_profile(profile).name
+  results: list[list[dict] | Exception | None] = [None] * len(contents_list)
+  cache = ocr_cache.get_cache()
+  keys: list[str | None] = [None] * len(contents_list)
+  if cache is not None:
+    keys, results = await asyncio.to_thread(_cache_lookup, cache, contents_list, profile)
+  pending = [index for index, cached in enumerate(results) if cached is None]
+
+  if pending:
+    # Um lote por processo: mantém todos os núcleos ocupados e cada lote grande o bastante para agrupar
+    chunk_count = max(1, min(settings.OCR_WORKERS, len(pending)))
+    chunk_size = -(-len(pending) // chunk_count)
+    chunks = [pending[i:i + chunk_size] for i in range(0, len(pending), chunk_size)]
+
+    outcomes = await asyncio.gather(*[
+      _submit(
+        _run_batch_job,
+        [contents_list[index] for index in chunk],
+        settings.OCR_TIMEOUT_SECONDS * len(chunk),
+        profile,
+      )
+      for chunk in chunks
+    ], return_exceptions=True)
+
+    to_store = []
+    for chunk, outcome in zip(chunks, outcomes):
+      for position, index in enumerate(chunk):
+        item = outcome if isinstance(outcome, BaseException) else outcome[position]
+        results[index] = item
+        if cache is not None and not isinstance(item, BaseException):
+          to_store.append((keys[index], item))
+    if to_store:
+      await asyncio.to_thread(_cache_store, cache, to_store)
+
+  return results
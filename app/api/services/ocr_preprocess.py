@@ -0,0 +1,244 @@
+import struct
+import time
+from dataclasses import dataclass, field
+import numpy as np
+import cv2
+from app.core.config import settings
+
+# Pré-processamento das imagens antes do EasyOCR.
+#
+# Fotos de celular chegam com 12+ megapixels e o tempo do OCR cresce mais que
+# linearmente com a quantidade de pixels. Cada etapa abaixo pode ser ligada ou
+# desligada pelas configurações (OCR_PREPROCESS_*) e tem o tempo medido.
+#
+# Todas as etapas mantêm uma matriz que leva coordenadas da imagem processada
+# para a imagem original, assim as caixas devolvidas pelo OCR continuam nas
+# coordenadas da imagem enviada pelo usuário.
+
+@dataclass(frozen=True)
+class PreprocessOptions:
+  # Decodifica JPEG já reduzido (1/2, 1/4, 1/8) quando a imagem é bem maior que max_dimension
+  reduced_decode: bool = True
+  # Maior lado da imagem entregue ao OCR (0 = sem limite)
+  max_dimension: int = 1600
+  grayscale: bool = True
+  # Equalização de contraste local (CLAHE)
+  contrast: bool = False
+  # Corrige pequenas inclinações do recibo na foto
+  deskew: bool = False
+  # Recorta o fundo ao redor do papel
+  crop: bool = False
+
+  @classmethod
+  def from_settings(cls) -> "PreprocessOptions":
+    return cls(
+      reduced_decode=settings.OCR_PREPROCESS_REDUCED_DECODE,
+      max_dimension=settings.OCR_PREPROCESS_MAX_DIMENSION,
+      grayscale=settings.OCR_PREPROCESS_GRAYSCALE,
+      contrast=settings.OCR_PREPROCESS_CONTRAST,
+      deskew=settings.OCR_PREPROCESS_DESKEW,
+      crop=settings.OCR_PREPROCESS_CROP,
+    )
+
+@dataclass
+class PreprocessedImage:
+  image: np.ndarray
+  # Matriz 3x3: coordenadas da imagem processada -> coordenadas da imagem original
+  to_original: np.ndarray = field(default_factory=lambda: np.eye(3))
+  # Tempo de cada etapa, em milissegundos
+  timings: dict[str, float] = field(default_factory=dict)
+
+  def map_box(self, points) -> tuple[int, int, int, int]:
+    """Converte os 4 cantos de uma caixa do OCR para (x_min, y_min, x_max, y_max) na imagem original."""
+    pts = np.hstack([np.asarray(points, dtype=np.float64), np.ones((len(points), 1))])
+    mapped = pts @ self.to_original.T
+    xs, ys = mapped[:, 0], mapped[:, 1]
+    return int(xs.min()), int(ys.min()), int(xs.max()), int(ys.max())
+
+def _scale_matrix(factor_x: float, factor_y: float) -> np.ndarray:
+  return np.array([[factor_x, 0, 0], [0, factor_y, 0], [0, 0, 1]], dtype=np.float64)
+
+def _translate_matrix(dx: float, dy: float) -> np.ndarray:
+  return np.array([[1, 0, dx], [0, 1, dy], [0, 0, 1]], dtype=np.float64)
+
+# Orientações EXIF que giram a imagem em 90/270 graus (largura e altura trocam de lugar)
+_EXIF_TRANSPOSED = (5, 6, 7, 8)
+
+def _exif_orientation(segment: memoryview) -> int | None:
+  """Tag Orientation (0x0112) do IFD0 de um segmento APP1 "Exif", ou None se não houver."""
+  if bytes(segment[:6]) != b"Exif\x00\x00":
+    return None
+  tiff = segment[6:]
+  order = {b"II": "<", b"MM": ">"}.get(bytes(tiff[:2]))
+  if order is None or len(tiff) < 8:
+    return None
+  (ifd,) = struct.unpack(order + "I", tiff[4:8])
+  if ifd + 2 > len(tiff):
+    return None
+  (count,) = struct.unpack(order + "H", tiff[ifd:ifd + 2])
+  for index in range(count):
+    entry = tiff[ifd + 2 + index * 12:ifd + 14 + index * 12]
+    if len(entry) < 12:
+      return None
+    (tag,) = struct.unpack(order + "H", entry[:2])
+    if tag == 0x0112:
+      return struct.unpack(order + "H", entry[8:10])[0]
+  return None
+
+def read_image_size(contents: bytes | memoryview) -> tuple[int, int] | None:
+  """
+  Lê (largura, altura) do cabeçalho de um JPEG ou PNG sem decodificar a imagem.
+  O tamanho é o da imagem como o OpenCV a entrega: já girada pela orientação EXIF
+  (5 a 8 trocam largura e altura).
+  """
+  data = memoryview(contents)
+
+  if bytes(data[:8]) == b"\x89PNG\r\n\x1a\n" and len(data) >= 24:
+    width, height = struct.unpack(">II", data[16:24])
+    return width, height
+
+  if bytes(data[:2]) == b"\xff\xd8":
+    offset = 2
+    orientation = None
+    while offset + 9 < len(data):
+      if data[offset] != 0xFF:
+        return None
+      marker = data[offset + 1]
+      (segment_length,) = struct.unpack(">H", data[offset + 2:offset + 4])
+      # SOF0..SOF15, exceto DHT (C4), JPG (C8) e DAC (CC)
+      if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+        height, width = struct.unpack(">HH", data[offset + 5:offset + 9])
+        return (height, width) if orientation in _EXIF_TRANSPOSED else (width, height)
+      # APP1: o EXIF vem antes do SOF
+      if marker == 0xE1 and orientation is None:
+        try:
+          orientation = _exif_orientation(data[offset + 4:offset + 2 + segment_length])
+        except struct.error:
+          orientation = None
+      offset += 2 + segment_length
+
+  return None
+
+_REDUCED_FLAGS = {
+  (2, False): cv2.IMREAD_REDUCED_COLOR_2,
+  (4, False): cv2.IMREAD_REDUCED_COLOR_4,
+  (8, False): cv2.IMREAD_REDUCED_COLOR_8,
+  (2, True): cv2.IMREAD_REDUCED_GRAYSCALE_2,
+  (4, True): cv2.IMREAD_REDUCED_GRAYSCALE_4,
+  (8, True): cv2.IMREAD_REDUCED_GRAYSCALE_8,
+}
+
+def _decode(contents, options: PreprocessOptions) -> tuple[np.ndarray, np.ndarray]:
+  flag = cv2.IMREAD_GRAYSCALE if options.grayscale else cv2.IMREAD_COLOR
+  original_size = None
+
+  if options.reduced_decode and options.max_dimension > 0:
+    original_size = read_image_size(contents)
+    if original_size:
+      # Maior redução que ainda deixa a imagem com pelo menos max_dimension no maior lado
+      longest = max(original_size)
+      for factor in (8, 4, 2):
+        if longest // factor >= options.max_dimension:
+          flag = _REDUCED_FLAGS[(factor, options.grayscale)]
+          break
+
+  image = cv2.imdecode(np.frombuffer(contents, np.uint8), flag)
+  if image is None:
+    raise ValueError("Não foi possível decodificar a imagem. O arquivo pode estar corrompido ou em um formato inválido.")
+
+  to_original = np.eye(3)
+  if original_size:
+    height, width = image.shape[:2]
+    to_original = _scale_matrix(original_size[0] / width, original_size[1] / height)
+  return image, to_original
+
+def _to_gray(image: np.ndarray) -> np.ndarray:
+  return image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+def _crop_document(image: np.ndarray) -> tuple[np.ndarray, tuple[int, int]]:
+  """Recorta a área do maior contorno claro (o papel do recibo), se ele ocupar boa parte da foto."""
+  gray = _to_gray(image)
+  blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+  _, mask = cv2.threshold(blurred, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+  contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+  if not contours:
+    return image, (0, 0)
+
+  x, y, w, h = cv2.boundingRect(max(contours, key=cv2.contourArea))
+  height, width = gray.shape
+  # Contorno pequeno demais (ou a própria imagem inteira): não há borda para recortar
+  if w * h < 0.2 * width * height or (w >= width - 2 and h >= height - 2):
+    return image, (0, 0)
+
+  margin = int(0.01 * max(width, height))
+  x0, y0 = max(x - margin, 0), max(y - margin, 0)
+  x1, y1 = min(x + w + margin, width), min(y + h + margin, height)
+  return image[y0:y1, x0:x1], (x0, y0)
+
+def _deskew(image: np.ndarray) -> tuple[np.ndarray, np.ndarray | None]:
+  """Estima a inclinação do texto e gira a imagem. Retorna a matriz afim usada (ou None)."""
+  gray = _to_gray(image)
+  _, mask = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+  coords = cv2.findNonZero(mask)
+  if coords is None:
+    return image, None
+
+  angle = cv2.minAreaRect(coords)[-1]
+  # minAreaRect devolve ângulos em (0, 90]; traz para (-45, 45]
+  if angle > 45:
+    angle -= 90
+  # Ignora ruído e ângulos grandes demais para serem inclinação de foto
+  if abs(angle) < 0.5 or abs(angle) > 15:
+    return image, None
+
+  height, width = gray.shape
+  matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+  rotated = cv2.warpAffine(image, matrix, (width, height), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+  return rotated, matrix
+
+def preprocess(contents: bytes | memoryview, options: PreprocessOptions | None = None) -> PreprocessedImage:
+  """Decodifica a imagem e aplica as etapas habilitadas em options."""
+  options = options or PreprocessOptions.from_settings()
+  timings: dict[str, float] = {}
+
+  started = time.perf_counter()
+  image, to_original = _decode(contents, options)
+  timings["decode"] = (time.perf_counter() - started) * 1000
+
+  if options.crop:
+    started = time.perf_counter()
+    image, (dx, dy) = _crop_document(image)
+    to_original = to_original @ _translate_matrix(dx, dy)
+    timings["crop"] = (time.perf_counter() - started) * 1000
+
+  if options.max_dimension > 0 and max(image.shape[:2]) > options.max_dimension:
+    started = time.perf_counter()
+    factor = options.max_dimension / max(image.shape[:2])
+    image = cv2.resize(image, None, fx=factor, fy=factor, interpolation=cv2.INTER_AREA)
+    to_original = to_original @ _scale_matrix(1 / factor, 1 / factor)
+    timings["downscale"] = (time.perf_counter() - started) * 1000
+
+  if options.grayscale and image.ndim == 3:
+    started = time.perf_counter()
+    image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    timings["grayscale"] = (time.perf_counter() - started) * 1000
+
+  if options.contrast:
+    started = time.perf_counter()
+    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
+    if image.ndim == 2:
+      image = clahe.apply(image)
+    else:
+      ycrcb = cv2.cvtColor(image, cv2.COLOR_BGR2YCrCb)
+      ycrcb[:, :, 0] = clahe.apply(ycrcb[:, :, 0])
+      image = cv2.cvtColor(ycrcb, cv2.COLOR_YCrCb2BGR)
+    timings["contrast"] = (time.perf_counter() - started) * 1000
+
+  if options.deskew:
+    started = time.perf_counter()
+    image, matrix = _deskew(image)
+    if matrix is not None:
+      to_original = to_original @ np.linalg.inv(np.vstack([matrix, [0, 0, 1]]))
+    timings["deskew"] = (time.perf_counter() - started) * 1000
+
+  return PreprocessedImage(image=image, to_original=to_original, timings=timings)
@@ -0,0 +1,76 @@
+from dataclasses import dataclass, field, replace, asdict
+from app.core.config import settings
+from app.api.services.ocr_preprocess import PreprocessOptions
+from app.utils.enum import PerfilOCR
+
+# Perfis de OCR: cada um combina parâmetros do readtext do EasyOCR com ajustes
+# no pré-processamento, trocando velocidade por precisão.
+#
+# - fast: imagem menor, canvas de detecção menor e decodificação gulosa.
+#   Resolve a maioria dos recibos (texto impresso, foto razoável).
+# - balanced: o comportamento padrão (parâmetros padrão do EasyOCR + OCR_PREPROCESS_*).
+# - accurate: imagem maior, contraste/inclinação corrigidos, canvas maior e
+#   beam search no reconhecedor. Várias vezes mais lento; reservado para as
+#   imagens em que os perfis mais baratos não encontram o que procuramos.
+#
+# O perfil entra na chave do cache de resultados (ocr_service.settings_fingerprint).
+
+@dataclass(frozen=True)
+class OCRProfile:
+  name: str
+  # Repassados ao reader.readtext / readtext_batched
+  readtext: dict = field(default_factory=dict)
+  # Sobrescrevem campos de PreprocessOptions.from_settings()
+  preprocess: dict = field(default_factory=dict)
+
+  def preprocess_options(self) -> PreprocessOptions:
+    return replace(PreprocessOptions.from_settings(), **self.preprocess)
+
+  def readtext_kwargs(self) -> dict:
+    return {"batch_size": settings.OCR_BATCH_SIZE, **self.readtext}
+
+  def describe(self) -> dict:
+    """Parâmetros efetivos do perfil (usados na impressão digital do cache)."""
+    return {
+      "name": self.name,
+      "readtext": self.readtext_kwargs(),
+      "preprocess": asdict(self.preprocess_options()),
+    }
+
+PROFILES: dict[str, OCRProfile] = {
+  PerfilOCR.FAST: OCRProfile(
+    name=PerfilOCR.FAST,
+    readtext={
+      "decoder": "greedy",
+      "canvas_size": 1280,
+      "mag_ratio": 1.0,
+      "min_size": 20,
+      "text_threshold": 0.7,
+      "low_text": 0.4,
+    },
+    preprocess={"max_dimension": 1280, "contrast": False, "deskew": False},
+  ),
+  PerfilOCR.BALANCED: OCRProfile(name=PerfilOCR.BALANCED),
+  PerfilOCR.ACCURATE: OCRProfile(
+    name=PerfilOCR.ACCURATE,
+    readtext={
+      "decoder": "beamsearch",
+      "beamWidth": 10,
+      "canvas_size": 3200,
+      "mag_ratio": 1.5,
+      "min_size": 10,
+      "text_threshold": 0.6,
+      "low_text": 0.3,
+      "adjust_contrast": 0.7,
+    },
+    preprocess={"max_dimension": 2400, "contrast": True, "deskew": True},
+  ),
+}
+
+def get_profile(name: str | None = None) -> OCRProfile:
+  """Retorna o perfil pelo nome (None = OCR_DEFAULT_PROFILE)."""
+  name = name or settings.OCR_DEFAULT_PROFILE
+  try:
+    return PROFILES[name]
+  except KeyError:
+    raise ValueError(f"Perfil de OCR desconhecido: {name}. Use um de: {', '.join(PROFILES)}.")
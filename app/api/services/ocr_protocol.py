@@ -0,0 +1,109 @@
+import socket
+import struct
+
+# Protocolo binário usado entre a API e o servidor de OCR compartilhado (ocr_server).
+#
+# Cada mensagem é um frame: 1 byte de tipo + 4 bytes de tamanho (big-endian) + payload.
+# - REQUEST_OCR: payload = bytes da imagem (perfil padrão)
+# - REQUEST_OCR_PROFILE: payload = 1 byte com o tamanho do nome do perfil + nome + bytes da imagem
+# - RESPONSE_OK: payload = resultados codificados por encode_results
+# - RESPONSE_ERROR: payload = mensagem de erro em UTF-8
+# - PING / PONG: payload vazio, usado para checar se o servidor está no ar
+
+REQUEST_OCR = 1
+RESPONSE_OK = 2
+RESPONSE_ERROR = 3
+PING = 4
+PONG = 5
+REQUEST_OCR_PROFILE = 6
+
+# Limite de segurança para não alocar memória com um cabeçalho corrompido
+MAX_FRAME_SIZE = 64 * 1024 * 1024
+
+_HEADER = struct.Struct(">BI")
+_COUNT = struct.Struct(">I")
+# confiança, x_min, y_min, x_max, y_max, tamanho do texto
+_ITEM = struct.Struct(">fiiiiH")
+
+class ProtocolError(RuntimeError):
+  """Frame inválido ou conexão encerrada no meio de uma mensagem."""
+
+def encode_results(results: list[dict]) -> bytes:
+  """Serializa a saída de extract_text_from_image_content em um formato binário compacto."""
+  parts = [_COUNT.pack(len(results))]
+  for item in results:
+    text = item["text"].encode("utf-8")[:0xFFFF]
+    box = item["bounding_box"]
+    parts.append(_ITEM.pack(
+      float(item["confidence"]),
+      box["x_min"], box["y_min"], box["x_max"], box["y_max"],
+      len(text),
+    ))
+    parts.append(text)
+  return b"".join(parts)
+
+def decode_results(payload: bytes | memoryview) -> list[dict]:
+  """Inverso de encode_results."""
+  view = memoryview(payload)
+  (count,) = _COUNT.unpack_from(view, 0)
+  offset = _COUNT.size
+  results = []
+  for _ in range(count):
+    confidence, x_min, y_min, x_max, y_max, text_len = _ITEM.unpack_from(view, offset)
+    offset += _ITEM.size
+    text = bytes(view[offset:offset + text_len]).decode("utf-8", errors="replace")
+    offset += text_len
+    results.append({
+      "text": text,
+      "confidence": confidence,
+      "bounding_box": {
+        "x_min": x_min,
+        "y_min": y_min,
+        "x_max": x_max,
+        "y_max": y_max
+      }
+    })
+  return results
+
+def encode_profile(profile: str) -> bytes:
+  """Prefixo do payload de REQUEST_OCR_PROFILE (enviado antes da imagem, sem concatenar)."""
+  name = profile.encode("utf-8")
+  return bytes([len(name)]) + name
+
+def split_profile(payload: bytes | bytearray) -> tuple[str, memoryview]:
+  """Inverso de encode_profile: separa o nome do perfil dos bytes da imagem."""
+  view = memoryview(payload)
+  size = view[0]
+  return bytes(view[1:1 + size]).decode("utf-8"), view[1 + size:]
+
+def send_frame(sock: socket.socket, frame_type: int, payload: bytes | memoryview = b"", prefix: bytes = b"") -> None:
+  sock.sendall(_HEADER.pack(frame_type, len(prefix) + len(payload)))
+  if prefix:
+    sock.sendall(prefix)
+  if payload:
+    sock.sendall(payload)
+
+def _recv_exact(sock: socket.socket, size: int) -> bytearray:
+  buffer = bytearray(size)
+  view = memoryview(buffer)
+  received = 0
+  while received < size:
+    n = sock.recv_into(view[received:], size - received)
+    if n == 0:
+      raise ProtocolError("Conexão encerrada antes do fim da mensagem.")
+    received += n
+  return buffer
+
+def recv_frame(sock: socket.socket) -> tuple[int, bytearray] | None:
+  """Lê um frame completo. Retorna None se a conexão foi encerrada entre mensagens."""
+  header = bytearray(_HEADER.size)
+  n = sock.recv_into(header, _HEADER.size)
+  if n == 0:
+    return None
+  if n < _HEADER.size:
+    header[n:] = _recv_exact(sock, _HEADER.size - n)
+
+  frame_type, size = _HEADER.unpack(header)
+  if size > MAX_FRAME_SIZE:
+    raise ProtocolError(f"Frame de {size} bytes excede o limite de {MAX_FRAME_SIZE} bytes.")
+  return frame_type, _recv_exact(sock, size)
@@ -0,0 +1,203 @@
+import argparse
+import json
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal
+from sqlalchemy import select, update
+from app.api.services import ocr_artifact_service, receipt_parser
+from app.api.services.ocr_artifact_service import PARSED_FIELDS
+from app.api.services.receipt_service import complement_with_qr, parse_ocr_results, parse_receipt_qr
+from app.db.session import SessionLocal
+from app.models.entry import Entry
+from app.models.ocr_artifact import OCRArtifact
+
+# Reprocessa os recibos já lançados com a versão atual do parser, a partir dos
+# artefatos do OCR (ocr_artifact_service), sem imagens e sem rodar o OCR de novo.
+#
+# - Os artefatos são lidos com cursor do lado do servidor (stream_results), em blocos
+#   de --chunk-size: a memória não cresce com o tamanho do histórico.
+# - Cada bloco é analisado em um processo do pool (--workers), com no máximo
+#   2 blocos por processo em andamento.
+# - As alterações de cada bloco são gravadas de uma vez (UPDATE em lote por chave
+#   primária), em uma sessão separada da leitura.
+# - O QR Code sem valor que completou a análise original (qr_payload) é aplicado de
+#   novo: os campos vindos dele (tipo, data) não voltam para o palpite do OCR.
+# - Um campo só é alterado se o lançamento ainda tiver o valor da análise anterior:
+#   campos editados pelo usuário não são tocados. A comparação usa os valores relidos
+#   com SELECT ... FOR UPDATE na sessão de escrita: uma edição feita enquanto o bloco
+#   era analisado é vista (e preservada), e as feitas durante a gravação esperam o commit.
+#
+#   python -m app.api.services.ocr_reparse              (artefatos de versões anteriores do parser)
+#   python -m app.api.services.ocr_reparse --all        (todos, ex.: após mudar a tabela de palavras-chave)
+#   python -m app.api.services.ocr_reparse --dry-run    (só conta o que mudaria)
+
+@dataclass
+class ReparseReport:
+  artifacts: int = 0
+  entries_updated: int = 0
+  unparsed: int = 0
+  # Quantos lançamentos tiveram cada campo alterado / mantido por edição do usuário
+  changed_fields: dict[str, int] = field(default_factory=lambda: dict.fromkeys(PARSED_FIELDS, 0))
+  kept_user_edits: dict[str, int] = field(default_factory=lambda: dict.fromkeys(PARSED_FIELDS, 0))
+
+def reparse_chunk(rows: list[tuple[int, int, bytes, str | None]]) -> list[tuple[int, dict | None]]:
+  """(id do artefato, id do usuário, resultados comprimidos, QR Code) -> (id do artefato, campos da nova análise ou None)."""
+  outcomes = []
+  for artifact_id, user_id, payload, qr_payload in rows:
+    try:
+      entry_data = parse_ocr_results(ocr_artifact_service.unpack(payload), user_id)
+      if qr_payload:
+        entry_data = complement_with_qr(entry_data, parse_receipt_qr(qr_payload))
+    except ValueError:
+      outcomes.append((artifact_id, None))
+      continue
+    outcomes.append((artifact_id, ocr_artifact_service.snapshot(entry_data)))
+  return outcomes
+
+def _merge(current: dict, previous: dict, parsed: dict, report: ReparseReport) -> tuple[dict, dict]:
+  """Valores finais do lançamento e o novo "parsed" do artefato, respeitando edições do usuário."""
+  final, new_parsed = {}, {}
+  for name in PARSED_FIELDS:
+    if current[name] != previous.get(name):
+      # Editado pelo usuário depois da análise anterior
+      final[name] = current[name]
+      new_parsed[name] = previous.get(name)
+      if parsed[name] != current[name]:
+        report.kept_user_edits[name] += 1
+    else:
+      final[name] = parsed[name]
+      new_parsed[name] = parsed[name]
+      if parsed[name] != current[name]:
+        report.changed_fields[name] += 1
+  return final, new_parsed
+
+def _lock_entries(db, entry_ids: list[int]) -> dict[int, dict]:
+  """Campos atuais dos lançamentos, travados (FOR UPDATE) até o commit do bloco."""
+  if not entry_ids:
+    return {}
+  rows = db.execute(
+    select(Entry.id, Entry.value, Entry.entry_date, Entry.entry_type_id, Entry.category_id)
+    .where(Entry.id.in_(entry_ids))
+    .with_for_update()
+  )
+  return {row.id: ocr_artifact_service.snapshot(row) for row in rows}
+
+def _apply(db, outcomes, pending: dict, report: ReparseReport, dry_run: bool) -> None:
+  entry_updates, artifact_updates = [], []
+  now = datetime.now()
+  chunk = [(artifact_id, parsed, *pending.pop(artifact_id)) for artifact_id, parsed in outcomes]
+
+  # Sem gravação (dry run), os valores lidos junto com os artefatos bastam
+  locked = None
+  if not dry_run:
+    locked = _lock_entries(db, [entry_id for _, parsed, entry_id, _, _ in chunk if parsed is not None])
+
+  for artifact_id, parsed, entry_id, current, previous in chunk:
+    if parsed is None:
+      report.unparsed += 1
+      continue
+    if locked is not None:
+      current = locked.get(entry_id)
+      if current is None:
+        # Lançamento apagado durante a análise (o artefato sai junto, por cascade)
+        continue
+
+    final, new_parsed = _merge(current, previous, parsed, report)
+    if final != current:
+      entry_updates.append({
+        "id": entry_id,
+        "value": Decimal(final["value"]),
+        "entry_date": date.fromisoformat(final["entry_date"]),
+        "entry_type_id": final["entry_type_id"],
+        "category_id": final["category_id"],
+      })
+    artifact_updates.append({
+      "id": artifact_id,
+      "parser_version": receipt_parser.VERSION,
+      "parsed": new_parsed,
+      "updated_at": now,
+    })
+
+  report.entries_updated += len(entry_updates)
+  if dry_run:
+    return
+  if entry_updates:
+    db.execute(update(Entry), entry_updates)
+  if artifact_updates:
+    db.execute(update(OCRArtifact), artifact_updates)
+  db.commit()
+
+def reparse(
+  all_versions: bool = False,
+  user_id: int | None = None,
+  workers: int | None = None,
+  chunk_size: int = 500,
+  dry_run: bool = False,
+) -> ReparseReport:
+  report = ReparseReport()
+  if workers is None:
+    workers = os.cpu_count() or 1
+
+  query = (
+    select(
+      OCRArtifact.id, OCRArtifact.entry_id, OCRArtifact.user_id, OCRArtifact.results, OCRArtifact.qr_payload,
+      OCRArtifact.parsed,
+      Entry.value, Entry.entry_date, Entry.entry_type_id, Entry.category_id,
+    )
+    .join(Entry, Entry.id == OCRArtifact.entry_id)
+    .order_by(OCRArtifact.id)
+    .execution_options(stream_results=True, yield_per=chunk_size)
+  )
+  if not all_versions:
+    query = query.where(OCRArtifact.parser_version < receipt_parser.VERSION)
+  if user_id is not None:
+    query = query.where(OCRArtifact.user_id == user_id)
+
+  # Leitura e escrita em sessões (conexões) separadas: o cursor de streaming ocupa a sua
+  with SessionLocal() as reader, SessionLocal() as writer:
+    # (id do lançamento, campos atuais, campos da análise anterior) por artefato em andamento
+    pending: dict[int, tuple[int, dict, dict]] = {}
+
+    def prepare(rows) -> list[tuple[int, int, bytes, str | None]]:
+      report.artifacts += len(rows)
+      for row in rows:
+        pending[row.id] = (row.entry_id, ocr_artifact_service.snapshot(row), row.parsed or {})
+      return [(row.id, row.user_id, row.results, row.qr_payload) for row in rows]
+
+    partitions = reader.execute(query).partitions()
+
+    if workers <= 1:
+      for rows in partitions:
+        _apply(writer, reparse_chunk(prepare(rows)), pending, report, dry_run)
+      return report
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+      in_flight = set()
+      for rows in partitions:
+        in_flight.add(executor.submit(reparse_chunk, prepare(rows)))
+        if len(in_flight) >= workers * 2:
+          done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+          for future in done:
+            _apply(writer, future.result(), pending, report, dry_run)
+      for future in wait(in_flight).done:
+        _apply(writer, future.result(), pending, report, dry_run)
+  return report
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description="Reprocessa os recibos lançados com a versão atual do parser.")
+  parser.add_argument("--all", action="store_true", help="Inclui artefatos já analisados pela versão atual")
+  parser.add_argument("--user-id", type=int, help="Só os recibos deste usuário")
+  parser.add_argument("--workers", type=int, help="Processos de análise (padrão: núcleos da máquina; 1 = sem pool)")
+  parser.add_argument("--chunk-size", type=int, default=500, help="Artefatos por bloco lido e gravado")
+  parser.add_argument("--dry-run", action="store_true", help="Não grava nada, só informa o que mudaria")
+  args = parser.parse_args()
+
+  report = reparse(args.all, args.user_id, args.workers, args.chunk_size, args.dry_run)
+  print(json.dumps({"parser_version": receipt_parser.VERSION, "dry_run": args.dry_run, **report.__dict__}, indent=2))
+
+if __name__ == "__main__":
+  main()
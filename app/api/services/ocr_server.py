@@ -0,0 +1,81 @@
+import os
+import socketserver
+from app.core.config import settings
+from app.core.logger_config import logger
+from app.api.services import ocr_protocol
+
+# Servidor de OCR compartilhado.
+# Carrega o modelo do EasyOCR uma única vez e atende todos os workers da API
+# (OCR_MODE=remote) por um socket UNIX local, usando o protocolo de ocr_protocol.
+#
+# Uso: python -m app.api.services.ocr_server  (ou make ocr-server)
+
+class OCRRequestHandler(socketserver.BaseRequestHandler):
+  """Atende uma conexão de cliente; a conexão é reaproveitada para vários pedidos."""
+
+  def handle(self):
+    from app.api.services import ocr_service
+
+    while True:
+      try:
+        frame = ocr_protocol.recv_frame(self.request)
+      except (OSError, ocr_protocol.ProtocolError) as e:
+        logger.warning(f"Conexão com o servidor de OCR descartada: {e}")
+        return
+
+      if frame is None:
+        return
+
+      frame_type, payload = frame
+
+      if frame_type == ocr_protocol.PING:
+        ocr_protocol.send_frame(self.request, ocr_protocol.PONG)
+        continue
+
+      if frame_type not in (ocr_protocol.REQUEST_OCR, ocr_protocol.REQUEST_OCR_PROFILE):
+        ocr_protocol.send_frame(self.request, ocr_protocol.RESPONSE_ERROR, f"Tipo de mensagem desconhecido: {frame_type}".encode("utf-8"))
+        continue
+
+      try:
+        profile = None
+        if frame_type == ocr_protocol.REQUEST_OCR_PROFILE:
+          profile, payload = ocr_protocol.split_profile(payload)
+        # Inferências simultâneas limitadas por OCR_MAX_CONCURRENT_PER_PROCESS (ocr_service)
+        results = ocr_service.run_local_ocr(payload, profile)
+        ocr_protocol.send_frame(self.request, ocr_protocol.RESPONSE_OK, ocr_protocol.encode_results(results))
+      except Exception as e:
+        ocr_protocol.send_frame(self.request, ocr_protocol.RESPONSE_ERROR, str(e).encode("utf-8"))
+
+class OCRServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+  daemon_threads = True
+
+def serve(socket_path: str | None = None) -> None:
+  socket_path = socket_path or settings.OCR_SOCKET_PATH
+
+  # O servidor sempre roda o modelo localmente, mesmo que o .env compartilhado diga "remote"
+  settings.OCR_MODE = "local"
+
+  # Confere o pacote de modelos e carrega o modelo antes de aceitar conexões
+  from app.api.services import ocr_service, ocr_models
+  if settings.OCR_MODEL_DIR:
+    ocr_models.verify(settings.OCR_MODEL_DIR, ocr_service.LANGUAGES)
+  ocr_service.warmup()
+
+  # Remove o socket de uma execução anterior que não foi encerrada corretamente
+  if os.path.exists(socket_path):
+    os.unlink(socket_path)
+
+  with OCRServer(socket_path, OCRRequestHandler) as server:
+    os.chmod(socket_path, 0o660)
+    logger.info(f"Servidor de OCR escutando em {socket_path}")
+    try:
+      server.serve_forever()
+    except KeyboardInterrupt:
+      pass
+    finally:
+      if os.path.exists(socket_path):
+        os.unlink(socket_path)
+      logger.info("Servidor de OCR encerrado.")
+
+if __name__ == "__main__":
+  serve()
@@ -1,45 +1,252 @@
-import easyocr
-import numpy as np
-import cv2
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from app.core.config import settings
+from app.core import metrics
+from app.api.services.ocr_preprocess import preprocess
+from app.api.services.ocr_profiles import get_profile
+from app.api.services import ocr_models
 
-# Inicializa o reader uma única vez quando o módulo é carregado.
-# Isso é mais eficiente do que inicializá-lo a cada chamada.
-reader = easyocr.Reader(['pt'])
+LANGUAGES = ['pt']
 
-def extract_text_from_image_content(contents: bytes) -> list[dict]:
+# O reader é criado sob demanda (get_reader) e reaproveitado pelas chamadas seguintes.
+# Importar este módulo não carrega torch nem o modelo: processos que nunca fazem OCR
+# (migrações, workers sem OCR, testes) não pagam esse custo.
+# No modo "remote" o modelo fica apenas no servidor de OCR compartilhado (ocr_server).
+# Com OCR_MODEL_DIR os pesos vêm só do pacote verificado (ocr_models), sem downloads.
+_reader = None
+_reader_lock = threading.Lock()
+_runtime_configured = False
+_runtime_threads: int | None = None
+
+# Limite de inferências simultâneas neste processo (OCR_MAX_CONCURRENT_PER_PROCESS).
+# O torch já paraleliza cada chamada; chamadas concorrentes no mesmo processo
+# só disputam os mesmos núcleos e pioram a latência de todas.
+_inference_slots = threading.BoundedSemaphore(max(settings.OCR_MAX_CONCURRENT_PER_PROCESS, 1))
+
+def configure_runtime(threads: int | None = None) -> None:
+  """
+  Ajusta as threads do torch neste processo, antes do modelo ser carregado.
+
+  threads é o valor calculado por quem conhece a divisão dos núcleos (ex.: o
+  ocr_pool divide os núcleos entre os processos); OCR_TORCH_THREADS, se definido,
+  tem prioridade. Sem nenhum dos dois o torch usa todos os núcleos.
+  """
+  global _runtime_configured, _runtime_threads
+  if _runtime_configured:
+    return
+  _runtime_configured = True
+
+  threads = _runtime_threads = settings.OCR_TORCH_THREADS or threads
+  if threads:
+    # Lidas pelas bibliotecas de OpenMP/MKL quando o torch é importado
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["MKL_NUM_THREADS"] = str(threads)
+
+  import torch
+  if threads:
+    torch.set_num_threads(threads)
+  if settings.OCR_TORCH_INTEROP_THREADS > 0:
+    try:
+      torch.set_num_interop_threads(settings.OCR_TORCH_INTEROP_THREADS)
+    except RuntimeError:
+      # Só pode ser definido antes do primeiro trabalho paralelo do torch
+      pass
+
+def create_reader(backend: str | None = None, quantized: bool | None = None):
+  """
+  Cria um easyocr.Reader com o backend de inferência pedido (padrão: OCR_BACKEND).
+  "torch" usa os módulos do próprio EasyOCR; "onnx" troca detector e reconhecedor
+  por sessões do ONNX Runtime (ocr_onnx).
+
+  quantized escolhe a precisão: no torch, a quantização dinâmica INT8 do EasyOCR
+  (padrão: ligada, como no próprio EasyOCR); no ONNX, os modelos .int8.onnx (padrão:
+  OCR_ONNX_QUANTIZED). A saída só é a mesma entre backends de mesma precisão (ver ocr_onnx).
+  """
+  backend = backend or settings.OCR_BACKEND
+  if backend not in ("torch", "onnx"):
+    raise ValueError(f"Backend de OCR desconhecido: {backend}. Use torch ou onnx.")
+  if quantized is None:
+    quantized = settings.OCR_ONNX_QUANTIZED if backend == "onnx" else True
+
+  configure_runtime()
+  import easyocr
+  # No ONNX, os módulos do torch são trocados logo em seguida: quantizá-los seria trabalho perdido
+  reader_kwargs = {"quantize": quantized if backend == "torch" else False}
+  if settings.OCR_MODEL_DIR:
+    # Checksums conferidos no startup; aqui basta presença e tamanho
+    ocr_models.verify(settings.OCR_MODEL_DIR, LANGUAGES, checksums=False)
+    reader = easyocr.Reader(LANGUAGES, model_storage_directory=settings.OCR_MODEL_DIR, download_enabled=False, **reader_kwargs)
+  else:
+    reader = easyocr.Reader(LANGUAGES, **reader_kwargs)
+
+  if backend == "onnx":
+    from app.api.services import ocr_onnx
+    ocr_onnx.install(reader, settings.OCR_ONNX_DIR, quantized, _runtime_threads)
+  return reader
+
+def get_reader():
+  """Retorna o easyocr.Reader do processo, criando-o na primeira chamada (thread-safe)."""
+  global _reader
+  if _reader is None:
+    with _reader_lock:
+      if _reader is None:
+        _reader = create_reader()
+  return _reader
+
+@contextmanager
+def inference_slot():
+  """Aguarda uma vaga de inferência deste processo (ver OCR_MAX_CONCURRENT_PER_PROCESS)."""
+  started = time.perf_counter()
+  with _inference_slots:
+    metrics.observe_ms("ocr.admission_wait", (time.perf_counter() - started) * 1000)
+    yield
+
+def is_ready() -> bool:
+  """Indica se o modelo já está carregado neste processo."""
+  return _reader is not None
+
+def settings_fingerprint(profile: str | None = None) -> str:
+  """
+  Identifica as configurações que influenciam o resultado do OCR (incluindo o perfil).
+  Usada na chave do cache: mudar qualquer uma delas invalida os resultados guardados.
+  """
+  params = {
+    "languages": LANGUAGES,
+    "profile": get_profile(profile).describe(),
+    "backend": settings.OCR_BACKEND,
+  }
+  if settings.OCR_BACKEND == "onnx":
+    params["onnx_quantized"] = settings.OCR_ONNX_QUANTIZED
+  return hashlib.sha256(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+def warmup() -> bool:
+  """Carrega o modelo antecipadamente, para que o primeiro pedido não pague o custo."""
+  get_reader()
+  return True
+
+def extract_text_from_image_content(contents: bytes, profile: str | None = None) -> list[dict]:
   """
   Recebe o conteúdo de uma imagem em bytes, processa com EasyOCR
   e retorna uma lista de dicionários com os resultados formatados.
   Esta é a lógica central que será reutilizada.
+
+  Com OCR_MODE=remote a imagem é enviada ao servidor de OCR compartilhado.
+  profile escolhe o perfil de OCR (ocr_profiles); None = OCR_DEFAULT_PROFILE.
   """
-  try:
-    image_as_array = np.frombuffer(contents, np.uint8)
-    image_np = cv2.imdecode(image_as_array, cv2.IMREAD_COLOR)
-
-    if image_np is None:
-      raise ValueError("Não foi possível decodificar a imagem. O arquivo pode estar corrompido ou em um formato inválido.")
-
-    results = reader.readtext(image_np)
-
-    formatted_results = []
-    for (bbox, text, confidence) in results:
-      x_min, y_min = [int(i) for i in bbox[0]]
-      x_max, y_max = [int(i) for i in bbox[2]]
-
-      formatted_results.append({
-        "text": text,
-        "confidence": confidence,
-        "bounding_box": {
-          "x_min": x_min,
-          "y_min": y_min,
-          "x_max": x_max,
-          "y_max": y_max
-        }
+  if settings.OCR_MODE == "remote":
+    from app.api.services import ocr_client
+    try:
+      return ocr_client.extract_text(contents, profile)
+    except Exception as e:
+      raise RuntimeError(f"Erro interno no processamento do EasyOCR: {e}") from e
+
+  return run_local_ocr(contents, profile)
+
+def extract_text_batch(contents_list: list[bytes], profile: str | None = None) -> list[list[dict] | Exception]:
+  """
+  Versão em lote de extract_text_from_image_content. Retorna um item por imagem:
+  a lista de resultados ou a exceção daquela imagem.
+  """
+  if settings.OCR_MODE == "remote":
+    results = []
+    for contents in contents_list:
+      try:
+        results.append(extract_text_from_image_content(contents, profile))
+      except Exception as e:
+        results.append(e)
+    return results
+
+  return run_local_ocr_batch(contents_list, profile)
+
+def _format_results(results, prepared) -> list[dict]:
+  formatted_results = []
+  for (bbox, text, confidence) in results:
+    # Caixas de volta para as coordenadas da imagem original (antes de reduzir/recortar/girar)
+    x_min, y_min, x_max, y_max = prepared.map_box(bbox)
+
+    formatted_results.append({
+      "text": text,
+      "confidence": confidence,
+      "bounding_box": {
+        "x_min": x_min,
+        "y_min": y_min,
+        "x_max": x_max,
+        "y_max": y_max
+      }
     })
+  return formatted_results
 
-    return formatted_results
+def _record_timings(timings: dict[str, float], profile: str) -> None:
+  for step, duration_ms in timings.items():
+    metrics.observe_ms(f"ocr.{step}", duration_ms)
+  if "readtext" in timings:
+    metrics.observe_ms(f"ocr.profile.{profile}", timings["readtext"])
+
+def run_local_ocr(contents: bytes, profile: str | None = None) -> list[dict]:
+  """Executa o EasyOCR neste processo. Usado diretamente pelo servidor de OCR."""
+  try:
+    ocr_profile = get_profile(profile)
+    prepared = preprocess(contents, ocr_profile.preprocess_options())
+
+    reader = get_reader()
+    with inference_slot():
+      started = time.perf_counter()
+      results = reader.readtext(prepared.image, **ocr_profile.readtext_kwargs())
+    prepared.timings["readtext"] = (time.perf_counter() - started) * 1000
+    _record_timings(prepared.timings, ocr_profile.name)
+
+    return _format_results(results, prepared)
 
   except Exception as e:
     # Re-lança a exceção para que o chamador possa tratá-la
     # Adiciona um pouco mais de contexto ao erro.
     raise RuntimeError(f"Erro interno no processamento do EasyOCR: {e}") from e
+
+def run_local_ocr_batch(contents_list: list[bytes], profile: str | None = None) -> list[list[dict] | Exception]:
+  """
+  Executa o EasyOCR em lote neste processo.
+
+  A detecção em lote do EasyOCR (readtext_batched) exige imagens do mesmo tamanho,
+  então as imagens já pré-processadas são agrupadas pelo formato; fotos do mesmo
+  aparelho reduzidas para OCR_PREPROCESS_MAX_DIMENSION costumam cair no mesmo grupo.
+  Imagens sozinhas no grupo seguem pelo readtext normal.
+  """
+  ocr_profile = get_profile(profile)
+  options = ocr_profile.preprocess_options()
+  readtext_kwargs = ocr_profile.readtext_kwargs()
+  results: list[list[dict] | Exception | None] = [None] * len(contents_list)
+  groups: dict[tuple, list[tuple[int, object]]] = {}
+
+  for index, contents in enumerate(contents_list):
+    try:
+      prepared = preprocess(contents, options)
+      groups.setdefault(prepared.image.shape, []).append((index, prepared))
+    except Exception as e:
+      results[index] = RuntimeError(f"Erro interno no processamento do EasyOCR: {e}")
+
+  reader = get_reader()
+  for members in groups.values():
+    try:
+      with inference_slot():
+        started = time.perf_counter()
+        if len(members) == 1:
+          batch_results = [reader.readtext(members[0][1].image, **readtext_kwargs)]
+        else:
+          batch_results = reader.readtext_batched(
+            [prepared.image for _, prepared in members],
+            **readtext_kwargs,
+          )
+      metrics.observe_ms("ocr.readtext_batch", (time.perf_counter() - started) * 1000)
+
+      for (index, prepared), image_results in zip(members, batch_results):
+        _record_timings(prepared.timings, ocr_profile.name)
+        results[index] = _format_results(image_results, prepared)
+    except Exception as e:
+      for index, _ in members:
+        results[index] = RuntimeError(f"Erro interno no processamento do EasyOCR: {e}")
+
+  return results
@@ -0,0 +1,158 @@
+import asyncio
+import threading
+import time
+from dataclasses import dataclass
+import cv2
+import pypdfium2 as pdfium
+from app.core.config import settings
+from app.core import metrics
+from app.api.services import ocr_pool
+from app.api.services.upload_service import detect_kind
+
+# Leitura de recibos e extratos enviados em PDF.
+#
+# PDFs gerados pelos bancos trazem a camada de texto: o texto de cada trecho e a
+# sua posição saem direto do PDFium, no formato do OCR (texto, confiança, caixa),
+# em milissegundos e sem OCR. Só as páginas sem texto (digitalizadas) são
+# renderizadas e passam pelo ocr_pool, uma de cada vez: cada página é renderizada
+# só quando a anterior já saiu do OCR, então um extrato de 30 páginas nunca fica
+# inteiro em memória como imagem.
+#
+# As caixas ficam na escala da renderização (PDF_RENDER_DPI) e as páginas são
+# empilhadas na vertical, para o receipt_parser ler o documento como uma coluna só.
+#
+# O PDFium não é thread-safe: todas as chamadas passam pelo mesmo lock.
+
+_pdfium_lock = threading.Lock()
+
+# Espaço vertical entre páginas empilhadas (mantém as linhas de páginas diferentes separadas)
+_PAGE_GAP = 40
+
+# Confiança atribuída aos trechos da camada de texto
+_TEXT_LAYER_CONFIDENCE = 1.0
+
+@dataclass
+class PdfText:
+  # Itens no formato do ocr_service, de todas as páginas
+  results: list[dict]
+  text_pages: int = 0
+  ocr_pages: int = 0
+
+@dataclass
+class _Page:
+  height: int
+  # Itens da camada de texto, ou None se a página precisar de OCR
+  items: list[dict] | None = None
+  # PNG da página renderizada (só nas páginas sem texto)
+  image: bytes | None = None
+
+def is_pdf(contents: bytes | memoryview) -> bool:
+  return detect_kind(contents) == "pdf"
+
+def _scale() -> float:
+  return settings.PDF_RENDER_DPI / 72
+
+def _open(contents: bytes | memoryview) -> pdfium.PdfDocument:
+  with _pdfium_lock:
+    try:
+      document = pdfium.PdfDocument(bytes(contents))
+    except pdfium.PdfiumError as e:
+      raise ValueError(f"PDF inválido ou protegido por senha: {e}")
+    pages = len(document)
+    if pages > settings.PDF_MAX_PAGES:
+      document.close()
+      raise ValueError(f"O PDF tem {pages} páginas; o limite é {settings.PDF_MAX_PAGES}.")
+    return document
+
+def _close(document: pdfium.PdfDocument) -> None:
+  with _pdfium_lock:
+    document.close()
+
+def _text_items(textpage: pdfium.PdfTextPage, page_height: float, scale: float) -> list[dict]:
+  """Um item por trecho contínuo de texto (o PDFium divide as linhas em retângulos)."""
+  items = []
+  for index in range(textpage.count_rects()):
+    left, bottom, right, top = textpage.get_rect(index)
+    text = textpage.get_text_bounded(left, bottom, right, top).strip()
+    if not text:
+      continue
+    # Coordenadas do PDF começam embaixo: inverte o eixo y
+    items.append({
+      "text": text,
+      "confidence": _TEXT_LAYER_CONFIDENCE,
+      "bounding_box": {
+        "x_min": int(left * scale),
+        "y_min": int((page_height - top) * scale),
+        "x_max": int(right * scale),
+        "y_max": int((page_height - bottom) * scale),
+      },
+    })
+  return items
+
+def _read_page(document: pdfium.PdfDocument, index: int) -> _Page:
+  """Camada de texto da página; sem texto suficiente, a página renderizada para o OCR."""
+  scale = _scale()
+  with _pdfium_lock:
+    page = document[index]
+    try:
+      width, height = page.get_size()
+      textpage = page.get_textpage()
+      try:
+        items = _text_items(textpage, height, scale)
+      finally:
+        textpage.close()
+
+      if sum(len(item["text"]) for item in items) >= settings.PDF_MIN_PAGE_CHARS:
+        return _Page(height=int(height * scale), items=items)
+
+      started = time.perf_counter()
+      bitmap = page.render(scale=scale, grayscale=True)
+      try:
+        pixels = bitmap.to_numpy()
+        ok, encoded = cv2.imencode(".png", pixels, [cv2.IMWRITE_PNG_COMPRESSION, 1])
+      finally:
+        bitmap.close()
+      metrics.observe_ms("receipts.pdf_render", (time.perf_counter() - started) * 1000)
+      if not ok:
+        raise ValueError(f"Falha ao renderizar a página {index + 1} do PDF.")
+      return _Page(height=pixels.shape[0], image=encoded.tobytes())
+    finally:
+      page.close()
+
+def _shift(items: list[dict], offset: int) -> list[dict]:
+  """Cópia dos itens deslocada para baixo (os do OCR podem ser os mesmos objetos guardados no cache)."""
+  shifted = []
+  for item in items:
+    box = item["bounding_box"]
+    shifted.append({**item, "bounding_box": {**box, "y_min": box["y_min"] + offset, "y_max": box["y_max"] + offset}})
+  return shifted
+
+async def extract_text(contents: bytes | memoryview, profile: str | None = None) -> PdfText:
+  """
+  Texto de todas as páginas do PDF, no formato do OCR. Páginas com camada de texto
+  não passam pelo OCR; as demais são renderizadas e reconhecidas uma a uma
+  (ocr_pool.extract_text, com o perfil informado). Lança ValueError se o PDF for
+  inválido, protegido por senha ou passar de PDF_MAX_PAGES.
+  """
+  document = await asyncio.to_thread(_open, contents)
+  extracted = PdfText(results=[])
+  offset = 0
+  try:
+    for index in range(len(document)):
+      page = await asyncio.to_thread(_read_page, document, index)
+      if page.items is not None:
+        extracted.text_pages += 1
+        items = page.items
+      else:
+        extracted.ocr_pages += 1
+        items = await ocr_pool.extract_text(page.image, profile)
+        # Libera a imagem antes de renderizar a próxima página
+        page.image = None
+      extracted.results.extend(_shift(items, offset))
+      offset += page.height + _PAGE_GAP
+  finally:
+    await asyncio.to_thread(_close, document)
+
+  metrics.increment("receipts.pdf.text_pages", extracted.text_pages)
+  metrics.increment("receipts.pdf.ocr_pages", extracted.ocr_pages)
+  return extracted
@@ -0,0 +1,101 @@
+from dataclasses import dataclass
+
+# Leitura do BR Code do PIX (QR Code ou "PIX copia e cola").
+#
+# O BR Code segue o padrão EMV de QR Code para pagamentos: uma sequência de campos
+# TLV (ID com 2 dígitos, tamanho com 2 dígitos, valor), alguns deles com subcampos
+# no mesmo formato. O último campo (ID 63) é o CRC16-CCITT de todo o texto anterior,
+# incluindo o próprio "6304". Os campos usados aqui:
+# - 26..51: conta do recebedor; a do PIX tem o GUI "br.gov.bcb.pix" no subcampo 00,
+#   a chave no 01, a mensagem no 02 e, nos códigos dinâmicos, a URL da cobrança no 25;
+# - 53: moeda (986 = real); 54: valor (ausente nos códigos estáticos sem valor);
+# - 59: nome do recebedor; 60: cidade do recebedor;
+# - 62: dados adicionais, com o identificador da transação (txid) no subcampo 05.
+
+_PIX_GUI = "br.gov.bcb.pix"
+_CURRENCY_BRL = "986"
+
+@dataclass
+class PixData:
+  merchant_name: str
+  merchant_city: str | None = None
+  key: str | None = None
+  amount: float | None = None
+  txid: str | None = None
+  message: str | None = None
+  # URL da cobrança (códigos dinâmicos: o valor fica no PSP do recebedor)
+  url: str | None = None
+  # Conteúdo lido do QR Code (guardado no artefato do OCR para o reparse)
+  payload: str | None = None
+
+def crc16(payload: str) -> str:
+  """CRC16-CCITT (polinômio 0x1021, valor inicial 0xFFFF) em 4 dígitos hexadecimais."""
+  crc = 0xFFFF
+  for byte in payload.encode("utf-8"):
+    crc ^= byte << 8
+    for _ in range(8):
+      crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else crc << 1
+      crc &= 0xFFFF
+  return f"{crc:04X}"
+
+def parse_tlv(payload: str) -> dict[str, str] | None:
+  """Campos TLV (ID -> valor) de um BR Code ou de um campo composto. None se o formato não fechar."""
+  fields = {}
+  position = 0
+  while position < len(payload):
+    header = payload[position:position + 4]
+    if len(header) < 4 or not header.isdigit():
+      return None
+    size = int(header[2:])
+    value = payload[position + 4:position + 4 + size]
+    if len(value) != size:
+      return None
+    fields[header[:2]] = value
+    position += 4 + size
+  return fields
+
+def _parse_amount(raw: str | None) -> float | None:
+  if not raw:
+    return None
+  try:
+    amount = float(raw)
+  except ValueError:
+    return None
+  return amount if amount > 0 else None
+
+def parse_brcode(payload: str) -> PixData | None:
+  """Interpreta um BR Code do PIX. Retorna None se não for um ou se o CRC não conferir."""
+  payload = payload.strip()
+  if not payload.startswith("000201") or len(payload) < 12 or payload[-8:-4] != "6304":
+    return None
+  if crc16(payload[:-4]) != payload[-4:].upper():
+    return None
+
+  fields = parse_tlv(payload)
+  if fields is None:
+    return None
+
+  account = None
+  for field_id in range(26, 52):
+    template = parse_tlv(fields.get(str(field_id), ""))
+    if template and template.get("00", "").lower() == _PIX_GUI:
+      account = template
+      break
+  if account is None or not fields.get("59"):
+    return None
+  if fields.get("53", _CURRENCY_BRL) != _CURRENCY_BRL:
+    return None
+
+  additional = parse_tlv(fields.get("62", "")) or {}
+  url = account.get("25")
+  return PixData(
+    merchant_name=fields["59"].strip(),
+    merchant_city=fields.get("60", "").strip() or None,
+    key=account.get("01"),
+    amount=_parse_amount(fields.get("54")),
+    # "***" = sem identificador (códigos estáticos)
+    txid=additional.get("05") if additional.get("05") not in (None, "***") else None,
+    message=account.get("02"),
+    url=f"https://{url}" if url and not url.startswith("http") else url,
+    payload=payload,
+  )
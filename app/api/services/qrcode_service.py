@@ -0,0 +1,32 @@
+import threading
+import time
+import cv2
+from app.core import metrics
+from app.api.services.ocr_preprocess import PreprocessOptions, preprocess
+
+# Leitura de QR Codes nas imagens de recibos, com o detector do OpenCV.
+# Custa milissegundos, contra segundos do OCR completo.
+
+# O QR Code de um cupom ocupa uma boa parte da foto: não precisa da resolução cheia
+_QR_OPTIONS = PreprocessOptions(reduced_decode=True, max_dimension=1200, grayscale=True)
+
+# Um detector por thread: a leitura roda em threads do executor e o detector não é thread-safe
+_local = threading.local()
+
+def _get_detector():
+  detector = getattr(_local, "detector", None)
+  if detector is None:
+    detector = _local.detector = cv2.QRCodeDetector()
+  return detector
+
+def decode_qr(contents: bytes | memoryview) -> str | None:
+  """Retorna o texto do primeiro QR Code encontrado na imagem, ou None."""
+  started = time.perf_counter()
+  try:
+    image = preprocess(contents, _QR_OPTIONS).image
+    text, points, _ = _get_detector().detectAndDecode(image)
+    return text or None
+  except (ValueError, cv2.error):
+    return None
+  finally:
+    metrics.observe_ms("receipts.qr_decode", (time.perf_counter() - started) * 1000)
@@ -0,0 +1,224 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+import numpy as np
+import cv2
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core import metrics
+from app.api.services.ocr_preprocess import PreprocessOptions, preprocess
+from app.crud.entry import entry as entry_crud
+from app.crud.receipt_hash import receipt_hash as receipt_hash_crud
+from app.schemas.entry import EntryCreate, EntryOut
+
+# Detecção de recibos repetidos (a mesma nota fotografada duas vezes).
+#
+# Cada recibo que vira lançamento guarda um hash perceptual (pHash de 256 bits) e
+# o SHA-256 do arquivo: fotos da mesma nota com enquadramento um pouco diferente
+# dão hashes a poucos bits de distância (Hamming). Antes do OCR, o hash da nova
+# imagem é procurado em uma BK-tree com os hashes do usuário; os vizinhos a até
+# RECEIPT_DUPLICATE_MAX_DISTANCE bits são só suspeitos. O 409 exige uma checagem
+# exata (recibos diferentes do mesmo estabelecimento têm o mesmo layout e hashes próximos):
+# - o mesmo arquivo (SHA-256 igual) é recusado antes de tudo;
+# - uma foto parecida com QR Code é confirmada antes do OCR: pela chave de acesso da
+#   NFC-e (confirm_access_key) ou pelo valor e data do QR Code que dispensa o OCR;
+# - sem QR Code, o valor e a data só saem do OCR: a foto parecida é recusada depois
+#   dele (métrica receipts.duplicates.after_ocr).
+# benchmarks/receipt_duplicates.py mede os falsos positivos sobre o corpus sintético.
+#
+# As árvores ficam em memória por processo (LRU de RECEIPT_DUPLICATE_INDEX_USERS
+# usuários) e são atualizadas de forma incremental: cada consulta só busca no
+# banco os hashes gravados depois do último já indexado.
+
+# O fundo é recortado (mesmo recorte do OCR) para o hash depender do papel e não da moldura
+_HASH_OPTIONS = PreprocessOptions(reduced_decode=True, max_dimension=256, grayscale=True, crop=True)
+
+# Lado do bloco de baixas frequências da DCT usado no hash (16 x 16 = 256 bits)
+_HASH_SIZE = 16
+HASH_BITS = _HASH_SIZE * _HASH_SIZE
+
+# Suspeito: (distância, lançamento que o recibo parecido originou)
+Suspect = tuple[int, EntryOut]
+
+@dataclass(frozen=True)
+class ImageHash:
+  # pHash de 256 bits
+  value: int
+  # SHA-256 do arquivo (checagem exata)
+  sha256: str
+
+  @property
+  def hex(self) -> str:
+    return f"{self.value:0{HASH_BITS // 4}x}"
+
+class DuplicateReceiptError(Exception):
+  """A imagem é quase idêntica à de um recibo que já virou lançamento."""
+
+  def __init__(self, entry: EntryOut, distance: int):
+    super().__init__(f"Este recibo já foi enviado (lançamento {entry.id}).")
+    self.entry = entry
+    self.distance = distance
+
+  @property
+  def entry_id(self) -> int:
+    return self.entry.id
+
+def phash(image: np.ndarray) -> int:
+  """
+  pHash de 256 bits: DCT da imagem reduzida a 64x64 e, no bloco 16x16 de baixas
+  frequências, um bit por coeficiente acima da mediana (sem o componente contínuo).
+  """
+  small = cv2.resize(image, (_HASH_SIZE * 4, _HASH_SIZE * 4), interpolation=cv2.INTER_AREA)
+  coefficients = cv2.dct(small.astype(np.float32))[:_HASH_SIZE, :_HASH_SIZE].flatten()
+  bits = np.packbits(coefficients > np.median(coefficients[1:]))
+  return int.from_bytes(bits.tobytes(), "big")
+
+def image_hash(contents: bytes | memoryview) -> ImageHash | None:
+  """pHash e SHA-256 da imagem do recibo; None se a imagem não puder ser lida."""
+  started = time.perf_counter()
+  try:
+    image = preprocess(contents, _HASH_OPTIONS).image
+  except (ValueError, cv2.error):
+    return None
+  value = phash(image)
+  metrics.observe_ms("receipts.image_hash", (time.perf_counter() - started) * 1000)
+  return ImageHash(value, hashlib.sha256(contents).hexdigest())
+
+def hamming(a: int, b: int) -> int:
+  return (a ^ b).bit_count()
+
+class BKTree:
+  """
+  Árvore BK sobre a distância de Hamming: cada filho fica na aresta da sua distância
+  até o pai, e a desigualdade triangular descarta ramos inteiros na busca.
+  """
+
+  def __init__(self):
+    # Nó: [hash, itens associados ao hash, filhos por distância]
+    self._root: list | None = None
+    self.size = 0
+
+  def add(self, value: int, item) -> None:
+    self.size += 1
+    if self._root is None:
+      self._root = [value, [item], {}]
+      return
+    node = self._root
+    while True:
+      distance = hamming(value, node[0])
+      if distance == 0:
+        node[1].append(item)
+        return
+      child = node[2].get(distance)
+      if child is None:
+        node[2][distance] = [value, [item], {}]
+        return
+      node = child
+
+  def search(self, value: int, max_distance: int) -> list[tuple[int, object]]:
+    """(distância, item) de todos os hashes a até max_distance bits, do mais próximo ao mais distante."""
+    found = []
+    stack = [self._root] if self._root is not None else []
+    while stack:
+      node = stack.pop()
+      distance = hamming(value, node[0])
+      if distance <= max_distance:
+        found.extend((distance, item) for item in node[1])
+      for edge, child in node[2].items():
+        if distance - max_distance <= edge <= distance + max_distance:
+          stack.append(child)
+    found.sort()
+    return found
+
+@dataclass
+class _UserIndex:
+  tree: BKTree
+  last_id: int = 0
+  lock: threading.Lock = field(default_factory=threading.Lock)
+
+_indexes: OrderedDict[int, _UserIndex] = OrderedDict()
+_lock = threading.Lock()
+
+def _user_index(db: Session, user_id: int) -> _UserIndex:
+  """Índice do usuário, completado com os hashes gravados (por qualquer processo) desde a última consulta."""
+  with _lock:
+    index = _indexes.get(user_id)
+    if index is None:
+      index = _indexes[user_id] = _UserIndex(BKTree())
+      while len(_indexes) > settings.RECEIPT_DUPLICATE_INDEX_USERS:
+        _indexes.popitem(last=False)
+    else:
+      _indexes.move_to_end(user_id)
+
+  # A consulta ao banco trava só o índice deste usuário
+  with index.lock:
+    for row_id, value, sha256, entry_id in receipt_hash_crud.get_since(db, user_id, index.last_id):
+      index.tree.add(int(value, 16), (entry_id, sha256))
+      index.last_id = row_id
+  return index
+
+def check_duplicate(db: Session, user_id: int, image: ImageHash | None) -> list[Suspect]:
+  """
+  Lança DuplicateReceiptError se o usuário já tiver enviado o mesmo arquivo, com um
+  hash parecido. Devolve os suspeitos (hash parecido, arquivo diferente), do mais
+  próximo ao mais distante, para confirm_duplicate depois da análise.
+  """
+  if image is None or not settings.RECEIPT_DUPLICATE_CHECK:
+    return []
+
+  index = _user_index(db, user_id)
+  with index.lock:
+    candidates = index.tree.search(image.value, settings.RECEIPT_DUPLICATE_MAX_DISTANCE)
+
+  # Todos os lançamentos candidatos em uma única consulta
+  entries = {entry.id: entry for entry in entry_crud.get_by_ids(db, list({entry_id for _, (entry_id, _) in candidates}))}
+
+  suspects = []
+  stale = False
+  for distance, (entry_id, sha256) in candidates:
+    # O lançamento pode ter sido apagado depois de indexado (o hash sai junto, por cascade)
+    existing = entries.get(entry_id)
+    if existing is None or existing.user_id != user_id:
+      stale = True
+      continue
+    if sha256 == image.sha256:
+      metrics.increment("receipts.duplicates")
+      raise DuplicateReceiptError(EntryOut.from_orm(existing), distance)
+    suspects.append((distance, EntryOut.from_orm(existing)))
+
+  if stale:
+    # Árvore com lançamentos apagados: reconstruída do banco na próxima consulta
+    with _lock:
+      _indexes.pop(user_id, None)
+  return suspects
+
+def same_receipt(a: EntryCreate | EntryOut, b: EntryCreate | EntryOut) -> bool:
+  """Mesmo valor (em centavos) e mesma data: a checagem exata dos hashes parecidos."""
+  return round(a.value * 100) == round(b.value * 100) and a.entry_date == b.entry_date
+
+def confirm_access_key(suspects: list[Suspect], access_key: str) -> None:
+  """Lança DuplicateReceiptError se algum suspeito for a mesma NFC-e (a chave de acesso vai na descrição do lançamento)."""
+  for distance, existing in suspects:
+    if access_key in (existing.description or ""):
+      metrics.increment("receipts.duplicates")
+      raise DuplicateReceiptError(existing, distance)
+
+def confirm_duplicate(suspects: list[Suspect], entry_data: EntryCreate) -> None:
+  """Lança DuplicateReceiptError se algum suspeito tiver o valor e a data do recibo analisado."""
+  for distance, existing in suspects:
+    if same_receipt(existing, entry_data):
+      metrics.increment("receipts.duplicates")
+      raise DuplicateReceiptError(existing, distance)
+  if suspects:
+    # Hash parecido, recibo diferente: o falso positivo que a checagem exata evitou
+    metrics.increment("receipts.duplicates.unconfirmed")
+
+def remember(db: Session, user_id: int, entry_id: int, image: ImageHash | None, commit: bool = True) -> None:
+  """Guarda o hash do recibo que originou o lançamento (entra no índice na próxima consulta)."""
+  if image is None or not settings.RECEIPT_DUPLICATE_CHECK:
+    return
+  receipt_hash_crud.create(
+    db, user_id=user_id, entry_id=entry_id, image_hash=image.hex, image_sha256=image.sha256, commit=commit
+  )
@@ -0,0 +1,165 @@
+import asyncio
+import time
+from datetime import timedelta
+from typing import AsyncIterator
+from app.core.config import settings
+from app.core.logger_config import logger
+from app.db.session import SessionLocal
+from app.api.services import ocr_pool, receipt_service, receipt_hash_service
+from app.api.services.receipt_hash_service import ImageHash
+from app.crud.receipt_job import receipt_job as receipt_job_crud
+from app.schemas.receipt_job import ReceiptJobOut
+from app.utils.enum import StatusProcessamento, EtapaProcessamento
+
+# Processamento assíncrono de recibos.
+#
+# O upload só grava o arquivo na tabela receipt_jobs e responde 202; workers
+# rodando dentro dos próprios processos da API consomem a fila (sem broker
+# externo) e registram cada etapa, que o cliente acompanha por polling ou SSE.
+# Cada acesso ao banco usa uma sessão curta: nenhuma conexão fica presa durante o OCR.
+
+FINAL_STATUSES = (StatusProcessamento.CONCLUIDO, StatusProcessamento.FALHOU)
+
+def enqueue(user_id: int, file_content: bytes, file_name: str | None, image_hash: ImageHash | None = None) -> ReceiptJobOut:
+  """
+  Grava o job; lança DuplicateReceiptError (sem enfileirar) se o mesmo arquivo já foi enviado.
+  Fotos só parecidas entram na fila: a confirmação depende da análise, feita no worker.
+  """
+  with SessionLocal() as db:
+    receipt_hash_service.check_duplicate(db, user_id, image_hash)
+    job = receipt_job_crud.create(db, user_id=user_id, file_content=file_content, file_name=file_name)
+    return ReceiptJobOut.from_orm(job)
+
+def get_job(job_id: str, user_id: int) -> ReceiptJobOut | None:
+  with SessionLocal() as db:
+    job = receipt_job_crud.get_by_owner(db, job_id, user_id)
+    return ReceiptJobOut.from_orm(job) if job else None
+
+def _claim_next() -> tuple[str, int, bytes] | None:
+  with SessionLocal() as db:
+    job = receipt_job_crud.claim_next(db)
+    if job is None:
+      return None
+    return job.id, job.user_id, job.file_content
+
+def _update_stage(job_id: str, stage: str) -> None:
+  with SessionLocal() as db:
+    job = receipt_job_crud.get(db, job_id)
+    receipt_job_crud.update_stage(db, job, stage)
+
+def _requeue(job_id: str) -> None:
+  with SessionLocal() as db:
+    receipt_job_crud.requeue(db, receipt_job_crud.get(db, job_id))
+
+def _fail(job_id: str, error: str) -> None:
+  with SessionLocal() as db:
+    receipt_job_crud.fail(db, receipt_job_crud.get(db, job_id), error)
+
+def _create_entry(job_id: str, user_id: int, analysis: receipt_service.ReceiptAnalysis, image_hash: ImageHash | None) -> None:
+  """Lançamento e conclusão do job na mesma transação: uma queda entre os dois não deixa o job para reprocessar."""
+  with SessionLocal() as db:
+    try:
+      created_entry = receipt_service.create_entry(db, user_id, analysis, image_hash, commit=False)
+      receipt_job_crud.finish(db, receipt_job_crud.get(db, job_id), created_entry.id, commit=False)
+      db.commit()
+    except Exception:
+      db.rollback()
+      raise
+
+def _requeue_stale() -> None:
+  with SessionLocal() as db:
+    count = receipt_job_crud.requeue_stale(db, timedelta(seconds=settings.RECEIPT_JOBS_STALE_SECONDS))
+    if count:
+      logger.warning(f"{count} job(s) de recibo presos em processamento voltaram para a fila.")
+
+async def process_job(job_id: str, user_id: int, file_content: bytes) -> None:
+  """Executa as etapas de um job já reservado por este processo."""
+  try:
+    if not file_content:
+      raise ValueError("O arquivo do recibo não foi encontrado.")
+    await asyncio.to_thread(_update_stage, job_id, EtapaProcessamento.DECODIFICADO)
+
+    # Confere de novo no worker: dois envios da mesma nota podem ter entrado na fila juntos
+    image_hash = await receipt_service.hash_image(file_content)
+    suspects = await asyncio.to_thread(receipt_service.check_duplicate, user_id, image_hash)
+
+    async def report(stage: str) -> None:
+      await asyncio.to_thread(_update_stage, job_id, stage)
+
+    try:
+      analysis = await receipt_service.analyze_receipt(file_content, user_id, on_stage=report, suspects=suspects)
+    except ocr_pool.OCRQueueFullError:
+      # Sobrecarga momentânea: o job volta para a fila e é tentado de novo depois
+      await asyncio.to_thread(_requeue, job_id)
+      await asyncio.sleep(settings.RECEIPT_JOBS_POLL_SECONDS)
+      return
+    await asyncio.to_thread(_update_stage, job_id, EtapaProcessamento.ANALISADO)
+
+    await asyncio.to_thread(_create_entry, job_id, user_id, analysis, image_hash)
+  except asyncio.CancelledError:
+    raise
+  except Exception as e:
+    logger.error(f"Falha no job de recibo {job_id}: {e}")
+    await asyncio.to_thread(_fail, job_id, str(e))
+
+async def run_worker(stop: asyncio.Event) -> None:
+  """
+  Laço de um worker: reserva o próximo job da fila, processa e repete até stop.
+  A cada RECEIPT_JOBS_STALE_SWEEP_SECONDS devolve à fila os jobs presos em processamento
+  (processo que caiu, ou worker que morreu com o processo ainda de pé).
+  """
+  next_sweep = 0.0
+  while not stop.is_set():
+    if time.monotonic() >= next_sweep:
+      next_sweep = time.monotonic() + settings.RECEIPT_JOBS_STALE_SWEEP_SECONDS
+      try:
+        await asyncio.to_thread(_requeue_stale)
+      except Exception as e:
+        logger.error(f"Erro ao recuperar jobs de recibo presos: {e}")
+
+    try:
+      claimed = await asyncio.to_thread(_claim_next)
+    except Exception as e:
+      logger.error(f"Erro ao buscar jobs de recibo: {e}")
+      claimed = None
+
+    if claimed is None:
+      try:
+        await asyncio.wait_for(stop.wait(), timeout=settings.RECEIPT_JOBS_POLL_SECONDS)
+      except asyncio.TimeoutError:
+        pass
+      continue
+
+    await process_job(*claimed)
+
+async def start_workers(stop: asyncio.Event) -> list[asyncio.Task]:
+  """Sobe RECEIPT_JOBS_CONCURRENCY workers neste processo (chamado no startup)."""
+  return [
+    asyncio.create_task(run_worker(stop))
+    for _ in range(settings.RECEIPT_JOBS_CONCURRENCY)
+  ]
+
+async def stream_events(job_id: str, user_id: int) -> AsyncIterator[tuple[str, dict]]:
+  """
+  Gera (evento, dados) a cada mudança de etapa do job, até ele terminar.
+  Eventos: "progress" a cada etapa, e "done" (com o lançamento) ou "failed" no final.
+  """
+  last_state = None
+  while True:
+    job = await asyncio.to_thread(get_job, job_id, user_id)
+    if job is None:
+      yield "failed", {"error": "Job não encontrado."}
+      return
+
+    state = (job.status, job.stage)
+    if state != last_state:
+      last_state = state
+      if job.status == StatusProcessamento.CONCLUIDO:
+        yield "done", job.model_dump(mode="json")
+        return
+      if job.status == StatusProcessamento.FALHOU:
+        yield "failed", job.model_dump(mode="json")
+        return
+      yield "progress", {"id": job.id, "status": job.status, "stage": job.stage}
+
+    await asyncio.sleep(settings.RECEIPT_JOBS_POLL_SECONDS)
@@ -0,0 +1,290 @@
+import re
+import unicodedata
+from dataclasses import dataclass
+from datetime import date, timedelta
+from app.schemas.image import ExtractedData
+
+# Análise do texto dos recibos a partir da saída do OCR.
+#
+# Em vez de juntar todo o texto e pegar o primeiro "R$", o parser:
+# 1. reconstrói as linhas do recibo pelas caixas do OCR (mesma faixa vertical, esquerda -> direita);
+# 2. corrige confusões comuns do OCR dentro de números (O->0, S->5, I/l->1, B->8);
+# 3. lê os valores no formato brasileiro (1.234,56) e também 1234.56;
+# 4. pontua cada valor pelas palavras-chave da linha ou da linha de cima
+#    ("VALOR A PAGAR", "TOTAL"...), descontando linhas de desconto, troco, tributos etc.;
+# 5. extrai data, estabelecimento e as partes de transferências (pagador/recebedor).
+#
+# Todos os padrões são compilados uma única vez e cada linha é analisada uma vez só:
+# um recibo leva frações de milissegundo, contra segundos do OCR.
+
+# Versão das regras: incremente quando uma mudança alterar o resultado da análise,
+# para o reparse (ocr_reparse) reprocessar os recibos analisados pelas versões anteriores
+VERSION = 1
+
+@dataclass
+class Line:
+  text: str
+  # Texto em minúsculas e sem acentos, com o mesmo tamanho de text (posições coincidem)
+  folded: str
+  y_min: int
+  y_max: int
+  # Valores monetários da linha (parse_amounts) e pontuação de "linha de total" (_keyword_score)
+  amounts: list[float]
+  score: int
+
+# Caracteres que o OCR troca por dígitos, aplicados só dentro de números
+_DIGIT_FIXES = str.maketrans("oqsilb|", "0051181")
+_NUMBERISH_RE = re.compile(r"(?<![a-z0-9])[0-9oqsilb|][0-9oqsilb|.]*,\s?[0-9oqsilb|]{2}(?![a-z0-9])")
+
+_AMOUNT_RE = re.compile(
+  r"(?<![\d.,])(?:(\d{1,3}(?:\.\d{3})+|\d+)\s?,\s?(\d{2})|(\d+)\.(\d{2}))(?![\d.,%]|\s?%)"
+)
+_CURRENCY_RE = re.compile(r"r\s?\$|\brs\b|\breais\b")
+
+# Palavras-chave de "linha de total" e seus pesos, numa única expressão (uma passada por linha);
+# as alternativas mais específicas vêm antes, e vale o maior peso encontrado na linha
+_TOTAL_KEYWORDS = {
+  "w10": (r"valor\s+a\s+pagar|total\s+a\s+pagar", 10),
+  "w9": (r"valor\s+total|total\s+geral|total\s+da\s+(?:nota|compra)|total\s+r\s?\$", 9),
+  "w2": (r"sub\s?total", 2),
+  "w8": (r"\btotal\b", 8),
+  "w6": (r"valor\s+pago|valor\s+d[ao]\s+(?:pix|transferencia|pagamento)|transferido|\bpago\b", 6),
+  "w4": (r"\bvalor\b|\bquantia\b", 4),
+}
+_TOTAL_KEYWORDS_RE = re.compile("|".join(f"(?P<{name}>{pattern})" for name, (pattern, _) in _TOTAL_KEYWORDS.items()))
+_TOTAL_WEIGHTS = {name: weight for name, (_, weight) in _TOTAL_KEYWORDS.items()}
+_NEGATIVE_RE = re.compile(
+  r"desconto|troco|acrescimo|tribut|imposto|lei\s*12\.?741|aprox|taxa|juros|saldo|limite|"
+  r"dinheiro|economi|icms|\bpis\b|cofins|\bqtd|\bitens\b|\bitem\b|\bun\b"
+)
+_NEGATIVE_WEIGHT = -8
+# Valores só em linhas com pontuação acima disso são candidatos a total
+_MIN_SCORE = -4
+
+_DATE_RE = re.compile(r"(?<!\d)(\d{1,2})[/.\-](\d{1,2})[/.\-](\d{4}|\d{2})(?!\d)")
+_MONTHS = {"jan": 1, "fev": 2, "mar": 3, "abr": 4, "mai": 5, "jun": 6, "jul": 7, "ago": 8, "set": 9, "out": 10, "nov": 11, "dez": 12}
+_DATE_ISO_RE = re.compile(r"(?<!\d)(\d{4})-(\d{2})-(\d{2})(?!\d)")
+_DATE_TEXT_RE = re.compile(r"(?<!\d)(\d{1,2})\s*(?:de\s+)?(jan|fev|mar|abr|mai|jun|jul|ago|set|out|nov|dez)[a-z]*\.?\s*(?:de\s+)?(\d{4})")
+_DATE_HINT_RE = re.compile(r"emissao|emitid|\bdata\b|realizad|efetuad")
+
+_COMPANY_RE = re.compile(
+  r"\b(?:ltda|eireli|s\.?\s?a\.?|s/a|me|epp|comercio|mercado|supermercado|atacad|farmacia|drogaria|"
+  r"restaurante|padaria|posto|loja|magazine|lanchonete|panificadora)\b"
+)
+_HEADER_NOISE_RE = re.compile(
+  r"cnpj|cpf|\bie\b|inscr|cupom|nfc-?e|documento auxiliar|nota fiscal|consumidor|endereco|"
+  r"\b(?:rua|r\.|av|av\.|avenida|rodovia|rod\.|travessa|alameda|praca)\s.*\d|\bcep\b|\btel\b|fone|"
+  r"comprovante|extrato|via d[oa]|\bpix\b|transferencia|protocolo|autenticacao"
+)
+
+_FROM_RE = re.compile(r"^(?:(?:de|origem)\s*:|pagador|quem\s+pagou|dados\s+do\s+pagador|remetente)\s*:?\s*")
+_TO_RE = re.compile(r"^(?:(?:para|destino)\s*:|recebedor|favorecido|beneficiario|quem\s+recebeu|dados\s+do\s+recebedor|destinatario)\s*:?\s*")
+_LABEL_ONLY_RE = re.compile(r"^(?:de|para|origem|destino)$")
+_NAME_PREFIX_RE = re.compile(r"^nome\s*:?\s*")
+_LETTERS_RE = re.compile(r"[a-z]")
+
+def fold(text: str) -> str:
+  """Minúsculas sem acentos, caractere a caractere (mantém as posições do texto original)."""
+  if text.isascii():
+    return text.lower()
+  return "".join(unicodedata.normalize("NFD", ch)[0].lower() if ord(ch) > 127 else ch.lower() for ch in text)
+
+def build_lines(ocr_results: list[dict]) -> list[Line]:
+  """Agrupa as caixas do OCR em linhas: mesma faixa vertical, ordenadas da esquerda para a direita."""
+  items = sorted(
+    ocr_results,
+    key=lambda item: item["bounding_box"]["y_min"] + item["bounding_box"]["y_max"],
+  )
+  rows: list[list[dict]] = []
+  band = (0, -1)
+  for item in items:
+    box = item["bounding_box"]
+    center = (box["y_min"] + box["y_max"]) / 2
+    if rows and band[0] <= center <= band[1]:
+      rows[-1].append(item)
+    else:
+      rows.append([item])
+      band = (box["y_min"], box["y_max"])
+
+  lines = []
+  for row in rows:
+    row.sort(key=lambda item: item["bounding_box"]["x_min"])
+    text = " ".join(item["text"].strip() for item in row if item["text"].strip())
+    if text:
+      folded = fold(text)
+      lines.append(Line(
+        text=text,
+        folded=folded,
+        y_min=min(item["bounding_box"]["y_min"] for item in row),
+        y_max=max(item["bounding_box"]["y_max"] for item in row),
+        amounts=parse_amounts(folded),
+        score=_keyword_score(folded),
+      ))
+  return lines
+
+def items_from_lines(lines: list[str]) -> list[dict]:
+  """Converte linhas de texto simples no formato do OCR (uma caixa por linha), para reaproveitar o parser."""
+  return [
+    {
+      "text": text,
+      "confidence": 1.0,
+      "bounding_box": {"x_min": 0, "y_min": index * 20, "x_max": max(len(text), 1) * 10, "y_max": index * 20 + 16},
+    }
+    for index, text in enumerate(lines)
+  ]
+
+def _fix_digits(folded: str) -> str:
+  def fix(match: re.Match) -> str:
+    token = match.group(0)
+    return token.translate(_DIGIT_FIXES) if any(ch.isdigit() for ch in token) else token
+  return _NUMBERISH_RE.sub(fix, folded)
+
+def parse_amounts(folded: str) -> list[float]:
+  """Valores monetários de uma linha já normalizada (fold), da esquerda para a direita."""
+  amounts = []
+  for match in _AMOUNT_RE.finditer(_fix_digits(folded)):
+    if match.group(1) is not None:
+      integer, cents = match.group(1).replace(".", ""), match.group(2)
+    else:
+      integer, cents = match.group(3), match.group(4)
+    amounts.append(int(integer) + int(cents) / 100)
+  return amounts
+
+def _keyword_score(folded: str) -> int:
+  score = max((_TOTAL_WEIGHTS[match.lastgroup] for match in _TOTAL_KEYWORDS_RE.finditer(folded)), default=0)
+  if _NEGATIVE_RE.search(folded):
+    score += _NEGATIVE_WEIGHT
+  return score
+
+def find_total(lines: list[Line]) -> float | None:
+  """Escolhe o valor total entre todos os valores do recibo, pela pontuação da linha."""
+  best = None
+  previous_label = 0
+  for index, line in enumerate(lines):
+    amounts = line.amounts
+    score = line.score
+
+    if not amounts:
+      # Linha só com o rótulo ("TOTAL"), valor na linha de baixo
+      previous_label = score
+      continue
+
+    if score == 0 and previous_label > 0:
+      score = previous_label * 0.8
+    previous_label = 0
+
+    if score <= _MIN_SCORE:
+      continue
+    if _CURRENCY_RE.search(line.folded):
+      score += 2
+    # Totais costumam ficar no fim do recibo
+    score += index / len(lines)
+
+    # Em linhas com vários valores (qtd x unitário = total) o da direita é o total da linha
+    for position, amount in enumerate(amounts):
+      candidate = (score + (0.5 if position == len(amounts) - 1 else 0), amount)
+      if best is None or candidate > best:
+        best = candidate
+
+  return best[1] if best else None
+
+def _valid_date(day: int, month: int, year: int, today: date) -> date | None:
+  if year < 100:
+    year += 2000
+  try:
+    value = date(year, month, day)
+  except ValueError:
+    return None
+  if value > today + timedelta(days=1) or value < today - timedelta(days=3650):
+    return None
+  return value
+
+def find_date(lines: list[Line], today: date | None = None) -> date | None:
+  """Data da compra/transferência; prefere linhas com 'emissão', 'data' etc."""
+  today = today or date.today()
+  first = None
+  for line in lines:
+    candidates = [
+      _valid_date(int(d), int(m), int(y), today) for d, m, y in _DATE_RE.findall(line.folded)
+    ] + [
+      _valid_date(int(d), int(m), int(y), today) for y, m, d in _DATE_ISO_RE.findall(line.folded)
+    ] + [
+      _valid_date(int(d), _MONTHS[m], int(y), today) for d, m, y in _DATE_TEXT_RE.findall(line.folded)
+    ]
+    for candidate in candidates:
+      if candidate is None:
+        continue
+      if _DATE_HINT_RE.search(line.folded):
+        return candidate
+      first = first or candidate
+  return first
+
+def _is_name(folded: str) -> bool:
+  letters = len(_LETTERS_RE.findall(folded))
+  return letters >= 3 and letters >= len(folded.replace(" ", "")) * 0.5
+
+def find_merchant(lines: list[Line]) -> str | None:
+  """Nome do estabelecimento no cabeçalho do recibo (antes dos valores)."""
+  header = []
+  for line in lines[:8]:
+    if line.amounts:
+      break
+    header.append(line)
+
+  candidates = [
+    line for line in header
+    if line.score == 0 and not _HEADER_NOISE_RE.search(line.folded) and _is_name(line.folded)
+  ]
+  for line in candidates:
+    if _COMPANY_RE.search(line.folded):
+      return line.text
+  return candidates[0].text if candidates else None
+
+def _party_after(lines: list[Line], index: int, pattern: re.Pattern) -> str | None:
+  line = lines[index]
+  match = pattern.match(line.folded)
+  if match is None:
+    if not _LABEL_ONLY_RE.match(line.folded):
+      return None
+    rest_start = len(line.text)
+  else:
+    rest_start = match.end()
+
+  candidates = [(line.text, line.folded, rest_start)]
+  if index + 1 < len(lines):
+    candidates.append((lines[index + 1].text, lines[index + 1].folded, 0))
+
+  for text, folded, start in candidates:
+    rest_folded = folded[start:].strip()
+    prefix = _NAME_PREFIX_RE.match(rest_folded)
+    if prefix:
+      rest_folded = rest_folded[prefix.end():]
+    if not rest_folded or _FROM_RE.match(rest_folded) or _TO_RE.match(rest_folded):
+      continue
+    if _is_name(rest_folded):
+      return text[len(text) - len(rest_folded):].strip()
+  return None
+
+def find_parties(lines: list[Line]) -> tuple[str | None, str | None]:
+  """(remetente, destinatário) de comprovantes de transferência/PIX."""
+  sender = recipient = None
+  for index, line in enumerate(lines):
+    if sender is None and (_FROM_RE.match(line.folded) or line.folded in ("de", "origem")):
+      sender = _party_after(lines, index, _FROM_RE)
+    elif recipient is None and (_TO_RE.match(line.folded) or line.folded in ("para", "destino")):
+      recipient = _party_after(lines, index, _TO_RE)
+  return sender, recipient
+
+def parse(ocr_results: list[dict], today: date | None = None) -> ExtractedData:
+  """Extrai valor total, data, estabelecimento e partes do recibo a partir da saída do OCR."""
+  lines = build_lines(ocr_results)
+  merchant = find_merchant(lines)
+  sender, recipient = find_parties(lines)
+  return ExtractedData(
+    valor_total=find_total(lines),
+    remetente=sender,
+    # Em compras o dinheiro vai para o estabelecimento
+    destinatario=recipient or merchant,
+    estabelecimento=merchant,
+    data=find_date(lines, today),
+  )
@@ -1,28 +1,520 @@
 from sqlalchemy.orm import Session
-from fastapi import UploadFile
+from dataclasses import dataclass
 from datetime import date
-import re
-from app.api.services import ocr_service
+from typing import Awaitable, Callable
+import asyncio
+import hashlib
+from app.core.config import settings
+from app.core import metrics
+from app.core.logger_config import logger
+from app.api.services import ocr_pool, pdf_service, qrcode_service, nfce_service, pix_service, receipt_parser, keyword_classifier, receipt_hash_service, goal_service, ocr_artifact_service
+from app.api.services.nfce_service import NFCeData
+from app.api.services.pix_service import PixData
+from app.api.services.receipt_hash_service import ImageHash, Suspect
 from app.crud.entry import entry as entry_crud
-from app.schemas.entry import EntryCreate
+from app.db.session import SessionLocal
+from app.schemas.entry import EntryCreate, EntryOut
+from app.schemas.receipt import ReceiptTextRequest
 from app.models.entry import Entry
+from app.utils.enum import Categoria, TipoLancamento, EtapaProcessamento
 
-async def process_receipt_image(db: Session, user_id: int, file: UploadFile) -> Entry:
+# Conteúdo reconhecido no QR Code do recibo (ou no código colado pelo usuário)
+ReceiptQR = NFCeData | PixData
+
+# Perfil registrado nos artefatos de OCR dos recibos lidos no próprio aparelho (POST /receipts/text)
+DEVICE_OCR_PROFILE = "device"
+# Perfil registrado nos artefatos dos PDFs lidos só pela camada de texto
+PDF_TEXT_PROFILE = "pdf"
+
+@dataclass
+class ReceiptAnalysis:
+  """Dados do lançamento extraídos de um recibo e a saída do OCR que os originou."""
+  entry_data: EntryCreate
+  # None quando o lançamento veio só do QR Code da NFC-e (sem OCR)
+  ocr_results: list[dict] | None = None
+  profile: str | None = None
+  # None quando o recibo chegou já como texto (sem imagem)
+  image_sha256: str | None = None
+  # QR Code sem valor que completou a análise do OCR (refeito no reparse)
+  qr_payload: str | None = None
+
+async def process_receipt_image(
+  user_id: int,
+  contents: bytes | memoryview,
+  profile: str | None = None,
+  allow_duplicate: bool = False,
+) -> EntryOut:
   """
   Orquestra o processo de validação de recibo:
-  1. Lê o conteúdo do arquivo.
-  2. Usa o ocr_service para extrair o texto.
-  3. Analisa o texto para extrair informações (valor, tipo).
-  4. Cria o lançamento no banco de dados usando o CRUD.
+  1. Recebe o conteúdo do arquivo (já lido e validado pelo upload_service).
+  2. Recusa (DuplicateReceiptError) o mesmo arquivo de um recibo já enviado, sem rodar o OCR.
+  3. Tenta o QR Code da NFC-e; sem ele, usa o ocr_service para extrair o texto.
+  4. Analisa o texto para extrair informações (valor, tipo); uma foto parecida com um
+     recibo já enviado só é recusada se a chave da NFC-e ou o valor e a data também baterem
+     (ver analyze_receipt: com QR Code, antes do OCR).
+  5. Cria o lançamento no banco de dados usando o CRUD.
+
+  Nenhuma conexão com o banco fica presa durante o OCR: cada ida ao banco
+  (checagem de repetidos, gravação) usa uma sessão curta, fora do event loop.
+  PDFs não têm hash perceptual: a checagem de repetidos vale só para imagens.
+  """
+  image_hash = await hash_image(contents)
+  suspects = [] if allow_duplicate else await asyncio.to_thread(check_duplicate, user_id, image_hash)
+
+  analysis = await analyze_receipt(contents, user_id, profile=profile, suspects=suspects)
+
+  # Passo 3: Salvar no banco usando a função correta do CRUD
+  created = await asyncio.to_thread(save_entries, user_id, [(analysis, image_hash)])
+  return created[0]
+
+async def process_receipt_text(user_id: int, receipt: ReceiptTextRequest) -> EntryOut:
+  """
+  Cria o lançamento de um recibo lido pelo OCR do próprio aparelho: só as etapas de
+  análise e gravação, sem imagem e sem OCR no servidor. Linhas soltas ganham caixas
+  sintéticas (uma por linha); o QR Code lido pelo aparelho (ou o PIX copia e cola)
+  tem o mesmo papel que no upload e, se trouxer o valor, dispensa as linhas.
+  """
+  qr = parse_receipt_qr(receipt.qr_code) if receipt.qr_code else None
+  entry_data = entry_from_qr(qr, user_id)
+  if entry_data is not None:
+    analysis = ReceiptAnalysis(entry_data)
+  elif not (receipt.lines or receipt.items):
+    raise ValueError("O código enviado não traz o valor do recibo: envie também as linhas do recibo.")
+  else:
+    metrics.increment("receipts.path.device_text")
+    if receipt.items:
+      ocr_results = [item.model_dump() for item in receipt.items]
+    else:
+      ocr_results = receipt_parser.items_from_lines(receipt.lines)
+    entry_data = complement_with_qr(parse_ocr_results(ocr_results, user_id), qr)
+    analysis = ReceiptAnalysis(entry_data, ocr_results, DEVICE_OCR_PROFILE, qr_payload=qr_payload(qr))
+
+  created = await asyncio.to_thread(save_entries, user_id, [(analysis, None)])
+  return created[0]
+
+def check_duplicate(user_id: int, image_hash: ImageHash | None) -> list[Suspect]:
+  """receipt_hash_service.check_duplicate com uma sessão própria, aberta só para a consulta."""
+  if image_hash is None:
+    return []
+  with SessionLocal() as db:
+    return receipt_hash_service.check_duplicate(db, user_id, image_hash)
+
+def create_entry(
+  db: Session,
+  user_id: int,
+  analysis: ReceiptAnalysis,
+  image_hash: ImageHash | None = None,
+  commit: bool = True,
+) -> Entry:
+  """
+  Grava o lançamento do recibo, o hash da imagem, o artefato do OCR e as notificações de
+  meta em uma única transação: tudo entra (um commit por recibo) ou nada entra.
+  commit=False só faz o flush: quem chamou confirma a transação (ex.: junto com o job do recibo).
+  """
+  try:
+    created_entry = entry_crud.create_with_owner(db=db, obj_in=analysis.entry_data, user_id=user_id, commit=False)
+    receipt_hash_service.remember(db, user_id, created_entry.id, image_hash, commit=False)
+    if analysis.ocr_results is not None:
+      ocr_artifact_service.store(
+        db, created_entry, analysis.ocr_results, analysis.image_sha256, analysis.profile,
+        qr_payload=analysis.qr_payload, commit=False
+      )
+    goal_service.notify_goals(db, created_entry, commit=False)
+    if not commit:
+      db.flush()
+      return created_entry
+    db.commit()
+  except Exception:
+    db.rollback()
+    raise
+  db.refresh(created_entry)
+  return created_entry
+
+def save_entries(
+  user_id: int,
+  items: list[tuple[ReceiptAnalysis, ImageHash | None]],
+  return_exceptions: bool = False,
+) -> list[EntryOut | Exception]:
+  """
+  Grava os lançamentos (análise, hash da imagem) em uma sessão curta e devolve os dados já
+  serializáveis. Cada recibo é gravado por conta própria; com return_exceptions, a falha
+  de um vira o item dele na resposta (como em asyncio.gather) e os demais seguem.
+  """
+  saved: list[EntryOut | Exception] = []
+  with SessionLocal() as db:
+    for analysis, image_hash in items:
+      try:
+        saved.append(EntryOut.from_orm(create_entry(db, user_id, analysis, image_hash)))
+      except Exception as e:
+        if not return_exceptions:
+          raise
+        logger.error(f"Falha ao gravar o lançamento do recibo: {e}")
+        saved.append(RuntimeError(f"Falha ao gravar o lançamento: {e}"))
+  return saved
+
+async def hash_image(contents: bytes | memoryview) -> ImageHash | None:
+  """Hash perceptual da imagem (fora do event loop); None para PDFs ou se a checagem de repetidos estiver desligada."""
+  if not settings.RECEIPT_DUPLICATE_CHECK or pdf_service.is_pdf(contents):
+    return None
+  return await asyncio.to_thread(receipt_hash_service.image_hash, contents)
+
+async def analyze_receipt(
+  contents: bytes | memoryview,
+  user_id: int,
+  on_stage: Callable[[str], Awaitable[None]] | None = None,
+  profile: str | None = None,
+  suspects: list[Suspect] | None = None,
+) -> ReceiptAnalysis:
+  """
+  Extrai os dados do lançamento de uma imagem de recibo (sem salvar).
+
+  Caminho rápido: cupons NFC-e trazem um QR Code com chave de acesso, CNPJ do
+  emitente e, quase sempre, data e valor total; comprovantes PIX podem trazer o
+  BR Code, com valor e recebedor exatos. Ler o QR Code custa milissegundos;
+  o OCR só roda quando não há QR Code ou quando ele não traz o valor.
+  on_stage, se informado, é chamado ao fim da etapa de OCR.
+
+  O OCR começa pelo perfil barato (OCR_RECEIPT_PROFILE, ou o perfil pedido) e só
+  repete com OCR_RECEIPT_ESCALATION_PROFILE quando nenhum valor é encontrado.
+  PDFs seguem por _analyze_pdf.
+
+  suspects (check_duplicate) são os lançamentos com hash parecido: a checagem exata
+  usa o QR Code antes do OCR (confirm_before_ocr); sem QR Code, só depois dele.
+  """
+  suspects = suspects or []
+  if pdf_service.is_pdf(contents):
+    analysis = await _analyze_pdf(contents, user_id, on_stage, profile)
+    confirm_after_ocr(suspects, analysis)
+    return analysis
+
+  qr = await read_receipt_qr(contents)
+  entry_data = entry_from_qr(qr, user_id)
+  confirm_before_ocr(suspects, qr, entry_data)
+  if entry_data is not None:
+    return ReceiptAnalysis(entry_data)
+
+  metrics.increment("receipts.path.ocr")
+  profile = profile or settings.OCR_RECEIPT_PROFILE
+  ocr_results = await _run_ocr(contents, profile)
+  if on_stage is not None:
+    await on_stage(EtapaProcessamento.OCR_CONCLUIDO)
+
+  try:
+    entry_data = parse_ocr_results(ocr_results, user_id)
+  except ValueError:
+    escalation = _escalation_profile(profile)
+    if escalation is None:
+      raise
+    metrics.increment("receipts.ocr_escalations")
+    profile = escalation
+    ocr_results = await _run_ocr(contents, profile)
+    entry_data = parse_ocr_results(ocr_results, user_id)
+
+  entry_data = complement_with_qr(entry_data, qr)
+  analysis = ReceiptAnalysis(entry_data, ocr_results, profile, hashlib.sha256(contents).hexdigest(), qr_payload(qr))
+  confirm_after_ocr(suspects, analysis)
+  return analysis
+
+def confirm_before_ocr(suspects: list[Suspect], qr: ReceiptQR | None, entry_data: EntryCreate | None) -> None:
+  """
+  Checagem exata dos suspeitos com o que o QR Code traz, sem gastar o OCR: a chave de
+  acesso identifica a NFC-e; o QR Code com valor (entry_data) confirma pelo valor e data.
+  """
+  if not suspects:
+    return
+  if isinstance(qr, NFCeData):
+    receipt_hash_service.confirm_access_key(suspects, qr.access_key)
+  if entry_data is not None:
+    receipt_hash_service.confirm_duplicate(suspects, entry_data)
+
+def confirm_after_ocr(suspects: list[Suspect], analysis: ReceiptAnalysis) -> None:
+  """Checagem pelo valor e data da análise; conta as fotos repetidas que só foram recusadas depois do OCR."""
+  try:
+    receipt_hash_service.confirm_duplicate(suspects, analysis.entry_data)
+  except receipt_hash_service.DuplicateReceiptError:
+    if analysis.ocr_results is not None:
+      metrics.increment("receipts.duplicates.after_ocr")
+    raise
+
+async def _analyze_pdf(
+  contents: bytes | memoryview,
+  user_id: int,
+  on_stage: Callable[[str], Awaitable[None]] | None = None,
+  profile: str | None = None,
+) -> ReceiptAnalysis:
+  """
+  Recibo ou extrato em PDF: a camada de texto das páginas dispensa o OCR; só as páginas
+  digitalizadas passam por ele, uma a uma (pdf_service). Sem escalonamento de perfil:
+  a maioria dos PDFs nem passa pelo OCR.
+  """
+  profile = profile or settings.OCR_RECEIPT_PROFILE
+  extracted = await pdf_service.extract_text(contents, profile)
+  metrics.increment("receipts.path.pdf_text" if extracted.ocr_pages == 0 else "receipts.path.pdf_ocr")
+  if on_stage is not None:
+    await on_stage(EtapaProcessamento.OCR_CONCLUIDO)
+
+  entry_data = parse_ocr_results(extracted.results, user_id)
+  # Artefato com perfil "pdf" quando nenhuma página passou pelo OCR
+  artifact_profile = PDF_TEXT_PROFILE if extracted.ocr_pages == 0 else profile
+  return ReceiptAnalysis(entry_data, extracted.results, artifact_profile, hashlib.sha256(contents).hexdigest())
+
+async def process_receipt_batch(
+  user_id: int,
+  contents_list: list[bytes | memoryview],
+  profile: str | None = None,
+  allow_duplicate: bool = False,
+) -> list[EntryOut | Exception]:
+  """
+  Versão em lote de process_receipt_image: os arquivos repetidos (já enviados antes ou
+  repetidos no próprio lote) são recusados primeiro, depois os QR Codes são lidos e o OCR
+  das imagens restantes roda em lote (ocr_pool.extract_text_batch); cada recibo vira um lançamento.
+  Os PDFs seguem por _analyze_pdf, como no envio de um recibo só.
+  As imagens sem valor encontrado passam juntas, em um segundo lote, pelo perfil de escalonamento.
+  Fotos parecidas com um recibo já enviado são confirmadas pelo QR Code antes do OCR, como em
+  analyze_receipt; as demais (e as parecidas com outra do lote) depois da análise, se o valor e a data baterem.
+  Retorna um item por arquivo, na mesma ordem: o lançamento criado ou o erro daquele arquivo.
   """
-  image_content = await file.read()
+  hashes = await asyncio.gather(*[hash_image(contents) for contents in contents_list])
+
+  entries: list[ReceiptAnalysis | Exception | None] = [None] * len(contents_list)
+  suspects: list[list[Suspect]] = [[] for _ in contents_list]
+  similar: list[list[int]] = [[] for _ in contents_list]
+  if not allow_duplicate:
+    await asyncio.to_thread(_reject_duplicates, user_id, hashes, entries, suspects, similar)
+
+  candidates = [index for index, analysis in enumerate(entries) if analysis is None]
+  pdfs = [index for index in candidates if pdf_service.is_pdf(contents_list[index])]
+  if pdfs:
+    analyses = await asyncio.gather(
+      *[_analyze_pdf(contents_list[index], user_id, profile=profile) for index in pdfs], return_exceptions=True
+    )
+    for index, analysis in zip(pdfs, analyses):
+      entries[index] = analysis
+    candidates = [index for index in candidates if index not in pdfs]
+
+  codes: list[ReceiptQR | None] = [None] * len(contents_list)
+  for index, qr in zip(candidates, await asyncio.gather(*[read_receipt_qr(contents_list[index]) for index in candidates])):
+    codes[index] = qr
+
+  pending = []
+  for index in candidates:
+    entry_data = entry_from_qr(codes[index], user_id)
+    try:
+      confirm_before_ocr(suspects[index], codes[index], entry_data)
+    except receipt_hash_service.DuplicateReceiptError as e:
+      entries[index] = e
+      continue
+    if entry_data is not None:
+      entries[index] = ReceiptAnalysis(entry_data)
+    else:
+      metrics.increment("receipts.path.ocr")
+      pending.append(index)
 
+  profile = profile or settings.OCR_RECEIPT_PROFILE
+  unparsed = await _parse_batch(contents_list, pending, codes, entries, user_id, profile)
+
+  escalation = _escalation_profile(profile)
+  if unparsed and escalation is not None:
+    metrics.increment("receipts.ocr_escalations", len(unparsed))
+    await _parse_batch(contents_list, unparsed, codes, entries, user_id, escalation)
+
+  _confirm_duplicates(entries, suspects, similar)
+
+  # Todos os lançamentos do lote gravados em uma única sessão curta; a falha de um não derruba os demais
+  to_save = [(analysis, image_hash) for analysis, image_hash in zip(entries, hashes) if not isinstance(analysis, Exception)]
+  created = iter(await asyncio.to_thread(save_entries, user_id, to_save, return_exceptions=True))
+  return [analysis if isinstance(analysis, Exception) else next(created) for analysis in entries]
+
+def _reject_duplicates(
+  user_id: int,
+  hashes: list[ImageHash | None],
+  entries: list,
+  suspects: list[list[Suspect]],
+  similar: list[list[int]],
+) -> None:
+  """
+  Marca em entries os arquivos já enviados antes e os repetidos dentro do próprio lote.
+  Preenche suspects (lançamentos com hash parecido) e similar (índices anteriores do
+  lote com hash parecido), para _confirm_duplicates depois da análise.
+  """
+  if all(image_hash is None for image_hash in hashes):
+    return
+
+  accepted: list[int] = []
+  with SessionLocal() as db:
+    for index, image_hash in enumerate(hashes):
+      if image_hash is None:
+        continue
+      try:
+        suspects[index] = receipt_hash_service.check_duplicate(db, user_id, image_hash)
+      except receipt_hash_service.DuplicateReceiptError as e:
+        entries[index] = e
+        continue
+
+      if any(hashes[other].sha256 == image_hash.sha256 for other in accepted):
+        metrics.increment("receipts.duplicates")
+        entries[index] = ValueError("Recibo repetido no lote: outro arquivo enviado junto é a mesma nota.")
+        continue
+      similar[index] = [
+        other for other in accepted
+        if receipt_hash_service.hamming(hashes[other].value, image_hash.value) <= settings.RECEIPT_DUPLICATE_MAX_DISTANCE
+      ]
+      accepted.append(index)
+
+def _confirm_duplicates(entries: list, suspects: list[list[Suspect]], similar: list[list[int]]) -> None:
+  """Recusa os recibos analisados com o valor e a data de um suspeito ou de um parecido do lote."""
+  for index, analysis in enumerate(entries):
+    if not isinstance(analysis, ReceiptAnalysis):
+      continue
+    # Os lançamentos só do QR Code já passaram por confirm_before_ocr
+    if analysis.ocr_results is not None:
+      try:
+        confirm_after_ocr(suspects[index], analysis)
+      except receipt_hash_service.DuplicateReceiptError as e:
+        entries[index] = e
+        continue
+
+    repeated = any(
+      isinstance(entries[other], ReceiptAnalysis)
+      and receipt_hash_service.same_receipt(entries[other].entry_data, analysis.entry_data)
+      for other in similar[index]
+    )
+    if repeated:
+      metrics.increment("receipts.duplicates")
+      entries[index] = ValueError("Recibo repetido no lote: outro arquivo enviado junto é a mesma nota.")
+
+async def _parse_batch(contents_list, indexes, codes, entries, user_id: int, profile: str) -> list[int]:
+  """OCR em lote + análise das imagens em indexes. Preenche entries e retorna as que ficaram sem valor."""
+  ocr_outcomes = await ocr_pool.extract_text_batch([contents_list[index] for index in indexes], profile)
+
+  unparsed = []
+  for index, outcome in zip(indexes, ocr_outcomes):
+    if isinstance(outcome, (ocr_pool.OCRQueueFullError, ocr_pool.OCRTimeoutError)):
+      entries[index] = outcome
+      continue
+    if isinstance(outcome, Exception):
+      entries[index] = ValueError(f"Falha ao processar a imagem com OCR: {outcome}")
+      continue
+    try:
+      entry_data = complement_with_qr(parse_ocr_results(outcome, user_id), codes[index])
+      entries[index] = ReceiptAnalysis(
+        entry_data, outcome, profile, hashlib.sha256(contents_list[index]).hexdigest(), qr_payload(codes[index])
+      )
+    except ValueError as e:
+      entries[index] = e
+      unparsed.append(index)
+  return unparsed
+
+def _escalation_profile(profile: str) -> str | None:
+  """Perfil da segunda tentativa, ou None se não houver (ou se já foi o usado)."""
+  escalation = settings.OCR_RECEIPT_ESCALATION_PROFILE
+  if not escalation or escalation == profile:
+    return None
+  return escalation
+
+async def _run_ocr(contents: bytes | memoryview, profile: str) -> list[dict]:
   # Passo 1: Extrair dados da imagem usando o serviço reutilizado
   try:
-    ocr_results = ocr_service.extract_text_from_image_content(image_content)
+    return await ocr_pool.extract_text(contents, profile)
+  except (ocr_pool.OCRQueueFullError, ocr_pool.OCRTimeoutError):
+    # Sobrecarga/timeout não é problema da imagem: deixa o router responder 503/504
+    raise
   except Exception as e:
     raise ValueError(f"Falha ao processar a imagem com OCR: {e}")
 
+async def read_receipt_qr(contents: bytes | memoryview) -> ReceiptQR | None:
+  """Procura na imagem o QR Code de uma NFC-e ou o BR Code de um PIX (fora do event loop)."""
+  payload = await asyncio.to_thread(qrcode_service.decode_qr, contents)
+  if not payload:
+    return None
+  return parse_receipt_qr(payload)
+
+def parse_receipt_qr(payload: str) -> ReceiptQR | None:
+  """Interpreta o conteúdo de um QR Code (ou de um PIX copia e cola). None se não for NFC-e nem PIX."""
+  nfce = nfce_service.parse_nfce_payload(payload)
+  if nfce is not None:
+    metrics.increment("receipts.nfce_qr_found")
+    return nfce
+  pix = pix_service.parse_brcode(payload)
+  if pix is not None:
+    metrics.increment("receipts.pix_qr_found")
+  return pix
+
+def qr_payload(qr: ReceiptQR | None) -> str | None:
+  return qr.payload if qr is not None else None
+
+def entry_from_qr(qr: ReceiptQR | None, user_id: int) -> EntryCreate | None:
+  """Lançamento direto do QR Code, sem OCR. None se não houver QR Code ou se ele não trouxer o valor."""
+  if isinstance(qr, NFCeData) and qr.total is not None:
+    metrics.increment("receipts.path.nfce_qr")
+    return entry_from_nfce(qr, user_id)
+  if isinstance(qr, PixData) and qr.amount is not None:
+    metrics.increment("receipts.path.pix_qr")
+    return entry_from_pix(qr, user_id)
+  return None
+
+def complement_with_qr(entry_data: EntryCreate, qr: ReceiptQR | None) -> EntryCreate:
+  """Lançamento do OCR completado com o que o QR Code sem valor traz."""
+  if isinstance(qr, NFCeData):
+    return complement_with_nfce(entry_data, qr)
+  if isinstance(qr, PixData):
+    return complement_with_pix(entry_data, qr)
+  return entry_data
+
+def entry_from_nfce(nfce: NFCeData, user_id: int) -> EntryCreate:
+  """Monta o lançamento direto dos dados do QR Code da NFC-e (compra = despesa)."""
+  return EntryCreate(
+    title="Lançamento via NFC-e",
+    entry_date=nfce.issue_date or date.today(),
+    description=f"NFC-e {nfce.access_key} - emitente CNPJ {nfce.formatted_cnpj}",
+    value=nfce.total,
+    entry_type_id=TipoLancamento.DESPESA,
+    category_id=Categoria.OUTROS,
+    user_id=user_id
+  )
+
+def complement_with_nfce(entry_data: EntryCreate, nfce: NFCeData) -> EntryCreate:
+  """QR Code sem valor (consulta online): o valor vem do OCR, o resto do QR Code."""
+  return entry_data.model_copy(update={
+    "title": "Lançamento via NFC-e",
+    "entry_date": nfce.issue_date or entry_data.entry_date,
+    "description": f"NFC-e {nfce.access_key} - emitente CNPJ {nfce.formatted_cnpj}",
+    "entry_type_id": TipoLancamento.DESPESA,
+  })
+
+def _pix_description(pix: PixData) -> str:
+  description = f"PIX para {pix.merchant_name}"
+  if pix.merchant_city:
+    description += f" - {pix.merchant_city}"
+  if pix.txid:
+    description += f" (txid {pix.txid})"
+  return description
+
+def entry_from_pix(pix: PixData, user_id: int) -> EntryCreate:
+  """
+  Monta o lançamento direto do BR Code do PIX: valor e recebedor exatos.
+  O BR Code é a cobrança de quem recebe; quem tem o código pagou (despesa).
+  """
+  return EntryCreate(
+    title="Lançamento via PIX",
+    entry_date=date.today(),
+    description=_pix_description(pix),
+    value=pix.amount,
+    entry_type_id=TipoLancamento.DESPESA,
+    category_id=keyword_classifier.classify(pix.message or "", pix.merchant_name).category,
+    user_id=user_id
+  )
+
+def complement_with_pix(entry_data: EntryCreate, pix: PixData) -> EntryCreate:
+  """BR Code sem valor (código estático ou cobrança dinâmica): o valor e a data vêm do OCR, o recebedor do BR Code."""
+  return entry_data.model_copy(update={
+    "title": "Lançamento via PIX",
+    "description": _pix_description(pix),
+    "entry_type_id": TipoLancamento.DESPESA,
+  })
+
+def parse_ocr_results(ocr_results: list[dict], user_id: int) -> EntryCreate:
+  """Analisa o resultado do OCR de um recibo e monta os dados do lançamento (sem salvar)."""
   if not ocr_results:
     raise ValueError("Não foi possível extrair texto do recibo. A imagem pode estar ilegível.")
 
@@ -35,35 +527,29 @@ async def process_receipt_image(db: Session, user_id: int, file: UploadFile) ->
   #print("---------------------------------")
   # ------------------------------------
 
-  # Passo 2: Analisar o texto (NLP Simples)
-  # <-- CORREÇÃO 2: Usar a variável correta 'extracted_text'
-  full_text_lower = extracted_text.lower()
-
-  # 2.1 Identificar o tipo (entrada ou saída)
-  entry_type_id = 2  # Padrão: Saída (despesa)
-  keywords_entrada = ['pix recebido', 'salário', 'depósito', 'crédito', 'recebimento']
-  # <-- CORREÇÃO 3: Corrigir erro de digitação '.lowe' e usar a variável correta
-  if any(keyword in full_text_lower for keyword in keywords_entrada):
-    entry_type_id = 1  # Entrada (receita)
-
-  # 2.2 Identificar o valor
-  match = re.search(r'(?:r\$|rs)\s*([\d.,]+)', full_text_lower)
-  if not match:
+  # Passo 2: Analisar o texto
+  # 2.1 Identificar o valor, a data e as partes pelas linhas do recibo (receipt_parser)
+  extracted = receipt_parser.parse(ocr_results)
+  if extracted.valor_total is None:
     raise ValueError("Não foi possível identificar um valor monetário no recibo.")
 
-  value_str = match.group(1).replace('.', '').replace(',', '.')
-  value = float(value_str)
+  # 2.2 Identificar o tipo (entrada ou saída) e a categoria pela tabela de palavras-chave
+  classification = keyword_classifier.classify(extracted_text, extracted.estabelecimento or extracted.destinatario)
+  entry_type_id = classification.entry_type
+
+  # Recebimento: quem enviou o dinheiro; despesa: quem recebeu (o estabelecimento, nas compras)
+  counterparty = extracted.remetente if entry_type_id == TipoLancamento.RECEITA else extracted.destinatario
+  summary = counterparty or f"{extracted_text[:100]}..."
 
   # 2.3 Montar o objeto completo
   # <-- CORREÇÃO 4: Adicionar os campos obrigatórios 'title' e 'entry_date'
   entry_data = EntryCreate(
     title="Lançamento via Recibo",
-    entry_date=date.today(),
-    description=f"Lançamento automático via recibo: {extracted_text[:100]}...",
-    value=value,
-    entry_type_id=entry_type_id
+    entry_date=extracted.data or date.today(),
+    description=f"Lançamento automático via recibo: {summary}",
+    value=extracted.valor_total,
+    entry_type_id=entry_type_id,
+    category_id=classification.category,
+    user_id=user_id
   )
-
-  # Passo 3: Salvar no banco usando a função correta do CRUD
-  created_entry = entry_crud.create_with_owner(db=db, obj_in=entry_data, user_id=user_id)
-  return created_entry
+  return entry_data
@@ -0,0 +1,97 @@
+from dataclasses import dataclass
+from fastapi import UploadFile
+
+# Leitura dos arquivos enviados pelos clientes.
+#
+# Lê o upload em blocos, para de ler assim que o limite do endpoint é
+# ultrapassado e confere o formato pelos primeiros bytes do arquivo (magic bytes),
+# sem confiar no content-type informado pelo cliente e antes de qualquer decodificação.
+
+CHUNK_SIZE = 64 * 1024
+
+# Tipos aceitos -> content-type correspondente
+IMAGE_KINDS = {
+  "jpeg": "image/jpeg",
+  "png": "image/png",
+  "webp": "image/webp",
+  "bmp": "image/bmp",
+  "tiff": "image/tiff",
+}
+
+# Recibos: imagens ou PDF (comprovantes e extratos enviados pelos bancos)
+RECEIPT_KINDS = {
+  **IMAGE_KINDS,
+  "pdf": "application/pdf",
+}
+
+class UploadTooLargeError(ValueError):
+  """O arquivo excede o limite de bytes do endpoint."""
+
+class UnsupportedFileTypeError(ValueError):
+  """O conteúdo do arquivo não corresponde a nenhum dos formatos aceitos."""
+
+@dataclass
+class UploadedFile:
+  buffer: bytearray
+  kind: str
+  content_type: str
+  filename: str | None = None
+
+  @property
+  def view(self) -> memoryview:
+    """Visão sem cópia do conteúdo, para repassar ao OCR/hash."""
+    return memoryview(self.buffer)
+
+  def __len__(self) -> int:
+    return len(self.buffer)
+
+def detect_kind(head: bytes | bytearray | memoryview) -> str | None:
+  """Identifica o formato do arquivo pelos primeiros bytes."""
+  head = bytes(head[:16])
+  if head.startswith(b"\xff\xd8\xff"):
+    return "jpeg"
+  if head.startswith(b"\x89PNG\r\n\x1a\n"):
+    return "png"
+  if head.startswith(b"RIFF") and head[8:12] == b"WEBP":
+    return "webp"
+  if head.startswith(b"BM"):
+    return "bmp"
+  if head.startswith((b"II*\x00", b"MM\x00*")):
+    return "tiff"
+  if head.startswith(b"%PDF-"):
+    return "pdf"
+  return None
+
+async def read_upload(file: UploadFile, max_bytes: int, allowed_kinds: dict[str, str] = IMAGE_KINDS) -> UploadedFile:
+  """
+  Lê o upload em blocos e devolve o conteúdo em um único buffer.
+  Lança UploadTooLargeError ao passar de max_bytes e UnsupportedFileTypeError
+  se os primeiros bytes não forem de um formato em allowed_kinds.
+  """
+  # O tamanho já é conhecido quando o multipart foi processado: recusa sem ler nada
+  if file.size is not None and file.size > max_bytes:
+    raise UploadTooLargeError(f"O arquivo excede o limite de {max_bytes // 1024} KB.")
+
+  buffer = bytearray()
+  kind = None
+
+  while True:
+    chunk = await file.read(CHUNK_SIZE)
+    if not chunk:
+      break
+
+    buffer += chunk
+    if len(buffer) > max_bytes:
+      raise UploadTooLargeError(f"O arquivo excede o limite de {max_bytes // 1024} KB.")
+
+    if kind is None and len(buffer) >= 16:
+      kind = detect_kind(buffer)
+      if kind not in allowed_kinds:
+        raise UnsupportedFileTypeError("O conteúdo enviado não é de um formato aceito.")
+
+  if kind is None:
+    kind = detect_kind(buffer)
+    if kind not in allowed_kinds:
+      raise UnsupportedFileTypeError("O conteúdo enviado não é de um formato aceito.")
+
+  return UploadedFile(buffer=buffer, kind=kind, content_type=allowed_kinds[kind], filename=file.filename)
@@ -0,0 +1,70 @@
+import threading
+from collections import defaultdict
+
+# Métricas simples em memória (por processo), expostas em GET /metrics.
+# Contadores só crescem; gauges guardam o último valor informado; timings
+# acumulam quantidade, soma e máximo de durações em milissegundos.
+
+_lock = threading.Lock()
+_counters: dict[str, float] = defaultdict(float)
+_gauges: dict[str, float] = {}
+_timings: dict[str, dict[str, float]] = {}
+
+def increment(name: str, value: float = 1) -> None:
+  with _lock:
+    _counters[name] += value
+
+def set_gauge(name: str, value: float) -> None:
+  with _lock:
+    _gauges[name] = value
+
+def observe_ms(name: str, duration_ms: float) -> None:
+  with _lock:
+    timing = _timings.get(name)
+    if timing is None:
+      timing = _timings[name] = {"count": 0, "total_ms": 0.0, "max_ms": 0.0}
+    timing["count"] += 1
+    timing["total_ms"] += duration_ms
+    timing["max_ms"] = max(timing["max_ms"], duration_ms)
+
+def drain() -> dict:
+  """
+  Entrega e zera as métricas do processo. Usado nos processos do pool de OCR: o que
+  eles registram volta junto com o resultado e é somado no processo da API (merge).
+  """
+  with _lock:
+    drained = {
+      "counters": dict(_counters),
+      "gauges": dict(_gauges),
+      "timings": {name: dict(timing) for name, timing in _timings.items()},
+    }
+    _counters.clear()
+    _gauges.clear()
+    _timings.clear()
+  return drained
+
+def merge(drained: dict) -> None:
+  """Soma neste processo as métricas entregues por drain() em outro processo."""
+  with _lock:
+    for name, value in drained["counters"].items():
+      _counters[name] += value
+    _gauges.update(drained["gauges"])
+    for name, other in drained["timings"].items():
+      timing = _timings.get(name)
+      if timing is None:
+        timing = _timings[name] = {"count": 0, "total_ms": 0.0, "max_ms": 0.0}
+      timing["count"] += other["count"]
+      timing["total_ms"] += other["total_ms"]
+      timing["max_ms"] = max(timing["max_ms"], other["max_ms"])
+
+def snapshot() -> dict:
+  """Cópia consistente de todas as métricas do processo."""
+  with _lock:
+    return {
+      "counters": dict(_counters),
+      "gauges": dict(_gauges),
+      "timings": {
+        name: {**timing, "avg_ms": timing["total_ms"] / timing["count"] if timing["count"] else 0.0}
+        for name, timing in _timings.items()
+      },
+    }
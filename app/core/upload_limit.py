@@ -0,0 +1,70 @@
+import re
+from fastapi import HTTPException, status
+from app.core.config import settings
+from app.utils.responses import error_response
+
+# Limite de tamanho do corpo das rotas de upload, aplicado antes do FastAPI
+# processar o multipart. Sem isso o Starlette grava o upload inteiro em disco/memória
+# antes do handler rodar, por maior que ele seja.
+
+# Folga para os cabeçalhos do multipart e campos de formulário
+_MULTIPART_OVERHEAD = 64 * 1024
+
+def _limits() -> list[tuple[re.Pattern, int]]:
+  prefix = re.escape(settings.API_V1_STR)
+  image = settings.UPLOAD_MAX_IMAGE_BYTES
+  batch = settings.UPLOAD_MAX_IMAGE_BYTES * settings.OCR_BATCH_MAX_FILES
+  return [
+    (re.compile(rf"^{prefix}/ocr/?$"), image),
+    (re.compile(rf"^{prefix}/ocr/batch/?$"), batch),
+    (re.compile(rf"^{prefix}/receipts/upload/?$"), image),
+    (re.compile(rf"^{prefix}/receipts/upload/batch/?$"), batch),
+    (re.compile(rf"^{prefix}/receipts/jobs/?$"), image),
+    (re.compile(rf"^{prefix}/users/[^/]+/profile_image/?$"), settings.UPLOAD_MAX_PROFILE_IMAGE_BYTES),
+  ]
+
+class UploadSizeLimitMiddleware:
+  def __init__(self, app):
+    self.app = app
+    self.limits = _limits()
+
+  def _limit_for(self, path: str) -> int | None:
+    for pattern, limit in self.limits:
+      if pattern.match(path):
+        return limit + _MULTIPART_OVERHEAD
+    return None
+
+  async def __call__(self, scope, receive, send):
+    if scope["type"] != "http" or scope["method"] not in ("POST", "PUT", "PATCH"):
+      return await self.app(scope, receive, send)
+
+    limit = self._limit_for(scope["path"])
+    if limit is None:
+      return await self.app(scope, receive, send)
+
+    # Content-Length informado: recusa antes de ler qualquer byte do corpo
+    for name, value in scope["headers"]:
+      if name == b"content-length" and value.isdigit() and int(value) > limit:
+        response = error_response(
+          error="Payload too large",
+          message=f"O envio excede o limite de {limit // 1024} KB.",
+          status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        )
+        return await response(scope, receive, send)
+
+    # Sem Content-Length (chunked): conta os bytes conforme chegam
+    received = 0
+
+    async def limited_receive():
+      nonlocal received
+      message = await receive()
+      if message["type"] == "http.request":
+        received += len(message.get("body", b""))
+        if received > limit:
+          raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"O envio excede o limite de {limit // 1024} KB."
+          )
+      return message
+
+    return await self.app(scope, limited_receive, send)
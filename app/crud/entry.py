@@ -1,4 +1,4 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from datetime import date
 from typing import Optional, List
 from sqlalchemy import func
@@ -11,6 +11,17 @@ class CRUDEntry:
   def get(self, db: Session, id: int) -> Optional[Entry]:
     return db.get(Entry, id)
 
+  def get_by_ids(self, db: Session, ids: List[int]) -> List[Entry]:
+    """Vários lançamentos em uma única consulta, já com tipo, categoria e usuário (para o EntryOut)."""
+    if not ids:
+      return []
+    return (
+      db.query(Entry)
+      .options(joinedload(Entry.entry_type), joinedload(Entry.category), joinedload(Entry.user))
+      .filter(Entry.id.in_(ids))
+      .all()
+    )
+
   def get_many(
     self,
     db: Session,
@@ -84,9 +95,10 @@ class CRUDEntry:
     db.refresh(db_obj)
     return db_obj
 
-  def create_with_owner(self, db: Session, obj_in: EntryCreate, user_id: int) -> Entry:
+  def create_with_owner(self, db: Session, obj_in: EntryCreate, user_id: int, commit: bool = True) -> Entry:
     """
     Cria um novo lançamento garantindo que o usuário seja o dono. (Nosso padrão)
+    commit=False só faz o flush: quem chamou confirma a transação.
     """
     # Garantindo que o user_id passado na função sobrescreva qualquer valor que venha no schema.
     data_dict = obj_in.model_dump(exclude={'user_id'})
@@ -96,6 +108,9 @@ class CRUDEntry:
       user_id=user_id
     )
     db.add(db_obj)
+    if not commit:
+      db.flush()
+      return db_obj
     db.commit()
     db.refresh(db_obj)
     return db_obj
@@ -38,13 +38,17 @@ class CRUDNotification:
 
     return query.all()
 
-  def create(self, db: Session, obj_in: NotificationCreate) -> Notification:
+  def create(self, db: Session, obj_in: NotificationCreate, commit: bool = True) -> Notification:
+    """commit=False só faz o flush: quem chamou confirma a transação."""
     db_obj = Notification(
       title=obj_in.title,
       message=obj_in.message,
       user_id=obj_in.user_id,
     )
     db.add(db_obj)
+    if not commit:
+      db.flush()
+      return db_obj
     db.commit()
     db.refresh(db_obj)
     return db_obj
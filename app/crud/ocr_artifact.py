@@ -0,0 +1,40 @@
+from sqlalchemy.orm import Session
+from app.models.ocr_artifact import OCRArtifact
+
+class CRUDOCRArtifact:
+  def get_by_entry(self, db: Session, entry_id: int) -> OCRArtifact | None:
+    return db.query(OCRArtifact).filter(OCRArtifact.entry_id == entry_id).first()
+
+  def create(
+    self,
+    db: Session,
+    entry_id: int,
+    user_id: int,
+    image_sha256: str | None,
+    profile: str | None,
+    results: bytes,
+    parser_version: int,
+    parsed: dict,
+    qr_payload: str | None = None,
+    commit: bool = True,
+  ) -> OCRArtifact:
+    """commit=False só faz o flush: quem chamou confirma a transação."""
+    db_obj = OCRArtifact(
+      entry_id=entry_id,
+      user_id=user_id,
+      image_sha256=image_sha256,
+      profile=profile,
+      results=results,
+      qr_payload=qr_payload,
+      parser_version=parser_version,
+      parsed=parsed,
+    )
+    db.add(db_obj)
+    if not commit:
+      db.flush()
+      return db_obj
+    db.commit()
+    db.refresh(db_obj)
+    return db_obj
+
+ocr_artifact = CRUDOCRArtifact()
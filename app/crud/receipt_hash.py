@@ -0,0 +1,25 @@
+from sqlalchemy.orm import Session
+from app.models.receipt_hash import ReceiptHash
+
+class CRUDReceiptHash:
+  def get_since(self, db: Session, user_id: int, after_id: int = 0) -> list[tuple[int, str, str, int]]:
+    """(id, image_hash, image_sha256, entry_id) dos hashes do usuário com id maior que after_id, em ordem."""
+    return (
+      db.query(ReceiptHash.id, ReceiptHash.image_hash, ReceiptHash.image_sha256, ReceiptHash.entry_id)
+      .filter(ReceiptHash.user_id == user_id, ReceiptHash.id > after_id)
+      .order_by(ReceiptHash.id)
+      .all()
+    )
+
+  def create(self, db: Session, user_id: int, entry_id: int, image_hash: str, image_sha256: str, commit: bool = True) -> ReceiptHash:
+    """commit=False só faz o flush: quem chamou confirma a transação."""
+    db_obj = ReceiptHash(user_id=user_id, entry_id=entry_id, image_hash=image_hash, image_sha256=image_sha256)
+    db.add(db_obj)
+    if not commit:
+      db.flush()
+      return db_obj
+    db.commit()
+    db.refresh(db_obj)
+    return db_obj
+
+receipt_hash = CRUDReceiptHash()
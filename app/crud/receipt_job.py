@@ -0,0 +1,101 @@
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+import uuid
+from app.models.receipt_job import ReceiptJob
+from app.utils.enum import StatusProcessamento, EtapaProcessamento
+
+class CRUDReceiptJob:
+  def get(self, db: Session, id: str) -> ReceiptJob | None:
+    return db.get(ReceiptJob, id)
+
+  def get_by_owner(self, db: Session, id: str, user_id: int) -> ReceiptJob | None:
+    return db.query(ReceiptJob).filter(ReceiptJob.id == id, ReceiptJob.user_id == user_id).first()
+
+  def create(self, db: Session, user_id: int, file_content: bytes, file_name: str | None) -> ReceiptJob:
+    db_obj = ReceiptJob(
+      id=str(uuid.uuid4()),
+      user_id=user_id,
+      status=StatusProcessamento.NA_FILA,
+      stage=EtapaProcessamento.RECEBIDO,
+      file_content=file_content,
+      file_name=file_name,
+    )
+    db.add(db_obj)
+    db.commit()
+    db.refresh(db_obj)
+    return db_obj
+
+  def claim_next(self, db: Session) -> ReceiptJob | None:
+    """
+    Pega o job mais antigo da fila e o marca como em processamento.
+    SKIP LOCKED permite que vários processos da API consumam a mesma fila
+    sem pegar o mesmo job.
+    """
+    job = (
+      db.query(ReceiptJob)
+      .filter(ReceiptJob.status == StatusProcessamento.NA_FILA)
+      .order_by(ReceiptJob.created_at)
+      .with_for_update(skip_locked=True)
+      .first()
+    )
+    if job is None:
+      db.rollback()
+      return None
+
+    job.status = StatusProcessamento.PROCESSANDO
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+  def update_stage(self, db: Session, db_obj: ReceiptJob, stage: str) -> ReceiptJob:
+    db_obj.stage = stage
+    db.add(db_obj)
+    db.commit()
+    db.refresh(db_obj)
+    return db_obj
+
+  def requeue(self, db: Session, db_obj: ReceiptJob) -> ReceiptJob:
+    db_obj.status = StatusProcessamento.NA_FILA
+    db.add(db_obj)
+    db.commit()
+    db.refresh(db_obj)
+    return db_obj
+
+  def finish(self, db: Session, db_obj: ReceiptJob, entry_id: int, commit: bool = True) -> ReceiptJob:
+    """commit=False só faz o flush: quem chamou confirma a transação (junto com o lançamento)."""
+    db_obj.status = StatusProcessamento.CONCLUIDO
+    db_obj.stage = EtapaProcessamento.LANCAMENTO_CRIADO
+    db_obj.entry_id = entry_id
+    db_obj.file_content = None
+    db.add(db_obj)
+    if not commit:
+      db.flush()
+      return db_obj
+    db.commit()
+    db.refresh(db_obj)
+    return db_obj
+
+  def fail(self, db: Session, db_obj: ReceiptJob, error: str) -> ReceiptJob:
+    db_obj.status = StatusProcessamento.FALHOU
+    db_obj.error = error[:500]
+    db_obj.file_content = None
+    db.add(db_obj)
+    db.commit()
+    db.refresh(db_obj)
+    return db_obj
+
+  def requeue_stale(self, db: Session, older_than: timedelta) -> int:
+    """Devolve à fila jobs presos em processamento (ex.: o processo caiu no meio)."""
+    count = (
+      db.query(ReceiptJob)
+      .filter(
+        ReceiptJob.status == StatusProcessamento.PROCESSANDO,
+        ReceiptJob.updated_at < datetime.now() - older_than,
+      )
+      .update({ReceiptJob.status: StatusProcessamento.NA_FILA}, synchronize_session=False)
+    )
+    db.commit()
+    return count
+
+receipt_job = CRUDReceiptJob()
@@ -3,4 +3,4 @@ from sqlalchemy.orm import DeclarativeBase
 class Base(DeclarativeBase):
   pass
 
-from app.models import user, goal, entry, category, entry_type, notification, user_auth
+from app.models import user, goal, entry, category, entry_type, notification, user_auth, receipt_job, receipt_hash, ocr_artifact
@@ -9,7 +9,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..',
 
 from app.core.config import settings
 from app.db.base import Base
-from app.models import entry, user, entry_type, category, goal, notification, user_auth  # importe todos os modelos
+from app.models import entry, user, entry_type, category, goal, notification, user_auth, receipt_job, receipt_hash, ocr_artifact  # importe todos os modelos
 
 config = context.config
 
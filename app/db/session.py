@@ -2,5 +2,21 @@ from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
 
-engine = create_engine(settings.SQLALCHEMY_DATABASE_URI, pool_pre_ping=True)
+engine = create_engine(
+  settings.SQLALCHEMY_DATABASE_URI,
+  pool_pre_ping=True,
+  pool_size=settings.DB_POOL_SIZE,
+  max_overflow=settings.DB_MAX_OVERFLOW,
+  pool_timeout=settings.DB_POOL_TIMEOUT,
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def pool_status() -> dict:
+  """Ocupação do pool de conexões deste processo (exposta em GET /metrics)."""
+  pool = engine.pool
+  return {
+    "size": pool.size(),
+    "checked_out": pool.checkedout(),
+    "checked_in": pool.checkedin(),
+    "overflow": pool.overflow(),
+  }
@@ -1,11 +1,45 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.responses import RedirectResponse
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
+from app.core.upload_limit import UploadSizeLimitMiddleware
 from app.api.routers import users, health, auth, images, entry_type, entry, category, goal, notification, receipts, analysis, chat
+from app.api.services import ocr_pool, ocr_models, ocr_service, receipt_job_service
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+  # Pacote de modelos do OCR conferido antes de aceitar pedidos: se estiver ausente
+  # ou corrompido a API não sobe, em vez de falhar no primeiro OCR
+  if settings.OCR_MODEL_DIR and settings.OCR_MODE == "local":
+    await asyncio.to_thread(ocr_models.verify, settings.OCR_MODEL_DIR, ocr_service.LANGUAGES)
+
+  # Sobe os processos de OCR junto com a API e os encerra no shutdown
+  ocr_pool.start()
+  warmup_task = None
+  if settings.OCR_WARMUP_ON_STARTUP:
+    # Em segundo plano: a API responde (health, CRUD) enquanto o modelo carrega
+    warmup_task = asyncio.create_task(ocr_pool.warmup())
+
+  # Workers da fila de recibos assíncronos (tabela receipt_jobs)
+  stop_jobs = asyncio.Event()
+  job_workers = []
+  if settings.RECEIPT_JOBS_WORKER_ENABLED:
+    job_workers = await receipt_job_service.start_workers(stop_jobs)
+
+  yield
+
+  stop_jobs.set()
+  for task in job_workers:
+    task.cancel()
+  if warmup_task is not None:
+    warmup_task.cancel()
+  ocr_pool.shutdown()
 
 app = FastAPI(
   title=settings.PROJECT_NAME,
+  lifespan=lifespan,
   openapi_url=f"{settings.API_V1_STR}/openapi.json",
   docs_url="/docs", # Swagger UI
   redoc_url="/redoc", # ReDoc
@@ -18,6 +52,10 @@ from app.core.logger_config import logger
 async def root():
   return RedirectResponse(url="/docs")
 
+# Recusa uploads grandes demais antes de o multipart ser lido
+# (registrado antes do CORS para que a resposta 413 também leve os cabeçalhos de CORS)
+app.add_middleware(UploadSizeLimitMiddleware)
+
 app.add_middleware(
   CORSMiddleware,
   allow_origins=settings.BACKEND_CORS_ORIGINS,
@@ -0,0 +1,25 @@
+from app.db.base import Base
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import ForeignKey, DateTime, String, Text, JSON
+from sqlalchemy.dialects.mysql import MEDIUMBLOB
+from datetime import datetime
+
+class OCRArtifact(Base):
+  __tablename__ = "ocr_artifacts"
+
+  id: Mapped[int] = mapped_column(primary_key=True)
+  entry_id: Mapped[int] = mapped_column(ForeignKey("entries.id", ondelete="CASCADE"), nullable=False, unique=True)
+  user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False, index=True)
+  # SHA-256 dos bytes da imagem enviada (vazio nos recibos enviados já como texto)
+  image_sha256: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
+  # Perfil de OCR que produziu os resultados
+  profile: Mapped[str | None] = mapped_column(String(20), nullable=True)
+  # Saída do OCR (texto, confiança e caixas) em ocr_protocol.encode_results, comprimida com zlib
+  results: Mapped[bytes] = mapped_column(MEDIUMBLOB, nullable=False)
+  # QR Code (NFC-e ou PIX) que completou a análise do OCR: o reparse o aplica de novo
+  qr_payload: Mapped[str | None] = mapped_column(Text, nullable=True)
+  # Versão do receipt_parser e campos do lançamento na última análise (para o reparse)
+  parser_version: Mapped[int] = mapped_column(nullable=False, index=True)
+  parsed: Mapped[dict] = mapped_column(JSON, nullable=False)
+  created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.now)
+  updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.now, onupdate=datetime.now)
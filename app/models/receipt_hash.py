@@ -0,0 +1,17 @@
+from app.db.base import Base
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import ForeignKey, DateTime, String
+from datetime import datetime
+
+class ReceiptHash(Base):
+  __tablename__ = "receipt_hashes"
+
+  id: Mapped[int] = mapped_column(primary_key=True)
+  user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False, index=True)
+  # Lançamento criado a partir do recibo; o hash some junto com ele
+  entry_id: Mapped[int] = mapped_column(ForeignKey("entries.id", ondelete="CASCADE"), nullable=False, index=True)
+  # Hash perceptual (pHash de 256 bits, em hexadecimal) da imagem do recibo
+  image_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+  # SHA-256 do arquivo, para a checagem exata dos hashes parecidos
+  image_sha256: Mapped[str] = mapped_column(String(64), nullable=False)
+  created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.now)
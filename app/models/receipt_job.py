@@ -0,0 +1,22 @@
+from app.db.base import Base
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy import ForeignKey, DateTime, String
+from sqlalchemy.dialects.mysql import MEDIUMBLOB
+from datetime import datetime
+
+class ReceiptJob(Base):
+  __tablename__ = "receipt_jobs"
+
+  id: Mapped[str] = mapped_column(String(36), primary_key=True)
+  user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False, index=True)
+  status: Mapped[str] = mapped_column(String(20), nullable=False, index=True)
+  stage: Mapped[str] = mapped_column(String(30), nullable=False)
+  error: Mapped[str | None] = mapped_column(String(500), nullable=True)
+  entry_id: Mapped[int | None] = mapped_column(ForeignKey("entries.id"), nullable=True)
+  # Arquivo enviado; apagado quando o processamento termina
+  file_content: Mapped[bytes | None] = mapped_column(MEDIUMBLOB, nullable=True)
+  file_name: Mapped[str | None] = mapped_column(String(255), nullable=True)
+  created_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.now, index=True)
+  updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, default=datetime.now, onupdate=datetime.now)
+
+  entry: Mapped["Entry"] = relationship()
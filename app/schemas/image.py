@@ -1,9 +1,12 @@
 from pydantic import BaseModel
+from datetime import date
 
 class ExtractedData(BaseModel):
   valor_total: float | None = None
   remetente: str | None = None
   destinatario: str | None = None
+  estabelecimento: str | None = None
+  data: date | None = None
 
 class BoundingBox(BaseModel):
   x_min: int
@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from app.schemas.image import ExtractedData
 
 # Define a estrutura da caixa delimitadora de cada texto detectado
 class BoundingBox(BaseModel):
@@ -16,3 +17,16 @@ class OCRItem(BaseModel):
 # Define a estrutura final da resposta da API de OCR
 class OCRResponse(BaseModel):
   data: list[OCRItem]
+  # Valor total, data, estabelecimento e partes encontrados no texto (receipt_parser)
+  extracted_data: ExtractedData | None = None
+
+# Resultado de uma imagem no endpoint em lote
+class OCRBatchItem(BaseModel):
+  filename: str | None = None
+  success: bool
+  data: list[OCRItem] | None = None
+  error: str | None = None
+
+# Define a estrutura da resposta do endpoint de OCR em lote
+class OCRBatchResponse(BaseModel):
+  items: list[OCRBatchItem]
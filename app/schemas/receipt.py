@@ -0,0 +1,38 @@
+from pydantic import BaseModel, Field, model_validator
+from app.schemas.entry import EntryOut
+from app.schemas.ocr import OCRItem
+
+# Limites do recibo enviado já como texto (POST /receipts/text)
+MAX_TEXT_LINES = 1000
+MAX_LINE_LENGTH = 500
+
+# Recibo lido pelo OCR do próprio aparelho: só as linhas de texto ou os itens completos (com caixas).
+# Um QR Code com o valor (NFC-e ou PIX) dispensa as linhas.
+class ReceiptTextRequest(BaseModel):
+  lines: list[str] | None = Field(default=None, max_length=MAX_TEXT_LINES)
+  items: list[OCRItem] | None = Field(default=None, max_length=MAX_TEXT_LINES)
+  # Conteúdo do QR Code lido pelo aparelho (URL da NFC-e, BR Code do PIX) ou o PIX copia e cola
+  qr_code: str | None = Field(default=None, max_length=2000)
+
+  @model_validator(mode="after")
+  def check_content(self):
+    if self.lines and self.items:
+      raise ValueError("Envie as linhas do recibo em 'lines' ou em 'items' (apenas um dos dois).")
+    if not (self.lines or self.items or self.qr_code):
+      raise ValueError("Envie as linhas do recibo ('lines' ou 'items') ou o código do QR Code ('qr_code').")
+    texts = self.lines or [item.text for item in self.items or []]
+    if any(len(text) > MAX_LINE_LENGTH for text in texts):
+      raise ValueError(f"Cada linha pode ter no máximo {MAX_LINE_LENGTH} caracteres.")
+    return self
+
+# Resultado de um recibo no upload em lote
+class ReceiptBatchItem(BaseModel):
+  filename: str | None = None
+  success: bool
+  data: EntryOut | None = None
+  error: str | None = None
+  # Lançamento já existente quando o recibo foi recusado por ser repetido
+  duplicate_of: int | None = None
+
+class ReceiptBatchResponse(BaseModel):
+  items: list[ReceiptBatchItem]
@@ -0,0 +1,31 @@
+from datetime import datetime
+from pydantic import BaseModel
+from app.schemas.entry import EntryOut
+
+class ReceiptJobOut(BaseModel):
+  id: str
+  status: str
+  stage: str
+  error: str | None = None
+  entry_id: int | None = None
+  entry: EntryOut | None = None
+  file_name: str | None = None
+  created_at: datetime | None = None
+  updated_at: datetime | None = None
+
+  class Config:
+    from_attributes = True
+
+  @classmethod
+  def from_orm(cls, obj):
+    return cls.model_validate({
+      "id": obj.id,
+      "status": obj.status,
+      "stage": obj.stage,
+      "error": obj.error,
+      "entry_id": obj.entry_id,
+      "entry": EntryOut.from_orm(obj.entry) if obj.entry else None,
+      "file_name": obj.file_name,
+      "created_at": obj.created_at,
+      "updated_at": obj.updated_at,
+    })
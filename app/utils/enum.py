@@ -1,4 +1,4 @@
-from enum import IntEnum
+from enum import IntEnum, StrEnum
 
 class TipoLancamento(IntEnum):
   RECEITA = 1
@@ -13,3 +13,29 @@ class Categoria(IntEnum):
   CASA = 6
   ROUPAS = 7
   OUTROS = 8
+
+class StatusProcessamento(StrEnum):
+  NA_FILA = "queued"
+  PROCESSANDO = "processing"
+  CONCLUIDO = "done"
+  FALHOU = "failed"
+
+class EtapaProcessamento(StrEnum):
+  RECEBIDO = "received"
+  DECODIFICADO = "decoded"
+  OCR_CONCLUIDO = "ocr_done"
+  ANALISADO = "parsed"
+  LANCAMENTO_CRIADO = "entry_created"
+
+class PerfilOCR(StrEnum):
+  FAST = "fast"
+  BALANCED = "balanced"
+  ACCURATE = "accurate"
+
+class IntencaoChat(StrEnum):
+  RESUMO_MENSAL = "resumo_mensal"
+  RESUMO_ANUAL = "resumo_anual"
+  CONSULTA_DESPESAS = "consulta_despesas"
+  CONSULTA_RECEITAS = "consulta_receitas"
+  CONSULTA_COFRINHO = "consulta_cofrinho"
+  PERGUNTA_GERAL = "pergunta_geral"
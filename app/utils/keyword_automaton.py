@@ -0,0 +1,74 @@
+from collections import deque
+from typing import Generic, Iterator, TypeVar
+
+T = TypeVar("T")
+
+class KeywordAutomaton(Generic[T]):
+  """
+  Autômato de Aho-Corasick: encontra todas as ocorrências de milhares de frases
+  em uma única passada pelo texto, com custo proporcional ao tamanho do texto
+  (e não à quantidade de frases).
+
+  Cada frase carrega um valor (payload) devolvido junto com a ocorrência. As frases
+  só casam como palavras inteiras: "mercado" não casa dentro de "supermercados".
+  O texto e as frases devem chegar já normalizados (minúsculas, sem acentos).
+  """
+
+  def __init__(self, phrases: list[tuple[str, T]]):
+    # Estado 0 = raiz; transições, link de falha e saídas (índices das frases) por estado
+    self._goto: list[dict[str, int]] = [{}]
+    self._fail: list[int] = [0]
+    self._output: list[list[int]] = [[]]
+    self._phrases: list[tuple[str, T]] = []
+
+    for phrase, payload in phrases:
+      phrase = " ".join(phrase.split())
+      if not phrase:
+        continue
+      state = 0
+      for ch in phrase:
+        next_state = self._goto[state].get(ch)
+        if next_state is None:
+          next_state = len(self._goto)
+          self._goto[state][ch] = next_state
+          self._goto.append({})
+          self._fail.append(0)
+          self._output.append([])
+        state = next_state
+      self._output[state].append(len(self._phrases))
+      self._phrases.append((phrase, payload))
+
+    # Links de falha em largura: o maior sufixo próprio que também é prefixo de alguma frase
+    # (os filhos da raiz já nascem com falha para a raiz)
+    queue = deque(self._goto[0].values())
+    while queue:
+      state = queue.popleft()
+      for ch, next_state in self._goto[state].items():
+        queue.append(next_state)
+        fallback = self._fail[state]
+        while fallback and ch not in self._goto[fallback]:
+          fallback = self._fail[fallback]
+        self._fail[next_state] = self._goto[fallback].get(ch, 0)
+        self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+  def __len__(self) -> int:
+    return len(self._phrases)
+
+  def finditer(self, text: str) -> Iterator[tuple[int, str, T]]:
+    """Gera (posição inicial, frase, payload) de cada ocorrência de palavra inteira."""
+    goto, fail, output, phrases = self._goto, self._fail, self._output, self._phrases
+    state = 0
+    for end, ch in enumerate(text):
+      while state and ch not in goto[state]:
+        state = fail[state]
+      state = goto[state].get(ch, 0)
+      if not output[state]:
+        continue
+      after = text[end + 1] if end + 1 < len(text) else " "
+      if after.isalnum():
+        continue
+      for index in output[state]:
+        phrase, payload = phrases[index]
+        start = end - len(phrase) + 1
+        if start == 0 or not text[start - 1].isalnum():
+          yield start, phrase, payload
@@ -18,8 +18,8 @@ def success_response(data=None, message: str = "Success", status_code: int = sta
     content=ResponseModel(success=True, data=data, message=message).model_dump()
   )
 
-def error_response(error: str, message: str = "Error", status_code: int = status.HTTP_400_BAD_REQUEST):
+def error_response(error: str, message: str = "Error", status_code: int = status.HTTP_400_BAD_REQUEST, data=None):
   return JSONResponse(
     status_code=status_code,
-    content=ResponseModel(success=False, error=error, message=message).model_dump()
+    content=ResponseModel(success=False, data=data, error=error, message=message).model_dump()
   )
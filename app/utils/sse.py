@@ -0,0 +1,9 @@
+import json
+
+def format_sse(event: str, data) -> str:
+  """
+  Formata um evento no padrão Server-Sent Events (text/event-stream).
+  O payload é sempre serializado em JSON, numa única linha.
+  """
+  payload = json.dumps(data, ensure_ascii=False, default=str)
+  return f"event: {event}\ndata: {payload}\n\n"
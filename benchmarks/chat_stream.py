@@ -0,0 +1,109 @@
+"""
+Tempo até o primeiro byte do chat: POST /chat/ask (resposta inteira) contra
+POST /chat/ask/stream (Server-Sent Events), contra uma API rodando.
+
+Cada pergunta é enviada --repeat vezes a cada endpoint, alternando entre eles. No
+streaming, mede também o tempo até o evento "intent" e até o primeiro "token", e guarda
+os tempos informados pelo próprio servidor no evento "done".
+
+Uso:
+  python -m benchmarks.chat_stream --token <JWT> --repeat 5 --output chat.json
+  python -m benchmarks.chat_stream --token <JWT> --question "resumo de julho" --question "dicas para economizar"
+"""
+import argparse
+import asyncio
+import json
+import time
+from pathlib import Path
+import httpx
+from benchmarks.ocr_throughput import latency_summary, _git_revision
+
+DEFAULT_QUESTIONS = [
+  "resumo de julho",
+  "quanto gastei este mês",
+  "dicas para economizar no mercado",
+]
+
+async def _ask(client: httpx.AsyncClient, question: str) -> dict:
+  started = time.perf_counter()
+  async with client.stream("POST", "/chat/ask", json={"question": question}) as response:
+    first_byte_ms = None
+    async for _ in response.aiter_bytes():
+      if first_byte_ms is None:
+        first_byte_ms = (time.perf_counter() - started) * 1000
+  return {"status": response.status_code, "first_byte_ms": first_byte_ms, "total_ms": (time.perf_counter() - started) * 1000}
+
+async def _ask_stream(client: httpx.AsyncClient, question: str) -> dict:
+  started = time.perf_counter()
+  result = {"first_byte_ms": None, "intent_ms": None, "first_token_ms": None, "server": None}
+  async with client.stream("POST", "/chat/ask/stream", json={"question": question}) as response:
+    result["status"] = response.status_code
+    event = None
+    async for line in response.aiter_lines():
+      elapsed_ms = (time.perf_counter() - started) * 1000
+      if result["first_byte_ms"] is None:
+        result["first_byte_ms"] = elapsed_ms
+      if line.startswith("event: "):
+        event = line[len("event: "):]
+      elif line.startswith("data: "):
+        if event == "intent" and result["intent_ms"] is None:
+          result["intent_ms"] = elapsed_ms
+        elif event == "token" and result["first_token_ms"] is None:
+          result["first_token_ms"] = elapsed_ms
+        elif event == "done":
+          result["server"] = json.loads(line[len("data: "):])
+  result["total_ms"] = (time.perf_counter() - started) * 1000
+  return result
+
+def _summary(samples: list[dict], field: str) -> dict | None:
+  values = [sample[field] for sample in samples if sample.get(field) is not None]
+  return latency_summary(values) if values else None
+
+async def run(args: argparse.Namespace) -> dict:
+  headers = {"Authorization": f"Bearer {args.token}"}
+  questions = args.question or DEFAULT_QUESTIONS
+  ask, stream = [], []
+
+  async with httpx.AsyncClient(base_url=args.base_url, headers=headers, timeout=args.timeout) as client:
+    for _ in range(args.repeat):
+      for question in questions:
+        ask.append(await _ask(client, question))
+        stream.append(await _ask_stream(client, question))
+
+  return {
+    "revision": _git_revision(),
+    "questions": questions,
+    "repeat": args.repeat,
+    "ask": {
+      "first_byte": _summary(ask, "first_byte_ms"),
+      "total": _summary(ask, "total_ms"),
+    },
+    "ask_stream": {
+      "first_byte": _summary(stream, "first_byte_ms"),
+      "intent_event": _summary(stream, "intent_ms"),
+      "first_token": _summary(stream, "first_token_ms"),
+      "total": _summary(stream, "total_ms"),
+      "llm_calls": sum((sample["server"] or {}).get("llm_calls", 0) for sample in stream),
+    },
+  }
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--base-url", default="http://localhost:8000/api/v1")
+  parser.add_argument("--token", required=True, help="JWT de um usuário de teste")
+  parser.add_argument("--question", action="append", help="Pergunta a enviar (repita para várias; padrão: um conjunto fixo)")
+  parser.add_argument("--repeat", type=int, default=3, help="Vezes que cada pergunta é enviada a cada endpoint")
+  parser.add_argument("--timeout", type=float, default=60.0, help="Timeout de cada requisição, em segundos")
+  parser.add_argument("--output", type=Path, help="Arquivo JSON de saída (padrão: stdout)")
+  args = parser.parse_args()
+
+  report = asyncio.run(run(args))
+  output = json.dumps(report, indent=2, ensure_ascii=False)
+
+  if args.output:
+    args.output.write_text(output, encoding="utf-8")
+  else:
+    print(output)
+
+if __name__ == "__main__":
+  main()
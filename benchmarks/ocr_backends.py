@@ -0,0 +1,147 @@
+"""
+Paridade e latência dos backends de inferência do OCR: torch x ONNX Runtime (FP32/INT8).
+
+Roda o mesmo corpus sintético (benchmarks.synthetic) em cada backend, com o
+mesmo pré-processamento e os mesmos parâmetros de perfil, e compara a saída de
+cada backend ONNX com a do torch de mesma precisão (ONNX FP32 x torch FP32,
+ONNX INT8 x torch com a quantização do EasyOCR, o padrão em produção):
+- semelhança do texto extraído (difflib, 1.0 = idêntico) e fração de imagens idênticas;
+- IoU médio das caixas pareadas e diferença média de confiança;
+- concordância do valor extraído pelo receipt_service.
+
+Sai com código 1 se algum backend ficar abaixo de --min-similarity. A paridade
+FP32 também roda no pytest (tests/test_ocr_backends.py); aqui ficam a latência e
+a comparação dos modelos INT8, que não dão a mesma saída bit a bit.
+
+Uso:
+  python -m app.api.services.ocr_onnx export --quantize
+  python -m benchmarks.ocr_backends --output backends.json
+"""
+import argparse
+import json
+import sys
+import time
+from difflib import SequenceMatcher
+from pathlib import Path
+from app.core.config import settings
+from app.api.services import ocr_service
+from app.api.services.ocr_preprocess import preprocess
+from app.api.services.ocr_profiles import get_profile
+from benchmarks.ocr_throughput import latency_summary, _extracted_value, _git_revision
+from benchmarks.synthetic import SyntheticReceipt, add_corpus_arguments, corpus_from_arguments
+
+# (backend, quantizado)
+BACKENDS = {
+  "torch": ("torch", True),
+  "torch_fp32": ("torch", False),
+  "onnx": ("onnx", False),
+  "onnx_int8": ("onnx", True),
+}
+# Referência de cada backend ONNX: o torch de mesma precisão
+REFERENCES = {"onnx": "torch_fp32", "onnx_int8": "torch"}
+
+def run_backend(reader, corpus: list[SyntheticReceipt], profile: str | None) -> tuple[list[list[dict]], list[float]]:
+  ocr_profile = get_profile(profile)
+  options = ocr_profile.preprocess_options()
+  readtext_kwargs = ocr_profile.readtext_kwargs()
+
+  # Primeira chamada fora da medição (alocações e otimização do grafo)
+  reader.readtext(preprocess(corpus[0].contents, options).image, **readtext_kwargs)
+
+  outputs, latencies = [], []
+  for receipt in corpus:
+    started = time.perf_counter()
+    prepared = preprocess(receipt.contents, options)
+    results = reader.readtext(prepared.image, **readtext_kwargs)
+    outputs.append(ocr_service._format_results(results, prepared))
+    latencies.append((time.perf_counter() - started) * 1000)
+  return outputs, latencies
+
+def _iou(a: dict, b: dict) -> float:
+  x0, y0 = max(a["x_min"], b["x_min"]), max(a["y_min"], b["y_min"])
+  x1, y1 = min(a["x_max"], b["x_max"]), min(a["y_max"], b["y_max"])
+  intersection = max(0, x1 - x0) * max(0, y1 - y0)
+  area = lambda box: (box["x_max"] - box["x_min"]) * (box["y_max"] - box["y_min"])
+  union = area(a) + area(b) - intersection
+  return intersection / union if union else 0.0
+
+def compare(reference: list[list[dict]], candidate: list[list[dict]]) -> dict:
+  """Compara a saída de um backend com a referência (torch), imagem a imagem."""
+  similarities, ious, confidence_diffs = [], [], []
+  identical = values_agree = 0
+
+  for expected, actual in zip(reference, candidate):
+    expected_text = " ".join(item["text"] for item in expected)
+    actual_text = " ".join(item["text"] for item in actual)
+    similarities.append(SequenceMatcher(None, expected_text, actual_text).ratio())
+    identical += expected_text == actual_text
+    values_agree += _extracted_value(expected) == _extracted_value(actual)
+
+    # Cada caixa da referência pareada com a caixa de maior IoU do candidato
+    for item in expected:
+      best = max(actual, key=lambda other: _iou(item["bounding_box"], other["bounding_box"]), default=None)
+      if best is None:
+        ious.append(0.0)
+        continue
+      ious.append(_iou(item["bounding_box"], best["bounding_box"]))
+      confidence_diffs.append(abs(item["confidence"] - best["confidence"]))
+
+  return {
+    "text_similarity_mean": sum(similarities) / len(similarities),
+    "text_similarity_min": min(similarities),
+    "identical_ratio": identical / len(reference),
+    "box_iou_mean": sum(ious) / len(ious) if ious else None,
+    "confidence_diff_mean": sum(confidence_diffs) / len(confidence_diffs) if confidence_diffs else None,
+    "value_agreement": values_agree / len(reference),
+  }
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  add_corpus_arguments(parser)
+  parser.add_argument("--profile", help="Perfil de OCR (fast, balanced, accurate)")
+  parser.add_argument("--backends", nargs="+", default=list(BACKENDS), choices=list(BACKENDS))
+  parser.add_argument("--min-similarity", type=float, default=0.98, help="Semelhança média mínima do texto para a paridade")
+  parser.add_argument("--output", type=Path, help="Arquivo JSON de saída (padrão: stdout)")
+  args = parser.parse_args()
+
+  settings.OCR_MODE = "local"
+  corpus = corpus_from_arguments(args)
+
+  outputs, report_backends = {}, {}
+  references = [REFERENCES[name] for name in args.backends if name in REFERENCES]
+  for name in dict.fromkeys(["torch", *references, *args.backends]):
+    backend, quantized = BACKENDS[name]
+    reader = ocr_service.create_reader(backend, quantized)
+    outputs[name], latencies = run_backend(reader, corpus, args.profile)
+    report_backends[name] = {"latency": latency_summary(latencies)}
+
+  torch_p50 = report_backends["torch"]["latency"]["p50_ms"]
+  parity_ok = True
+  for name in report_backends:
+    report_backends[name]["speedup_p50"] = torch_p50 / report_backends[name]["latency"]["p50_ms"]
+    if name in REFERENCES:
+      parity = compare(outputs[REFERENCES[name]], outputs[name])
+      parity["reference"] = REFERENCES[name]
+      parity["ok"] = parity["text_similarity_mean"] >= args.min_similarity
+      parity_ok &= parity["ok"]
+      report_backends[name]["parity"] = parity
+
+  report = {
+    "revision": _git_revision(),
+    "profile": args.profile or settings.OCR_DEFAULT_PROFILE,
+    "images": len(corpus),
+    "min_similarity": args.min_similarity,
+    "backends": report_backends,
+    "parity_ok": parity_ok,
+  }
+  output = json.dumps(report, indent=2, ensure_ascii=False)
+
+  if args.output:
+    args.output.write_text(output, encoding="utf-8")
+  else:
+    print(output)
+  if not parity_ok:
+    sys.exit(1)
+
+if __name__ == "__main__":
+  main()
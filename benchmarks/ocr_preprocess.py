@@ -0,0 +1,86 @@
+"""
+Benchmark do pré-processamento do OCR: latência x acerto.
+
+Roda o EasyOCR sobre os recibos de referência com cada combinação de etapas de
+pré-processamento e mede o tempo de cada etapa, o tempo total e quantos recibos
+tiveram o valor total esperado encontrado no texto extraído.
+
+Uso:
+  python -m benchmarks.ocr_preprocess --fixtures benchmarks/fixtures/receipts --output preprocess.json
+"""
+import argparse
+import json
+import statistics
+import time
+from pathlib import Path
+from app.api.services import ocr_service
+from app.api.services.ocr_preprocess import PreprocessOptions, preprocess
+
+VARIANTS = {
+  "original": PreprocessOptions(reduced_decode=False, max_dimension=0, grayscale=False),
+  "downscale": PreprocessOptions(reduced_decode=True, max_dimension=1600, grayscale=False),
+  "downscale_gray": PreprocessOptions(reduced_decode=True, max_dimension=1600, grayscale=True),
+  "downscale_gray_contrast": PreprocessOptions(max_dimension=1600, grayscale=True, contrast=True),
+  "all": PreprocessOptions(max_dimension=1600, grayscale=True, contrast=True, deskew=True, crop=True),
+}
+
+def _normalize(text: str) -> str:
+  return "".join(text.split()).lower()
+
+def load_fixtures(directory: Path) -> list[tuple[str, bytes, str]]:
+  expected = json.loads((directory / "expected.json").read_text(encoding="utf-8"))
+  return [
+    (name, (directory / name).read_bytes(), item["total"])
+    for name, item in sorted(expected.items())
+  ]
+
+def run_variant(options: PreprocessOptions, fixtures: list[tuple[str, bytes, str]]) -> dict:
+  reader = ocr_service.get_reader()
+  totals_ms, steps_ms, hits = [], {}, 0
+
+  for _, contents, expected_total in fixtures:
+    started = time.perf_counter()
+    prepared = preprocess(contents, options)
+
+    readtext_started = time.perf_counter()
+    results = reader.readtext(prepared.image)
+    prepared.timings["readtext"] = (time.perf_counter() - readtext_started) * 1000
+    totals_ms.append((time.perf_counter() - started) * 1000)
+
+    for step, duration_ms in prepared.timings.items():
+      steps_ms.setdefault(step, []).append(duration_ms)
+
+    text = _normalize(" ".join(item[1] for item in results))
+    if _normalize(expected_total) in text:
+      hits += 1
+
+  return {
+    "images": len(fixtures),
+    "mean_ms": statistics.mean(totals_ms),
+    "median_ms": statistics.median(totals_ms),
+    "max_ms": max(totals_ms),
+    "steps_mean_ms": {step: statistics.mean(values) for step, values in steps_ms.items()},
+    "total_found_ratio": hits / len(fixtures),
+  }
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--fixtures", type=Path, default=Path("benchmarks/fixtures/receipts"))
+  parser.add_argument("--variants", nargs="*", default=list(VARIANTS), choices=list(VARIANTS))
+  parser.add_argument("--output", type=Path, help="Arquivo JSON de saída (padrão: stdout)")
+  args = parser.parse_args()
+
+  fixtures = load_fixtures(args.fixtures)
+  # Carrega o modelo antes de medir
+  ocr_service.warmup()
+
+  report = {name: run_variant(VARIANTS[name], fixtures) for name in args.variants}
+  output = json.dumps(report, indent=2, ensure_ascii=False)
+
+  if args.output:
+    args.output.write_text(output, encoding="utf-8")
+  else:
+    print(output)
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,109 @@
+"""
+Benchmark da divisão de CPU do OCR: processos x threads do torch (x afinidade).
+
+Para cada combinação, sobe um pool igual ao do ocr_pool (spawn + _init_worker,
+que ajusta as threads do torch e, opcionalmente, fixa os núcleos), envia o corpus
+sintético inteiro de uma vez (como vários usuários ao mesmo tempo) e mede:
+- imagens por segundo;
+- latência de cada imagem do envio até o resultado (inclui a espera na fila): p50/p95/p99;
+- tempo de inferência dentro do processo (sem a fila): p50/p99.
+
+No final indica a combinação de maior vazão e a de menor p99 para os núcleos desta máquina.
+
+Uso:
+  python -m benchmarks.ocr_threads --workers 1 2 4 8 --threads 1 2 4 --affinity both --output threads.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from app.api.services import ocr_pool, ocr_service
+from benchmarks.ocr_throughput import latency_summary, percentile, _git_revision
+from benchmarks.synthetic import SyntheticReceipt, add_corpus_arguments, corpus_from_arguments
+
+def _timed_job(contents: bytes, profile: str | None) -> float:
+  started = time.perf_counter()
+  ocr_service.extract_text_from_image_content(contents, profile)
+  return (time.perf_counter() - started) * 1000
+
+def run_config(corpus: list[SyntheticReceipt], workers: int, threads: int, affinity: bool, profile: str | None) -> dict:
+  # Os processos do pool (spawn) leem as configurações do ambiente ao subir
+  os.environ["OCR_TORCH_THREADS"] = str(threads)
+  os.environ["OCR_CPU_AFFINITY"] = "true" if affinity else "false"
+  os.environ["OCR_MODE"] = "local"
+
+  context = multiprocessing.get_context("spawn")
+  with ProcessPoolExecutor(
+    max_workers=workers,
+    mp_context=context,
+    initializer=ocr_pool._init_worker,
+    initargs=(context.Value("i", 0), workers),
+  ) as executor:
+    # Sobe todos os processos e carrega o modelo antes de medir
+    list(executor.map(_timed_job, [corpus[0].contents] * workers, [profile] * workers))
+
+    started = time.perf_counter()
+    submitted = {
+      executor.submit(_timed_job, receipt.contents, profile): time.perf_counter()
+      for receipt in corpus
+    }
+    latencies, inference = [], []
+    for future in as_completed(submitted):
+      latencies.append((time.perf_counter() - submitted[future]) * 1000)
+      inference.append(future.result())
+    elapsed = time.perf_counter() - started
+
+  return {
+    "workers": workers,
+    "torch_threads": threads,
+    "affinity": affinity,
+    "images_per_s": len(corpus) / elapsed,
+    "latency": latency_summary(latencies),
+    "inference_p50_ms": percentile(inference, 50),
+    "inference_p99_ms": percentile(inference, 99),
+  }
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  add_corpus_arguments(parser)
+  parser.add_argument("--profile", help="Perfil de OCR (fast, balanced, accurate)")
+  parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+  parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4])
+  parser.add_argument("--affinity", choices=["off", "on", "both"], default="off")
+  parser.add_argument("--oversubscribe", action="store_true", help="Inclui combinações com processos x threads acima dos núcleos")
+  parser.add_argument("--output", type=Path, help="Arquivo JSON de saída (padrão: stdout)")
+  args = parser.parse_args()
+
+  cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+  affinity_options = {"off": [False], "on": [True], "both": [False, True]}[args.affinity]
+  corpus = corpus_from_arguments(args)
+
+  results = []
+  for workers in args.workers:
+    for threads in args.threads:
+      if workers * threads > cores and not args.oversubscribe:
+        continue
+      for affinity in affinity_options:
+        results.append(run_config(corpus, workers, threads, affinity, args.profile))
+
+  report = {
+    "revision": _git_revision(),
+    "cores": cores,
+    "profile": args.profile,
+    "images": len(corpus),
+    "results": results,
+    "best_throughput": max(results, key=lambda r: r["images_per_s"]) if results else None,
+    "best_p99": min(results, key=lambda r: r["latency"]["p99_ms"]) if results else None,
+  }
+  output = json.dumps(report, indent=2, ensure_ascii=False)
+
+  if args.output:
+    args.output.write_text(output, encoding="utf-8")
+  else:
+    print(output)
+
+if __name__ == "__main__":
+  main()
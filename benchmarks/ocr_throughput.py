@@ -0,0 +1,160 @@
+"""
+Benchmark de latência e vazão do OCR sobre o corpus sintético (benchmarks.synthetic).
+
+Mede, para o mesmo corpus determinístico:
+- latência por imagem de ocr_service.extract_text_from_image_content (p50/p95/p99),
+  em um único processo, com o modelo já carregado;
+- acerto da extração do valor (receipt_service.parse_ocr_results x valor desenhado),
+  no total e por resolução/rotação/ruído;
+- imagens por segundo com 1, 2, 4... processos (mesmo arranjo do ocr_pool);
+- pico de memória (RSS) do processo principal e dos processos do pool.
+
+A saída é JSON, para comparar execuções entre commits:
+  python -m benchmarks.ocr_throughput --output antes.json
+  python -m benchmarks.ocr_throughput --output depois.json
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import resource
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from app.core.config import settings
+from app.api.services import ocr_service
+from benchmarks.synthetic import SyntheticReceipt, add_corpus_arguments, corpus_from_arguments
+
+def percentile(values: list[float], q: float) -> float:
+  """Percentil por posição mais próxima (q entre 0 e 100)."""
+  ordered = sorted(values)
+  rank = math.ceil(q / 100 * len(ordered))
+  return ordered[max(0, min(len(ordered), rank) - 1)]
+
+def latency_summary(values_ms: list[float]) -> dict:
+  return {
+    "count": len(values_ms),
+    "mean_ms": sum(values_ms) / len(values_ms),
+    "p50_ms": percentile(values_ms, 50),
+    "p95_ms": percentile(values_ms, 95),
+    "p99_ms": percentile(values_ms, 99),
+    "max_ms": max(values_ms),
+  }
+
+def _peak_rss_mb(who: int) -> float:
+  # ru_maxrss vem em KB no Linux e em bytes no macOS
+  peak = resource.getrusage(who).ru_maxrss
+  return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def _extracted_value(results: list[dict]) -> float | None:
+  from app.api.services.receipt_service import parse_ocr_results
+  try:
+    return parse_ocr_results(results, user_id=0).value
+  except ValueError:
+    return None
+
+def _ocr_job(contents: bytes, profile: str | None) -> list[dict]:
+  return ocr_service.extract_text_from_image_content(contents, profile)
+
+def run_latency(corpus: list[SyntheticReceipt], profile: str | None) -> dict:
+  """Uma imagem por vez neste processo: latência e acerto do valor."""
+  latencies, hits = [], 0
+  groups: dict[str, dict[str, list[int]]] = {"width": {}, "rotation": {}, "noise": {}}
+
+  for receipt in corpus:
+    started = time.perf_counter()
+    results = ocr_service.extract_text_from_image_content(receipt.contents, profile)
+    latencies.append((time.perf_counter() - started) * 1000)
+
+    value = _extracted_value(results)
+    hit = value is not None and abs(value - receipt.value) < 0.005
+    hits += hit
+    for param, group in groups.items():
+      counts = group.setdefault(str(receipt.params[param]), [0, 0])
+      counts[0] += hit
+      counts[1] += 1
+
+  return {
+    "latency": latency_summary(latencies),
+    "value_accuracy": hits / len(corpus),
+    "value_accuracy_by": {
+      param: {key: found / total for key, (found, total) in group.items()}
+      for param, group in groups.items()
+    },
+  }
+
+def run_throughput(corpus: list[SyntheticReceipt], workers: int, profile: str | None) -> dict:
+  """Processa o corpus inteiro com `workers` processos (spawn + modelo pré-carregado)."""
+  with ProcessPoolExecutor(
+    max_workers=workers,
+    mp_context=multiprocessing.get_context("spawn"),
+    initializer=ocr_service.warmup,
+  ) as executor:
+    # Garante que todos os processos subiram e carregaram o modelo antes de medir
+    list(executor.map(_ocr_job, [corpus[0].contents] * workers, [profile] * workers))
+
+    started = time.perf_counter()
+    list(executor.map(_ocr_job, [receipt.contents for receipt in corpus], [profile] * len(corpus)))
+    elapsed = time.perf_counter() - started
+
+  return {
+    "workers": workers,
+    "elapsed_s": elapsed,
+    "images_per_s": len(corpus) / elapsed,
+    "images_per_s_per_worker": len(corpus) / elapsed / workers,
+  }
+
+def _git_revision() -> str | None:
+  try:
+    return subprocess.run(
+      ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+    ).stdout.strip()
+  except (OSError, subprocess.CalledProcessError):
+    return None
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  add_corpus_arguments(parser)
+  parser.add_argument("--profile", help="Perfil de OCR (fast, balanced, accurate; padrão: OCR_DEFAULT_PROFILE)")
+  parser.add_argument("--workers", type=int, nargs="*", default=[1, 2, 4], help="Quantidades de processos a medir")
+  parser.add_argument("--output", type=Path, help="Arquivo JSON de saída (padrão: stdout)")
+  args = parser.parse_args()
+
+  # O benchmark mede o OCR deste processo, nunca o servidor compartilhado
+  settings.OCR_MODE = "local"
+
+  corpus = corpus_from_arguments(args)
+
+  warmup_started = time.perf_counter()
+  ocr_service.warmup()
+  warmup_ms = (time.perf_counter() - warmup_started) * 1000
+
+  report = {
+    "revision": _git_revision(),
+    "profile": args.profile or settings.OCR_DEFAULT_PROFILE,
+    "corpus": {
+      "seed": args.seed,
+      "images": len(corpus),
+      "widths": args.widths,
+      "rotations": args.rotations,
+      "noise": args.noise,
+    },
+    "model_load_ms": warmup_ms,
+    "single_process": run_latency(corpus, args.profile),
+    "throughput": [run_throughput(corpus, workers, args.profile) for workers in args.workers],
+    "peak_rss_mb": {
+      "main": _peak_rss_mb(resource.RUSAGE_SELF),
+      "workers": _peak_rss_mb(resource.RUSAGE_CHILDREN),
+    },
+  }
+  output = json.dumps(report, indent=2, ensure_ascii=False)
+
+  if args.output:
+    args.output.write_text(output, encoding="utf-8")
+  else:
+    print(output)
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,110 @@
+"""
+Falsos positivos da detecção de recibos repetidos, sobre o corpus sintético.
+
+Cada recibo base do corpus (benchmarks.synthetic) é renderizado em várias resoluções,
+rotações e níveis de ruído: os pares de variações do mesmo recibo são os repetidos
+esperados; os pares de recibos diferentes (mesmo layout, outros itens e valores) são
+os que não podem virar 409. Para cada distância máxima, conta os pares aceitos pelo
+hash e os que sobram depois da checagem exata (valor igual; o corpus não expõe a
+data, então o número é um limite superior). Compara o pHash de 256 bits em uso
+(receipt_hash_service) com o dHash de 64 bits anterior.
+
+Uso:
+  python -m benchmarks.receipt_duplicates --receipts 40 --output duplicates.json
+  python -m benchmarks.receipt_duplicates --max-distance 8 16 24 32
+"""
+import argparse
+import json
+import time
+from itertools import combinations
+from pathlib import Path
+import numpy as np
+import cv2
+from app.core.config import settings
+from app.api.services import receipt_hash_service
+from app.api.services.ocr_preprocess import preprocess
+from benchmarks.ocr_throughput import latency_summary, _git_revision
+from benchmarks.synthetic import add_corpus_arguments, corpus_from_arguments
+
+def dhash64(image: np.ndarray) -> int:
+  """dHash de 64 bits (grade 9x8), o hash usado antes do pHash."""
+  small = cv2.resize(image, (9, 8), interpolation=cv2.INTER_AREA)
+  return int.from_bytes(np.packbits(small[:, 1:] > small[:, :-1]).tobytes(), "big")
+
+HASHES = {
+  "phash256": (receipt_hash_service.phash, receipt_hash_service.HASH_BITS),
+  "dhash64": (dhash64, 64),
+}
+
+def _pairs(corpus) -> tuple[list[tuple[int, int]], list[tuple[int, int]]]:
+  """(pares do mesmo recibo base, pares de recibos diferentes)."""
+  base = [receipt.name.split("_")[0] for receipt in corpus]
+  same, different = [], []
+  for a, b in combinations(range(len(corpus)), 2):
+    (same if base[a] == base[b] else different).append((a, b))
+  return same, different
+
+def evaluate(hashes: list[int], values: list[float], same, different, max_distances: list[int]) -> list[dict]:
+  distance = lambda pair: receipt_hash_service.hamming(hashes[pair[0]], hashes[pair[1]])
+  same_distances = [distance(pair) for pair in same]
+  different_distances = [(distance(pair), values[pair[0]] == values[pair[1]]) for pair in different]
+
+  rows = []
+  for max_distance in max_distances:
+    false_positives = [same_value for value, same_value in different_distances if value <= max_distance]
+    rows.append({
+      "max_distance": max_distance,
+      "recall": round(sum(value <= max_distance for value in same_distances) / max(len(same), 1), 4),
+      "false_positives": len(false_positives),
+      "false_positive_rate": round(len(false_positives) / max(len(different), 1), 6),
+      "false_positives_after_exact_check": sum(false_positives),
+    })
+  return rows
+
+def run(args: argparse.Namespace) -> dict:
+  corpus = corpus_from_arguments(args)
+  same, different = _pairs(corpus)
+  images = [preprocess(receipt.contents, receipt_hash_service._HASH_OPTIONS).image for receipt in corpus]
+  values = [receipt.value for receipt in corpus]
+
+  report = {
+    "revision": _git_revision(),
+    "images": len(corpus),
+    "same_pairs": len(same),
+    "different_pairs": len(different),
+    "configured_max_distance": settings.RECEIPT_DUPLICATE_MAX_DISTANCE,
+    "hashes": {},
+  }
+  for name, (function, bits) in HASHES.items():
+    timings, hashes = [], []
+    for image in images:
+      started = time.perf_counter()
+      hashes.append(function(image))
+      timings.append((time.perf_counter() - started) * 1000)
+    # Mesmas distâncias relativas para os dois hashes
+    max_distances = [round(distance * bits / receipt_hash_service.HASH_BITS) for distance in args.max_distance]
+    report["hashes"][name] = {
+      "bits": bits,
+      "hash_ms": latency_summary(timings),
+      "thresholds": evaluate(hashes, values, same, different, max_distances),
+    }
+  return report
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  add_corpus_arguments(parser)
+  parser.add_argument("--max-distance", type=int, nargs="+", default=[4, 8, 12, 16, 20, 24, 32],
+                      help="Distâncias máximas avaliadas, em bits de 256 (escaladas para o dHash de 64)")
+  parser.add_argument("--output", type=Path, help="Arquivo JSON de saída (padrão: stdout)")
+  args = parser.parse_args()
+
+  report = run(args)
+  output = json.dumps(report, indent=2, ensure_ascii=False)
+
+  if args.output:
+    args.output.write_text(output, encoding="utf-8")
+  else:
+    print(output)
+
+if __name__ == "__main__":
+  main()
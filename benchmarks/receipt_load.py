@@ -0,0 +1,135 @@
+"""
+Teste de carga do upload de recibos contra uma API rodando, com tráfego CRUD em paralelo.
+
+Mistura, durante --duration segundos:
+- --upload-clients clientes enviando recibos do corpus sintético (benchmarks.synthetic)
+  para POST /receipts/upload, um atrás do outro;
+- --crud-clients clientes listando lançamentos (GET /entries/), o tráfego comum da API.
+
+Enquanto roda, consulta GET /metrics e guarda o pico de conexões em uso no pool do
+banco (db_pool.checked_out). Com o pool como gargalo, a latência do CRUD cresce junto
+com os uploads e o pico chega a DB_POOL_SIZE + DB_MAX_OVERFLOW; sem ele, o CRUD mantém
+a latência de quando roda sozinho (rode com --upload-clients 0 para ter essa referência).
+
+/metrics é por processo: com vários workers do gunicorn, o pico é o do worker consultado.
+
+Que o upload não segura conexão durante o OCR é conferido no pytest
+(tests/test_receipt_db_pool.py); aqui se mede o efeito disso sob carga.
+
+Uso:
+  python -m benchmarks.receipt_load --token <JWT> --upload-clients 16 --crud-clients 8 --output carga.json
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter
+from pathlib import Path
+import httpx
+from benchmarks.ocr_throughput import latency_summary, _git_revision
+from benchmarks.synthetic import add_corpus_arguments, corpus_from_arguments
+
+async def _upload_client(client: httpx.AsyncClient, corpus: list, deadline: float, offset: int, results: dict) -> None:
+  index = offset
+  while time.monotonic() < deadline:
+    receipt = corpus[index % len(corpus)]
+    index += 1
+    started = time.perf_counter()
+    # allow_duplicate: o corpus se repete e a checagem de repetidos não é o que está sendo medido
+    try:
+      response = await client.post(
+        "/receipts/upload",
+        params={"allow_duplicate": "true"},
+        files={"file": (f"{receipt.name}.jpg", receipt.contents, "image/jpeg")},
+      )
+      status = response.status_code
+    except httpx.TimeoutException:
+      status = "timeout"
+    results["upload_ms"].append((time.perf_counter() - started) * 1000)
+    results["upload_status"][status] += 1
+
+async def _crud_client(client: httpx.AsyncClient, deadline: float, results: dict) -> None:
+  while time.monotonic() < deadline:
+    started = time.perf_counter()
+    try:
+      response = await client.get("/entries/")
+      status = response.status_code
+    except httpx.TimeoutException:
+      status = "timeout"
+    results["crud_ms"].append((time.perf_counter() - started) * 1000)
+    results["crud_status"][status] += 1
+
+async def _pool_sampler(client: httpx.AsyncClient, deadline: float, interval: float, results: dict) -> None:
+  while time.monotonic() < deadline:
+    try:
+      pool = (await client.get("/metrics")).json().get("db_pool", {})
+      results["pool_samples"].append(pool)
+    except (httpx.HTTPError, ValueError):
+      pass
+    await asyncio.sleep(interval)
+
+async def run(args: argparse.Namespace, corpus: list) -> dict:
+  results = {
+    "upload_ms": [], "upload_status": Counter(),
+    "crud_ms": [], "crud_status": Counter(),
+    "pool_samples": [],
+  }
+  headers = {"Authorization": f"Bearer {args.token}"}
+  limits = httpx.Limits(max_connections=args.upload_clients + args.crud_clients + 1)
+
+  async with httpx.AsyncClient(base_url=args.base_url, headers=headers, timeout=args.timeout, limits=limits) as client:
+    deadline = time.monotonic() + args.duration
+    await asyncio.gather(
+      *[_upload_client(client, corpus, deadline, offset, results) for offset in range(args.upload_clients)],
+      *[_crud_client(client, deadline, results) for _ in range(args.crud_clients)],
+      _pool_sampler(client, deadline, args.sample_interval, results),
+    )
+
+  samples = results["pool_samples"]
+  return {
+    "revision": _git_revision(),
+    "duration_s": args.duration,
+    "upload_clients": args.upload_clients,
+    "crud_clients": args.crud_clients,
+    "uploads": {
+      "latency": latency_summary(results["upload_ms"]) if results["upload_ms"] else None,
+      "per_second": len(results["upload_ms"]) / args.duration,
+      "status": {str(code): count for code, count in results["upload_status"].items()},
+    },
+    "crud": {
+      "latency": latency_summary(results["crud_ms"]) if results["crud_ms"] else None,
+      "per_second": len(results["crud_ms"]) / args.duration,
+      "status": {str(code): count for code, count in results["crud_status"].items()},
+    },
+    "db_pool": {
+      "size": samples[-1].get("size") if samples else None,
+      "peak_checked_out": max((sample.get("checked_out", 0) for sample in samples), default=None),
+      "peak_overflow": max((sample.get("overflow", 0) for sample in samples), default=None),
+      "samples": len(samples),
+    },
+  }
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  add_corpus_arguments(parser)
+  parser.add_argument("--base-url", default="http://localhost:8000/api/v1")
+  parser.add_argument("--token", required=True, help="JWT de um usuário de teste")
+  parser.add_argument("--upload-clients", type=int, default=16)
+  parser.add_argument("--crud-clients", type=int, default=8)
+  parser.add_argument("--duration", type=float, default=60.0, help="Segundos de carga")
+  parser.add_argument("--timeout", type=float, default=120.0, help="Timeout de cada requisição, em segundos")
+  parser.add_argument("--sample-interval", type=float, default=0.5, help="Intervalo entre consultas a /metrics")
+  parser.add_argument("--output", type=Path, help="Arquivo JSON de saída (padrão: stdout)")
+  args = parser.parse_args()
+
+  corpus = corpus_from_arguments(args) if args.upload_clients else []
+  report = asyncio.run(run(args, corpus))
+  output = json.dumps(report, indent=2, ensure_ascii=False)
+
+  if args.output:
+    args.output.write_text(output, encoding="utf-8")
+  else:
+    print(output)
+
+if __name__ == "__main__":
+  main()
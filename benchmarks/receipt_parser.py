@@ -0,0 +1,82 @@
+"""
+Acerto e tempo do parser de recibos (app/api/services/receipt_parser.py).
+
+Cada caso em benchmarks/fixtures/parser/*.json traz a saída do OCR ("ocr", com
+as caixas) ou apenas as linhas de texto ("lines"), a data de referência ("today")
+e os campos esperados ("expected"). O benchmark informa o acerto por campo, os
+casos que erraram e o tempo médio por recibo.
+
+Os mesmos casos rodam no pytest (tests/test_receipt_parser.py), que é a checagem
+ao mexer nas regras do parser; aqui ficam o relatório de acerto e o tempo. Sai com
+código 1 se algum campo ficar abaixo de --min-accuracy.
+
+Uso:
+  python -m benchmarks.receipt_parser --output parser.json
+"""
+import argparse
+import json
+import sys
+import time
+from datetime import date
+from pathlib import Path
+from app.api.services import receipt_parser
+
+def load_cases(directory: Path) -> list[dict]:
+  cases = []
+  for path in sorted(directory.glob("*.json")):
+    cases.extend(json.loads(path.read_text(encoding="utf-8")))
+  return cases
+
+def _ocr_items(case: dict) -> list[dict]:
+  return case["ocr"] if "ocr" in case else receipt_parser.items_from_lines(case["lines"])
+
+def run(cases: list[dict], repeat: int) -> dict:
+  fields: dict[str, list[int]] = {}
+  failures = []
+  elapsed = 0.0
+
+  for case in cases:
+    items = _ocr_items(case)
+    today = date.fromisoformat(case["today"]) if case.get("today") else None
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+      extracted = receipt_parser.parse(items, today=today)
+    elapsed += time.perf_counter() - started
+
+    actual = extracted.model_dump(mode="json")
+    for field, expected in case["expected"].items():
+      counts = fields.setdefault(field, [0, 0])
+      counts[1] += 1
+      if actual[field] == expected:
+        counts[0] += 1
+      else:
+        failures.append({"case": case["name"], "field": field, "expected": expected, "actual": actual[field]})
+
+  return {
+    "cases": len(cases),
+    "accuracy": {field: hits / total for field, (hits, total) in fields.items()},
+    "failures": failures,
+    "mean_us_per_receipt": elapsed / (len(cases) * repeat) * 1_000_000,
+  }
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  parser.add_argument("--fixtures", type=Path, default=Path("benchmarks/fixtures/parser"))
+  parser.add_argument("--repeat", type=int, default=200, help="Repetições de cada caso na medição de tempo")
+  parser.add_argument("--min-accuracy", type=float, default=1.0)
+  parser.add_argument("--output", type=Path, help="Arquivo JSON de saída (padrão: stdout)")
+  args = parser.parse_args()
+
+  report = run(load_cases(args.fixtures), args.repeat)
+  output = json.dumps(report, indent=2, ensure_ascii=False)
+
+  if args.output:
+    args.output.write_text(output, encoding="utf-8")
+  else:
+    print(output)
+  if any(accuracy < args.min_accuracy for accuracy in report["accuracy"].values()):
+    sys.exit(1)
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,149 @@
+"""
+Corpus sintético de recibos para os benchmarks de OCR.
+
+Desenha recibos com o OpenCV (cv2.putText) a partir de uma semente fixa: a mesma
+semente gera sempre as mesmas imagens, então os resultados de duas execuções
+(ou de dois commits) podem ser comparados diretamente. Cada recibo base é
+renderizado em várias resoluções, rotações e níveis de ruído.
+
+Uso (grava as imagens + expected.json no formato de benchmarks/fixtures/receipts):
+  python -m benchmarks.synthetic --output /tmp/recibos_sinteticos
+"""
+import argparse
+import json
+from dataclasses import dataclass, field
+from itertools import product
+from pathlib import Path
+import numpy as np
+import cv2
+
+MERCHANTS = ["MERCADO BOM PRECO", "FARMACIA SAO JOAO", "PADARIA CENTRAL", "POSTO AVENIDA", "RESTAURANTE SABOR"]
+PRODUCTS = [
+  "ARROZ 5KG", "FEIJAO 1KG", "CAFE 500G", "LEITE 1L", "PAO FRANCES", "DIPIRONA 1G",
+  "GASOLINA", "REFRIGERANTE 2L", "SABAO PO", "MACARRAO", "ACUCAR 1KG", "PRATO FEITO",
+]
+
+# Largura base do desenho; as demais resoluções são escalas dela
+BASE_WIDTH = 600
+
+@dataclass
+class SyntheticReceipt:
+  name: str
+  contents: bytes
+  # Valor total como aparece no recibo ("87,45") e como número
+  total: str
+  value: float
+  params: dict = field(default_factory=dict)
+
+def format_brl(value: float) -> str:
+  return f"{value:,.2f}".replace(",", "_").replace(".", ",").replace("_", ".")
+
+def _receipt_lines(rng: np.random.RandomState) -> tuple[list[tuple[str, str]], float]:
+  merchant = MERCHANTS[rng.randint(len(MERCHANTS))]
+  cnpj = "".join(str(d) for d in rng.randint(0, 10, size=14))
+  lines = [
+    (merchant, ""),
+    (f"CNPJ {cnpj[:2]}.{cnpj[2:5]}.{cnpj[5:8]}/{cnpj[8:12]}-{cnpj[12:]}", ""),
+    (f"{rng.randint(1, 29):02d}/{rng.randint(1, 13):02d}/2024 {rng.randint(8, 22):02d}:{rng.randint(0, 60):02d}", ""),
+    ("-" * 32, ""),
+  ]
+  total = 0.0
+  for index in rng.choice(len(PRODUCTS), size=rng.randint(3, 8), replace=False):
+    price = round(rng.randint(100, 10000) / 100, 2)
+    total += price
+    lines.append((PRODUCTS[index], format_brl(price)))
+  total = round(total, 2)
+  lines.append(("-" * 32, ""))
+  lines.append(("TOTAL R$", format_brl(total)))
+  return lines, total
+
+def render(lines: list[tuple[str, str]], width: int) -> np.ndarray:
+  """Desenha as linhas (texto à esquerda, valor à direita) numa imagem branca de largura width."""
+  scale = width / BASE_WIDTH
+  line_height = int(36 * scale)
+  margin = int(24 * scale)
+  font_scale = 0.8 * scale
+  thickness = max(1, int(round(2 * scale)))
+  height = margin * 2 + line_height * len(lines)
+
+  image = np.full((height, width), 255, dtype=np.uint8)
+  for row, (left, right) in enumerate(lines):
+    baseline = margin + line_height * (row + 1) - int(10 * scale)
+    cv2.putText(image, left, (margin, baseline), cv2.FONT_HERSHEY_SIMPLEX, font_scale, 0, thickness, cv2.LINE_AA)
+    if right:
+      (text_width, _), _ = cv2.getTextSize(right, cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness)
+      cv2.putText(image, right, (width - margin - text_width, baseline), cv2.FONT_HERSHEY_SIMPLEX, font_scale, 0, thickness, cv2.LINE_AA)
+  return image
+
+def rotate(image: np.ndarray, angle: float) -> np.ndarray:
+  if not angle:
+    return image
+  height, width = image.shape[:2]
+  matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+  return cv2.warpAffine(image, matrix, (width, height), borderValue=255)
+
+def add_noise(image: np.ndarray, sigma: float, rng: np.random.RandomState) -> np.ndarray:
+  if not sigma:
+    return image
+  noisy = image.astype(np.float32) + rng.normal(0, sigma, image.shape)
+  return np.clip(noisy, 0, 255).astype(np.uint8)
+
+def generate_corpus(
+  seed: int = 42,
+  receipts: int = 4,
+  widths: tuple[int, ...] = (600, 1200, 2400),
+  rotations: tuple[float, ...] = (0, 4),
+  noise_levels: tuple[float, ...] = (0, 12),
+) -> list[SyntheticReceipt]:
+  """Gera o corpus: receipts recibos base x resoluções x rotações x níveis de ruído (JPEG)."""
+  rng = np.random.RandomState(seed)
+  corpus = []
+  for receipt_index in range(receipts):
+    lines, total = _receipt_lines(rng)
+    for width, angle, sigma in product(widths, rotations, noise_levels):
+      image = add_noise(rotate(render(lines, width), angle), sigma, rng)
+      ok, encoded = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, 90])
+      if not ok:
+        raise RuntimeError("Falha ao codificar a imagem sintética.")
+      corpus.append(SyntheticReceipt(
+        name=f"recibo{receipt_index:02d}_w{width}_r{angle:g}_n{sigma:g}.jpg",
+        contents=encoded.tobytes(),
+        total=format_brl(total),
+        value=total,
+        params={"width": width, "rotation": angle, "noise": sigma},
+      ))
+  return corpus
+
+def add_corpus_arguments(parser: argparse.ArgumentParser) -> None:
+  """Argumentos do corpus compartilhados pelos benchmarks."""
+  parser.add_argument("--seed", type=int, default=42)
+  parser.add_argument("--receipts", type=int, default=4, help="Quantidade de recibos base")
+  parser.add_argument("--widths", type=int, nargs="+", default=[600, 1200, 2400])
+  parser.add_argument("--rotations", type=float, nargs="+", default=[0, 4])
+  parser.add_argument("--noise", type=float, nargs="+", default=[0, 12])
+
+def corpus_from_arguments(args: argparse.Namespace) -> list[SyntheticReceipt]:
+  return generate_corpus(
+    seed=args.seed,
+    receipts=args.receipts,
+    widths=tuple(args.widths),
+    rotations=tuple(args.rotations),
+    noise_levels=tuple(args.noise),
+  )
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+  add_corpus_arguments(parser)
+  parser.add_argument("--output", type=Path, required=True, help="Diretório de saída")
+  args = parser.parse_args()
+
+  args.output.mkdir(parents=True, exist_ok=True)
+  expected = {}
+  for receipt in corpus_from_arguments(args):
+    (args.output / receipt.name).write_bytes(receipt.contents)
+    expected[receipt.name] = {"total": receipt.total, **receipt.params}
+  (args.output / "expected.json").write_text(json.dumps(expected, indent=2), encoding="utf-8")
+  print(f"{len(expected)} recibos gravados em {args.output}")
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,40 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# Importar a aplicação não pode carregar o OCR: o easyocr.Reader (e o torch) só sobem
+# no warmup ou no primeiro pedido. Com eles o import levava dezenas de segundos; o
+# orçamento abaixo pega a regressão com folga para máquinas lentas.
+IMPORT_BUDGET_SECONDS = float(os.environ.get("APP_IMPORT_BUDGET_SECONDS", "3.0"))
+HEAVY_MODULES = ("torch", "easyocr")
+ROOT = Path(__file__).resolve().parent.parent
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import app.main
+elapsed = time.perf_counter() - started
+print(json.dumps({"seconds": elapsed, "loaded": [name for name in %r if name in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+def _import_app() -> dict:
+  """Importa app.main em um processo novo (sem nada em cache no sys.modules)."""
+  completed = subprocess.run(
+    [sys.executable, "-c", _PROBE],
+    cwd=ROOT,
+    capture_output=True,
+    text=True,
+    timeout=120,
+    check=True,
+  )
+  return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def test_import_does_not_load_ocr():
+  assert _import_app()["loaded"] == []
+
+def test_import_within_budget():
+  # Melhor de três: o primeiro processo ainda paga o cache de disco e dos .pyc
+  best = min(_import_app()["seconds"] for _ in range(3))
+  assert best < IMPORT_BUDGET_SECONDS, f"import app.main levou {best:.2f}s (orçamento: {IMPORT_BUDGET_SECONDS:g}s)"
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("easyocr")
+pytest.importorskip("onnxruntime")
+
+import cv2
+from app.core.config import settings
+from app.api.services import ocr_onnx, ocr_service
+from benchmarks.ocr_backends import compare, run_backend
+from benchmarks.synthetic import SyntheticReceipt, generate_corpus
+
+# Paridade do backend ONNX com o torch de mesma precisão (FP32; ver ocr_onnx), sobre o
+# corpus sintético. Precisa dos modelos exportados em OCR_ONNX_DIR (make ocr-onnx).
+if not ocr_onnx.model_path(settings.OCR_ONNX_DIR, ocr_onnx.DETECTOR_FILE, False).is_file():
+  pytest.skip(f"Modelos ONNX não exportados em {settings.OCR_ONNX_DIR}", allow_module_level=True)
+
+CORPUS = generate_corpus(receipts=2, widths=(600, 1200), rotations=(0, 4), noise_levels=(0, 12))
+
+@pytest.fixture(scope="module")
+def readers() -> dict:
+  return {
+    "torch": ocr_service.create_reader("torch", quantized=False),
+    "onnx": ocr_service.create_reader("onnx", quantized=False),
+  }
+
+def _decode(receipt: SyntheticReceipt, flags: int) -> np.ndarray:
+  return cv2.imdecode(np.frombuffer(receipt.contents, np.uint8), flags)
+
+def _detector_input(receipt: SyntheticReceipt):
+  """Entrada do CRAFT como o EasyOCR a monta: RGB redimensionado e normalizado, NCHW."""
+  from easyocr.imgproc import normalizeMeanVariance, resize_aspect_ratio
+  image = cv2.cvtColor(_decode(receipt, cv2.IMREAD_COLOR), cv2.COLOR_BGR2RGB)
+  resized, _, _ = resize_aspect_ratio(image, 1280, interpolation=cv2.INTER_LINEAR, mag_ratio=1.0)
+  return torch.from_numpy(normalizeMeanVariance(resized).transpose(2, 0, 1)).unsqueeze(0)
+
+def _recognizer_input(receipt: SyntheticReceipt):
+  """Faixa do cabeçalho em tons de cinza, com 64 px de altura e valores em [-1, 1]."""
+  gray = _decode(receipt, cv2.IMREAD_GRAYSCALE)
+  band = gray[: max(gray.shape[0] // 8, 1)]
+  width = max(32, round(band.shape[1] * 64 / band.shape[0]))
+  crop = cv2.resize(band, (width, 64), interpolation=cv2.INTER_AREA)
+  return torch.from_numpy((crop.astype(np.float32) / 255 - 0.5) / 0.5)[None, None]
+
+@pytest.mark.parametrize("receipt", CORPUS, ids=lambda receipt: receipt.name)
+def test_detector_matches_torch(readers, receipt):
+  x = _detector_input(receipt)
+  with torch.no_grad():
+    expected = readers["torch"].detector(x)
+  actual = readers["onnx"].detector(x)
+  for expected_output, actual_output in zip(expected, actual):
+    np.testing.assert_allclose(actual_output.numpy(), expected_output.numpy(), atol=1e-3)
+
+@pytest.mark.parametrize("receipt", CORPUS, ids=lambda receipt: receipt.name)
+def test_recognizer_matches_torch(readers, receipt):
+  x = _recognizer_input(receipt)
+  with torch.no_grad():
+    expected = readers["torch"].recognizer(x, None)
+  actual = readers["onnx"].recognizer(x, None)
+  np.testing.assert_allclose(actual.numpy(), expected.numpy(), atol=1e-3)
+  # O que chega ao decodificador CTC: o caractere mais provável de cada passo
+  assert (actual.argmax(2) == expected.argmax(2)).all()
+
+def test_readtext_matches_torch(readers):
+  reference, _ = run_backend(readers["torch"], CORPUS, None)
+  candidate, _ = run_backend(readers["onnx"], CORPUS, None)
+  parity = compare(reference, candidate)
+  assert parity["identical_ratio"] == 1.0, parity
+  assert parity["value_agreement"] == 1.0, parity
@@ -0,0 +1,37 @@
+import asyncio
+import threading
+import pytest
+from app.core.config import settings
+from app.api.services import ocr_pool
+
+@pytest.fixture
+def single_slot(monkeypatch):
+  """Pool sem processos (jobs em thread) com uma única vaga na fila."""
+  monkeypatch.setattr(settings, "OCR_WORKERS", 0)
+  monkeypatch.setattr(settings, "OCR_MAX_QUEUE", 0)
+  monkeypatch.setattr(ocr_pool, "_executor", None)
+  monkeypatch.setattr(ocr_pool, "_threads", None)
+  monkeypatch.setattr(ocr_pool, "_slots", None)
+
+def test_timed_out_job_keeps_its_slot_until_it_finishes(single_slot):
+  release = threading.Event()
+
+  def slow_job(payload, profile):
+    release.wait(5)
+    return payload, None
+
+  async def scenario():
+    with pytest.raises(ocr_pool.OCRTimeoutError):
+      await ocr_pool._submit(slow_job, "lento", 0.05, "fast")
+    # O job abandonado continua rodando: a vaga ainda é dele
+    with pytest.raises(ocr_pool.OCRQueueFullError):
+      await ocr_pool._submit(slow_job, "outro", 1.0, "fast")
+
+    release.set()
+    for _ in range(100):
+      if not ocr_pool._slots.locked():
+        break
+      await asyncio.sleep(0.01)
+    assert await ocr_pool._submit(slow_job, "depois", 1.0, "fast") == "depois"
+
+  asyncio.run(scenario())
@@ -0,0 +1,46 @@
+from datetime import date
+from app.api.services import ocr_artifact_service, receipt_parser
+from app.api.services.ocr_reparse import ReparseReport, _merge, reparse_chunk
+from app.api.services.receipt_service import complement_with_qr, parse_ocr_results, parse_receipt_qr
+from app.utils.enum import TipoLancamento
+
+USER_ID = 7
+
+def _access_key(base: str) -> str:
+  total, weight = 0, 2
+  for digit in reversed(base):
+    total += int(digit) * weight
+    weight = 2 if weight == 9 else weight + 1
+  remainder = total % 11
+  return base + str(0 if remainder < 2 else 11 - remainder)
+
+# NFC-e (versão 1) sem o valor total: data de emissão no QR Code, valor só no OCR
+ACCESS_KEY = _access_key("3524011234567800019565001000000123100000001")
+QR_PAYLOAD = f"https://www.nfce.fazenda.sp.gov.br/qrcode?chNFe={ACCESS_KEY}&dhEmi={'2024-01-15T10:30:00'.encode().hex()}"
+
+# Sem o QR Code, o OCR sozinho lê um recebimento em outra data
+LINES = ["PIX RECEBIDO", "DE: FULANO DE TAL", "DATA 20/02/2024", "VALOR R$ 42,50"]
+
+def _analysis():
+  results = receipt_parser.items_from_lines(LINES)
+  return results, complement_with_qr(parse_ocr_results(results, USER_ID), parse_receipt_qr(QR_PAYLOAD))
+
+def test_nfce_without_value_fills_type_and_date():
+  results, entry_data = _analysis()
+  assert entry_data.entry_type_id == TipoLancamento.DESPESA
+  assert entry_data.entry_date == date(2024, 1, 15)
+  assert parse_ocr_results(results, USER_ID).entry_date != entry_data.entry_date
+
+def test_reparse_keeps_fields_from_nfce_qr():
+  results, entry_data = _analysis()
+  stored = ocr_artifact_service.snapshot(entry_data)
+
+  [(artifact_id, parsed)] = reparse_chunk([(1, USER_ID, ocr_artifact_service.pack(results), QR_PAYLOAD)])
+  assert artifact_id == 1
+  assert parsed == stored
+
+  report = ReparseReport()
+  final, new_parsed = _merge(stored, stored, parsed, report)
+  assert final == stored
+  assert new_parsed == stored
+  assert not any(report.changed_fields.values())
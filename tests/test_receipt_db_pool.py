@@ -0,0 +1,65 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.dialects.mysql import MEDIUMBLOB, YEAR
+from sqlalchemy.ext.compiler import compiles
+from app.core.config import settings
+from app.core.security import create_access_token
+from app.api.services import ocr_pool, receipt_parser
+from app.db import session as db_session
+from app.db.base import Base
+from app.main import app
+from app.models.user import User
+from benchmarks.synthetic import generate_corpus
+
+# O upload de recibo não pode segurar conexão do pool durante o OCR: o usuário é
+# carregado em uma sessão já fechada (get_current_user_detached) e cada ida ao banco
+# usa uma sessão curta. O banco de teste é um SQLite com pool, no lugar do MySQL.
+
+@compiles(MEDIUMBLOB, "sqlite")
+def _mediumblob(type_, compiler, **kw):
+  return "BLOB"
+
+@compiles(YEAR, "sqlite")
+def _year(type_, compiler, **kw):
+  return "INTEGER"
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+  engine = create_engine(f"sqlite:///{tmp_path / 'app.db'}", pool_size=5, max_overflow=0)
+  Base.metadata.create_all(engine)
+  monkeypatch.setattr(db_session, "engine", engine)
+  previous_bind = db_session.SessionLocal.kw["bind"]
+  db_session.SessionLocal.configure(bind=engine)
+  yield engine
+  db_session.SessionLocal.configure(bind=previous_bind)
+  engine.dispose()
+
+@pytest.fixture
+def token(database) -> str:
+  with db_session.SessionLocal() as db:
+    user = User(email="recibo@example.com", full_name="Fulano de Tal", password="x")
+    db.add(user)
+    db.commit()
+    return create_access_token({"sub": str(user.id)})
+
+def test_no_connection_checked_out_during_ocr(token, monkeypatch):
+  checked_out_during_ocr = []
+
+  async def extract_text(contents, profile=None):
+    checked_out_during_ocr.append(db_session.pool_status()["checked_out"])
+    return receipt_parser.items_from_lines(["SUPERMERCADO EXEMPLO", "DATA 10/05/2024", "TOTAL R$ 42,50"])
+
+  monkeypatch.setattr(ocr_pool, "extract_text", extract_text)
+  receipt = generate_corpus(receipts=1, widths=(600,), rotations=(0,), noise_levels=(0,))[0]
+
+  client = TestClient(app)
+  response = client.post(
+    f"{settings.API_V1_STR}/receipts/upload",
+    headers={"Authorization": f"Bearer {token}"},
+    files={"file": (receipt.name, receipt.contents, "image/jpeg")},
+  )
+
+  assert response.status_code == 201, response.text
+  assert checked_out_during_ocr == [0]
+  assert db_session.pool_status()["checked_out"] == 0
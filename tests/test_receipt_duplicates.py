@@ -0,0 +1,53 @@
+import asyncio
+from datetime import date
+import pytest
+from app.api.services import ocr_pool, receipt_hash_service, receipt_parser, receipt_service
+from app.api.services.nfce_service import NFCeData
+from app.schemas.entry import EntryOut
+from app.utils.enum import Categoria, TipoLancamento
+
+ACCESS_KEY = "35240112345678000195650010000001231000000014"
+
+def _suspect(description: str, value: float = 42.5) -> receipt_hash_service.Suspect:
+  return (6, EntryOut(
+    id=10, title="Lançamento via NFC-e", entry_date=date(2024, 1, 15), description=description, value=value,
+    entry_type_id=TipoLancamento.DESPESA, category_id=Categoria.OUTROS, user_id=7,
+    entry_type_name=None, category_name=None, user_name=None,
+  ))
+
+@pytest.fixture
+def ocr_calls(monkeypatch) -> list[str]:
+  """Foto com o QR Code de uma NFC-e sem valor; devolve a lista de chamadas ao OCR."""
+  calls = []
+
+  async def read_receipt_qr(contents):
+    return NFCeData(access_key=ACCESS_KEY, cnpj=ACCESS_KEY[6:20], uf="35", model="65")
+
+  async def extract_text(contents, profile=None):
+    calls.append(profile)
+    return receipt_parser.items_from_lines(["SUPERMERCADO EXEMPLO", "TOTAL R$ 42,50"])
+
+  monkeypatch.setattr(receipt_service, "read_receipt_qr", read_receipt_qr)
+  monkeypatch.setattr(ocr_pool, "extract_text", extract_text)
+  return calls
+
+def test_same_access_key_is_rejected_before_ocr(ocr_calls):
+  suspects = [_suspect(f"NFC-e {ACCESS_KEY} - emitente CNPJ 12.345.678/0001-95")]
+  with pytest.raises(receipt_hash_service.DuplicateReceiptError) as error:
+    asyncio.run(receipt_service.analyze_receipt(b"imagem", 7, suspects=suspects))
+  assert error.value.entry_id == 10
+  assert ocr_calls == []
+
+def test_other_access_key_goes_to_ocr(ocr_calls):
+  # Outra nota, com valor diferente: só o OCR decide, e não é repetido
+  suspects = [_suspect("NFC-e 35240112345678000195650010000009991000000011 - emitente CNPJ 12.345.678/0001-95", value=10.0)]
+  analysis = asyncio.run(receipt_service.analyze_receipt(b"imagem", 7, suspects=suspects))
+  assert len(ocr_calls) == 1
+  assert analysis.entry_data.value == 42.5
+
+def test_qr_with_value_confirms_by_value_and_date():
+  nfce = NFCeData(access_key=ACCESS_KEY, cnpj=ACCESS_KEY[6:20], uf="35", model="65", issue_date=date(2024, 1, 15), total=42.5)
+  entry_data = receipt_service.entry_from_qr(nfce, 7)
+  with pytest.raises(receipt_hash_service.DuplicateReceiptError):
+    receipt_service.confirm_before_ocr([_suspect("Lançamento manual")], nfce, entry_data)
+  receipt_service.confirm_before_ocr([_suspect("Lançamento manual", value=10.0)], nfce, entry_data)
@@ -0,0 +1,23 @@
+import json
+from datetime import date
+from pathlib import Path
+import pytest
+from app.api.services import receipt_parser
+
+# Os mesmos casos do benchmark (benchmarks/receipt_parser.py): saída do OCR ("ocr", com as
+# caixas) ou só as linhas ("lines"), a data de referência ("today") e os campos esperados.
+FIXTURES = Path(__file__).resolve().parent.parent / "benchmarks" / "fixtures" / "parser"
+
+def _cases() -> list[dict]:
+  cases = []
+  for path in sorted(FIXTURES.glob("*.json")):
+    cases.extend(json.loads(path.read_text(encoding="utf-8")))
+  return cases
+
+@pytest.mark.parametrize("case", _cases(), ids=lambda case: case["name"])
+def test_parse_fixture(case: dict):
+  items = case["ocr"] if "ocr" in case else receipt_parser.items_from_lines(case["lines"])
+  today = date.fromisoformat(case["today"]) if case.get("today") else None
+
+  actual = receipt_parser.parse(items, today=today).model_dump(mode="json")
+  assert {field: actual[field] for field in case["expected"]} == case["expected"]